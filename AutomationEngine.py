@@ -1,10 +1,39 @@
-import sys
-from PySide6.QtWidgets import QApplication
-from GUI.MainWindow import MainWindow
-
-if __name__ == "__main__":
-    app = QApplication(sys.argv)
-    app.setStyle("Fusion")
-    window = MainWindow()
-    window.show()
-    sys.exit(app.exec())
\ No newline at end of file
+import sys
+import contextlib
+
+# Must be set up before anything heavy is imported so the import timings are complete
+startup_profiler = None
+if "--profile-startup" in sys.argv:
+    sys.argv.remove("--profile-startup")
+    from engine.StartupProfiler import StartupProfiler
+    startup_profiler = StartupProfiler()
+    startup_profiler.install()
+
+def _phase(name):
+    return startup_profiler.phase(name) if startup_profiler else contextlib.nullcontext()
+
+with _phase("import PySide6 + MainWindow"):
+    from PySide6.QtWidgets import QApplication
+    from GUI.MainWindow import MainWindow
+
+def _report_startup(window):
+    startup_profiler.uninstall()
+    for line in startup_profiler.report_lines():
+        print(line)
+        window.output_viewport.append_output(line) # Windowed builds have no console
+
+if __name__ == "__main__":
+    if getattr(sys, "frozen", False): # Matrix runs spawn worker processes; frozen builds re-launch this executable for them
+        import multiprocessing # Otherwise only loaded by the first matrix run
+        multiprocessing.freeze_support()
+    with _phase("QApplication"):
+        app = QApplication(sys.argv)
+        app.setStyle("Fusion")
+    with _phase("MainWindow.__init__"):
+        window = MainWindow()
+    with _phase("MainWindow.show"):
+        window.show()
+    if startup_profiler:
+        from PySide6.QtCore import QTimer
+        QTimer.singleShot(0, lambda: _report_startup(window)) # Runs once the first frame is up
+    sys.exit(app.exec())
@@ -1,282 +1,831 @@
-import os, json, inspect, importlib
-from PySide6.QtWidgets import (
-    QMainWindow,
-    QWidget,
-    QHBoxLayout,
-    QVBoxLayout,
-    QListWidget,
-    QToolBar,
-    QLabel,
-    QComboBox, # NEW: Import QComboBox
-    QSizePolicy, # NEW: For toolbar spacing
-)
-from PySide6.QtCore import Qt
-from PySide6.QtGui import QIcon, QAction, QKeySequence 
-from GUI.Viewports.OutputViewport import OutputViewport
-
-class MainWindow(QMainWindow):
-    def __init__(self):
-        super().__init__()
-        self.config_data = {}
-        self.synced_api_name = None # To track the name of the currently synced API
-        self.current_api_instance = None
-        self._load_config()
-
-        self.setWindowTitle("Automation Engine")
-        self.setGeometry(100, 100, 800, 600)
-
-        # Load configuration data first, as comboboxes depend on it
-
-        central_widget = QWidget()
-        main_layout = QVBoxLayout(central_widget)
-
-        # Top Menu
-        menu_bar = self.menuBar()
-        file_menu = menu_bar.addMenu("File")
-        help_menu = menu_bar.addMenu("Help")
-        self.setMenuBar(menu_bar)
-
-        toolbar = QToolBar("Main Toolbar")
-        toolbar.setMovable(False)
-        self.addToolBar(toolbar) # Add the toolbar to the QMainWindow early
-
-
-        # 1. API ComboBox
-        toolbar.addWidget(QLabel("  API: "))
-        self.api_combobox = QComboBox(self)
-        self.api_combobox.setFixedWidth(150)
-        self.api_combobox.currentIndexChanged.connect(self._update_environment_combobox)
-        toolbar.addWidget(self.api_combobox)
-
-        # 2. Environment ComboBox
-        toolbar.addWidget(QLabel("  Env: "))
-        self.env_combobox = QComboBox(self)
-        self.env_combobox.setFixedWidth(100)
-        self.env_combobox.currentIndexChanged.connect(self._update_tenant_combobox)
-        toolbar.addWidget(self.env_combobox)
-
-        # 3. Tenant ComboBox
-        toolbar.addWidget(QLabel("  Tenant: "))
-        self.tenant_combobox = QComboBox(self)
-        self.tenant_combobox.setFixedWidth(150)
-        toolbar.addWidget(self.tenant_combobox)
-
-        # Initial population of comboboxes after they are created and connected
-        self._populate_api_combobox() # This will trigger subsequent updates
-
-        # 4. Visual Separator
-        toolbar.addWidget(self._create_toolbar_separator()) # <--- REPLACED addSeparator() with this call
-
-        self.sync_action = QAction(QIcon.fromTheme("view-refresh"), "Sync API", self)
-        self.sync_action.setEnabled(False) # Disabled by default
-        self.sync_action.triggered.connect(self._sync_api)
-        toolbar.addAction(self.sync_action)
-        # 5. Play Button
-        play_action = QAction(QIcon.fromTheme("media-playback-start"), "Play", self)
-        toolbar.addAction(play_action)
-
-
-        spacer = QWidget()
-        spacer.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Expanding)
-        toolbar.addWidget(spacer)
-
-        # -- Main Content Area (Node Library + Blueprint Viewport) --
-        main_content_layout = QHBoxLayout()
-
-        # API Call List (QListWidget, no drag)
-        self.api_list = QListWidget()
-        self.api_list.setFixedWidth(200)
-        #self._update_api_actions_list()
-        main_content_layout.addWidget(self.api_list)
-        
-        # Action Viewport (Placeholder for now)
-        # This will later be replaced by your custom ActionViewport widget
-        self.action_viewport_placeholder = QLabel("Action Viewport: Detailed API Call Configuration")
-        self.action_viewport_placeholder.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        main_content_layout.addWidget(self.action_viewport_placeholder, 1) # Stretch factor to take up space
-
-        main_layout.addLayout(main_content_layout, 1) # Stretch factor for the main content area
-
-        # Output View
-        self.output_viewport = OutputViewport()
-        self.output_viewport.command_entered.connect(self.handle_shell_command)
-        main_layout.addWidget(self.output_viewport,0)
-
-        self.setCentralWidget(central_widget)
-
-        close_action = QAction("Close Application", self) # Give it a descriptive name
-        close_action.setShortcut(QKeySequence(Qt.Key.Key_Escape))
-        close_action.triggered.connect(self.close)
-        
-        # Main Window Actions
-        self.addAction(close_action)
-        
-
-    def _load_config(self):
-        config_path = os.path.join(os.path.dirname(__file__), '..', 'data', 'config.json')
-        try:
-            with open(config_path, 'r') as f:
-                self.config_data = json.load(f)
-            print("Config loaded successfully!")
-        except FileNotFoundError:
-            print(f"Error: config.json not found at {config_path}")
-            self.config_data = {}
-        except json.JSONDecodeError:
-            print(f"Error: config.json has invalid JSON format at {config_path}")
-            self.config_data = {}
-
-    def _create_toolbar_separator(self):
-        separator = QWidget(self)
-        separator.setFixedWidth(7) # Let's keep your 3px width
-        # Match toolbar height dynamically or use a fixed reasonable value
-        # Access self.toolbar after it's been added
-        # If toolbar is already fully initialized and has a height
-        separator.setFixedHeight(13)
-
-        # Style the separator: a dark gray background with a subtle border and margin
-        separator.setStyleSheet("background-color: #555; border: 2px solid #444; margin-left: 7px;") # 10px margin on the left
-        return separator
-    
-    def _populate_api_combobox(self):
-        self.api_combobox.blockSignals(True)
-        self.api_combobox.clear()
-        apis: dict = self.config_data.get("apis", {})
-        if apis:
-            self.api_combobox.addItems(sorted(apis.keys()))
-        if self.api_combobox.count() > 0:
-            self.api_combobox.setCurrentIndex(-1) # Default to no selection
-        else:
-            # If no APIs, ensure dependent UI is also cleared/disabled
-            self._update_environment_combobox() # This will cascade to clear others
-        self.api_combobox.blockSignals(False)
-
-    def _update_environment_combobox(self):
-        selected_api = self.api_combobox.currentText()
-        self.env_combobox.blockSignals(True)
-        self.env_combobox.clear()
-        if selected_api and "apis" in self.config_data and selected_api in self.config_data["apis"]:
-            api_details = self.config_data["apis"][selected_api]
-            if "environments" in api_details:
-                environments = sorted(api_details["environments"].keys())
-                self.env_combobox.addItems(environments)
-        self.env_combobox.blockSignals(False)
-        # Enable/disable sync button based on API selection
-        if hasattr(self, 'sync_action'):
-            can_sync = bool(selected_api) and (selected_api != self.synced_api_name)
-            self.sync_action.setEnabled(can_sync)
-
-        self._update_tenant_combobox() # Trigger update for tenant
-        # self._update_api_actions_list() # Moved to be called by _update_tenant_combobox
-
-    def _update_tenant_combobox(self):
-        selected_api = self.api_combobox.currentText()
-        selected_env = self.env_combobox.currentText()
-        self.tenant_combobox.blockSignals(True)
-        self.tenant_combobox.clear()
-
-        if selected_api and selected_env and \
-           "apis" in self.config_data and \
-           selected_api in self.config_data["apis"] and \
-           "environments" in self.config_data["apis"][selected_api]: # Check that 'environments' key exists
-
-            environments_data = self.config_data["apis"][selected_api]["environments"]
-            if selected_env in environments_data: # <--- CRITICAL NEW CHECK: Does the selected_env actually exist?
-                env_details:dict = environments_data[selected_env]
-                if env_details and "tenants" in env_details:
-                    tenants_data = env_details.get("tenants", {})
-                    tenants = sorted(tenants_data.keys())
-                    self.tenant_combobox.addItems(tenants)
-        self.tenant_combobox.blockSignals(False)
-        self._update_api_actions_list() #
-
-    def _update_api_actions_list(self):
-        """
-        Populates the api_list QListWidget with methods from the selected API
-        that are marked with the _is_api_call attribute.
-        """
-        self.api_list.clear()
-        selected_api_name = self.api_combobox.currentText()
-
-        if not selected_api_name:
-            return
-
-        api_config = self.config_data.get("apis", {}).get(selected_api_name)
-        if not api_config or "module" not in api_config or "class" not in api_config:
-            # self.output_viewport.append_output(f"Config for API '{selected_api_name}' missing module/class.")
-            print(f"Config for API '{selected_api_name}' missing module/class.")
-            return
-
-        module_name = api_config["module"]
-        class_name = api_config["class"]
-
-        try:
-            module = importlib.import_module(module_name)
-            api_class = getattr(module, class_name)
-
-            for member_name, member_obj in inspect.getmembers(api_class):
-                if inspect.isfunction(member_obj) and hasattr(member_obj, '_is_api_call') and member_obj._is_api_call: # type: ignore[attr-defined]
-                    friendly_name = member_name.replace('_', ' ').title()
-                    self.api_list.addItem(friendly_name)
-        except ImportError:
-            self.output_viewport.append_output(f"Error: Could not import API module {module_name}")
-            print(f"Error: Could not import module {module_name}")
-        except AttributeError:
-            self.output_viewport.append_output(f"Error: Could not find API class {class_name} in {module_name}")
-            print(f"Error: Could not find class {class_name} in module {module_name}")
-        except Exception as e:
-            self.output_viewport.append_output(f"Error loading actions for {selected_api_name}: {e}")
-
-
-    def _sync_api(self):
-        selected_api_name = self.api_combobox.currentText()
-        if not selected_api_name:
-            self.output_viewport.append_output("No API selected to sync.")
-            return
-
-        api_config = self.config_data.get("apis", {}).get(selected_api_name)
-        if not api_config or "module" not in api_config or "class" not in api_config:
-            self.output_viewport.append_output(f"Configuration for API '{selected_api_name}' is missing module/class details.")
-            self.current_api_instance = None
-            return
-
-        # Assume failure for synced_api_name until successful instantiation
-        original_synced_name = self.synced_api_name # Store in case we need to revert or for logic
-        self.synced_api_name = None # Tentatively clear, will be set on success
-        module_name = api_config["module"]
-        class_name = api_config["class"]
-
-        try:
-            self.output_viewport.append_output(f"Syncing API: {selected_api_name}...")
-            module = importlib.import_module(module_name)
-            api_class = getattr(module, class_name)
-            self.current_api_instance = api_class() # Instantiate the API
-            self.synced_api_name = selected_api_name # Mark this API as successfully synced
-            self.output_viewport.append_output(f"Successfully synced and instantiated API: {selected_api_name} ({class_name})")
-            # You might want to do more here, like passing environment-specific config to the API instance
-            # For example: self.current_api_instance.configure(self.env_combobox.currentText(), self.tenant_combobox.currentText())
-        except ImportError:
-            self.output_viewport.append_output(f"Error: Could not import API module '{module_name}'.")
-            self.current_api_instance = None
-            # self.synced_api_name remains None (or what it was cleared to)
-        except AttributeError:
-            self.output_viewport.append_output(f"Error: Could not find API class '{class_name}' in module '{module_name}'.")
-            self.current_api_instance = None
-            # self.synced_api_name remains None
-        except Exception as e:
-            self.output_viewport.append_output(f"Error instantiating API '{selected_api_name}': {e}")
-            self.current_api_instance = None
-            # self.synced_api_name remains None
-        finally:
-            # Refresh button states, especially the sync button, based on the outcome
-            self._update_environment_combobox()
-
-    def handle_shell_command(self, command):
-        # This is where you'll process commands from the shell
-        if command.lower() == "help":
-            self.output_viewport.append_output("Available commands: help, clear, echo <text>")
-        elif command.lower() == "clear":
-            self.output_viewport.output_display.clear()
-        elif command.lower().startswith("echo "):
-            self.output_viewport.append_output(command[5:])
-        else:
+import json, bisect, reprlib, threading
+from PySide6.QtWidgets import (
+    QMainWindow,
+    QWidget,
+    QHBoxLayout,
+    QVBoxLayout,
+    QListWidgetItem,
+    QToolBar,
+    QLabel,
+    QComboBox, # NEW: Import QComboBox
+    QSizePolicy, # NEW: For toolbar spacing
+    QFileDialog,
+)
+from PySide6.QtCore import Qt, QFileSystemWatcher, QTimer
+from PySide6.QtGui import QIcon, QAction, QKeySequence 
+from GUI.Viewports.OutputViewport import OutputViewport, DEFAULT_FLUSH_INTERVAL_MS
+from GUI.Services.ExecutionService import ExecutionService, BlueprintRunService
+from GUI.Viewports.BlueprintViewport import BlueprintViewport
+from GUI.Widgets.ApiActionList import ApiActionList
+from GUI.Widgets.ProfileTable import ProfileTable
+from apis.Registry import api_registry
+from apis.Cache import response_cache
+from apis.Cassette import cassette_library, MODES as TRANSPORT_MODES
+from apis.History import run_history, parse_history_query
+from apis.Metrics import call_metrics
+from apis.Utils import session_registry
+from engine.Executor import DEFAULT_MAX_WORKERS, parse_call_args, resolve_call, split_command
+from engine.Extract import NODE_TYPES
+from engine.Config import DEFAULT_CONFIG_PATH, DEFAULT_MANIFEST_PATH, apply_config, apply_config_diff, load_config_model, write_stats
+from engine.ConfigModel import ConfigModel, ConfigError
+from engine.Graph import Blueprint, read_flow, write_flow
+from engine.LogSink import DEFAULT_MAX_LINES
+from engine.Memo import node_memo
+
+CONFIG_RELOAD_DEBOUNCE_MS = 200 # Editors save in several writes (or write a temp file and rename); reload once after the last
+PROFILE_OUTPUT_ROWS = 20 # Rows of a profile printed to the output; the profile window lists all of them
+
+def _update_sorted_items(combobox, added, removed):
+    """Removes and inserts items of a sorted combobox in place instead of rebuilding it; signals stay blocked."""
+    combobox.blockSignals(True)
+    current = combobox.currentIndex()
+    for name in removed:
+        index = combobox.findText(name, Qt.MatchFlag.MatchExactly)
+        if index >= 0:
+            combobox.removeItem(index)
+    items = [combobox.itemText(index) for index in range(combobox.count())]
+    for name in added:
+        position = bisect.bisect_left(items, name)
+        items.insert(position, name)
+        combobox.insertItem(position, name)
+    if current == -1:
+        combobox.setCurrentIndex(-1) # Inserting into an empty combobox would select the first item
+    combobox.blockSignals(False)
+
+class MainWindow(QMainWindow):
+    def __init__(self):
+        super().__init__()
+        self.config_model = ConfigModel.empty()
+        self.config_data = self.config_model.data
+        self.synced_api_name = None # To track the name of the currently synced API
+        self.current_api_instance = None
+        self._bench_thread = None
+        self._bench_stop = threading.Event()
+        self._matrix_thread = None
+        self._profiler = None
+        self._profile_target = None # Call id, or "play", whose end stops the profiler
+        self._profile_options = None
+        self._profile = None # The last finished profile, for `profile show` and `profile save`
+        self._profile_table = None
+        self._load_config()
+        api_registry.load_manifest(DEFAULT_MANIFEST_PATH) # Lets the action list show calls before an API module is imported
+
+        # Runs API calls on a worker pool so slow endpoints never block the event loop
+        execution_config = self.config_data.get("execution", {})
+        max_workers = execution_config.get("max_workers", DEFAULT_MAX_WORKERS)
+        self.execution_service = ExecutionService(max_workers=max_workers, parent=self)
+        self.execution_service.call_started.connect(self._on_call_started)
+        self.execution_service.call_progress.connect(self._on_call_progress)
+        self.execution_service.call_finished.connect(self._on_call_finished)
+        self.execution_service.call_failed.connect(self._on_call_failed)
+        self.execution_service.call_cancelled.connect(self._on_call_cancelled)
+
+        self.blueprint_service = BlueprintRunService(max_parallel=execution_config.get("max_parallel_nodes", max_workers), parent=self)
+        self.blueprint_service.node_started.connect(self._on_node_started)
+        self.blueprint_service.node_progress.connect(self._on_node_progress)
+        self.blueprint_service.node_finished.connect(self._on_node_finished)
+        self.blueprint_service.node_failed.connect(self._on_node_failed)
+        self.blueprint_service.node_skipped.connect(self._on_node_skipped)
+        self.blueprint_service.node_cached.connect(self._on_node_cached)
+        self.blueprint_service.run_finished.connect(self._on_blueprint_finished)
+        self.blueprint_service.run_failed.connect(self._on_blueprint_failed)
+
+        self.setWindowTitle("Automation Engine")
+        self.setGeometry(100, 100, 800, 600)
+
+        # Load configuration data first, as comboboxes depend on it
+
+        central_widget = QWidget()
+        main_layout = QVBoxLayout(central_widget)
+
+        # Top Menu
+        menu_bar = self.menuBar()
+        file_menu = menu_bar.addMenu("File")
+        open_action = QAction("Open Blueprint...", self)
+        open_action.setShortcut(QKeySequence.StandardKey.Open)
+        open_action.triggered.connect(self._open_blueprint_dialog)
+        file_menu.addAction(open_action)
+        save_action = QAction("Save Blueprint As...", self)
+        save_action.setShortcut(QKeySequence.StandardKey.Save)
+        save_action.triggered.connect(self._save_blueprint_dialog)
+        file_menu.addAction(save_action)
+        help_menu = menu_bar.addMenu("Help")
+        self.setMenuBar(menu_bar)
+
+        toolbar = QToolBar("Main Toolbar")
+        toolbar.setMovable(False)
+        self.addToolBar(toolbar) # Add the toolbar to the QMainWindow early
+
+
+        # 1. API ComboBox
+        toolbar.addWidget(QLabel("  API: "))
+        self.api_combobox = QComboBox(self)
+        self.api_combobox.setFixedWidth(150)
+        self.api_combobox.currentIndexChanged.connect(self._update_environment_combobox)
+        toolbar.addWidget(self.api_combobox)
+
+        # 2. Environment ComboBox
+        toolbar.addWidget(QLabel("  Env: "))
+        self.env_combobox = QComboBox(self)
+        self.env_combobox.setFixedWidth(100)
+        self.env_combobox.currentIndexChanged.connect(self._update_tenant_combobox)
+        toolbar.addWidget(self.env_combobox)
+
+        # 3. Tenant ComboBox
+        toolbar.addWidget(QLabel("  Tenant: "))
+        self.tenant_combobox = QComboBox(self)
+        self.tenant_combobox.setFixedWidth(150)
+        self.tenant_combobox.currentIndexChanged.connect(self._bind_api_context)
+        toolbar.addWidget(self.tenant_combobox)
+
+        # Initial population of comboboxes after they are created and connected
+        self._populate_api_combobox() # This will trigger subsequent updates
+
+        # 4. Visual Separator
+        toolbar.addWidget(self._create_toolbar_separator()) # <--- REPLACED addSeparator() with this call
+
+        self.sync_action = QAction(QIcon.fromTheme("view-refresh"), "Sync API", self)
+        self.sync_action.setEnabled(False) # Disabled by default
+        self.sync_action.triggered.connect(self._sync_api)
+        toolbar.addAction(self.sync_action)
+        # 5. Play Button
+        play_action = QAction(QIcon.fromTheme("media-playback-start"), "Play", self)
+        play_action.triggered.connect(self._play_blueprint)
+        toolbar.addAction(play_action)
+
+
+        spacer = QWidget()
+        spacer.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Expanding)
+        toolbar.addWidget(spacer)
+
+        # -- Main Content Area (Node Library + Blueprint Viewport) --
+        main_content_layout = QHBoxLayout()
+
+        # API Call List (drag items onto the blueprint, double-click to run once)
+        self.api_list = ApiActionList()
+        self.api_list.setFixedWidth(200)
+        self.api_list.itemDoubleClicked.connect(self._on_api_item_double_clicked)
+        #self._update_api_actions_list()
+        main_content_layout.addWidget(self.api_list)
+        
+        # Blueprint Viewport (drop API calls here and wire output ports to input ports)
+        self.blueprint_viewport = BlueprintViewport()
+        main_content_layout.addWidget(self.blueprint_viewport, 1) # Stretch factor to take up space
+
+        main_layout.addLayout(main_content_layout, 1) # Stretch factor for the main content area
+
+        # Output View
+        output_config = self.config_data.get("output", {})
+        self.output_viewport = OutputViewport(
+            max_lines=output_config.get("max_lines", DEFAULT_MAX_LINES),
+            flush_interval_ms=output_config.get("flush_interval_ms", DEFAULT_FLUSH_INTERVAL_MS),
+        )
+        self.output_viewport.command_entered.connect(self.handle_shell_command)
+        self.output_viewport.capture_stdio(echo_to_console=output_config.get("echo_to_console", False))
+        main_layout.addWidget(self.output_viewport,0)
+
+        # Reload config.json when it's edited, without a restart
+        self._config_reload_timer = QTimer(self)
+        self._config_reload_timer.setSingleShot(True)
+        self._config_reload_timer.setInterval(CONFIG_RELOAD_DEBOUNCE_MS)
+        self._config_reload_timer.timeout.connect(self._reload_config)
+        self._config_watcher = QFileSystemWatcher(self)
+        self._config_watcher.fileChanged.connect(lambda _path: self._config_reload_timer.start())
+        self._watch_config_file()
+
+        self.setCentralWidget(central_widget)
+
+        close_action = QAction("Close Application", self) # Give it a descriptive name
+        close_action.setShortcut(QKeySequence(Qt.Key.Key_Escape))
+        close_action.triggered.connect(self.close)
+        
+        # Main Window Actions
+        self.addAction(close_action)
+        
+
+    def _load_config(self):
+        config_path = DEFAULT_CONFIG_PATH
+        try:
+            self.config_model = load_config_model(config_path)
+            print("Config loaded successfully!")
+        except FileNotFoundError:
+            print(f"Error: config.json not found at {config_path}")
+            self.config_model = ConfigModel.empty()
+        except json.JSONDecodeError:
+            print(f"Error: config.json has invalid JSON format at {config_path}")
+            self.config_model = ConfigModel.empty()
+        except ConfigError as e:
+            print(f"Error: {e} ({config_path})")
+            self.config_model = ConfigModel.empty()
+        self.config_data = self.config_model.data
+        apply_config(self.config_data)
+
+    def _watch_config_file(self):
+        # Saving by writing a new file and renaming it over config.json drops the path from the watcher; re-add it
+        if DEFAULT_CONFIG_PATH not in self._config_watcher.files():
+            self._config_watcher.addPath(DEFAULT_CONFIG_PATH)
+
+    def _reload_config(self, report_unchanged=False):
+        """
+        Re-reads config.json and applies only what changed: sessions of untouched tenants keep their connections and the
+        comboboxes are edited in place. A file that doesn't parse or validate leaves the current settings active.
+        """
+        self._watch_config_file()
+        try:
+            model = load_config_model(DEFAULT_CONFIG_PATH)
+        except FileNotFoundError:
+            return # Mid-save; the write that recreates it fires the watcher again
+        except (json.JSONDecodeError, ConfigError) as e:
+            self.output_viewport.append_output(f"config.json not reloaded, keeping the previous settings: {e}")
+            return
+        diff = self.config_model.diff(model)
+        if diff.empty:
+            if report_unchanged:
+                self.output_viewport.append_output("config.json unchanged")
+            return
+        self.config_model = model
+        self.config_data = model.data
+        apply_config_diff(self.config_data, diff)
+        if "execution" in diff.sections:
+            execution_config = self.config_data.get("execution", {})
+            max_workers = execution_config.get("max_workers", DEFAULT_MAX_WORKERS)
+            self.execution_service.set_max_workers(max_workers)
+            self.blueprint_service.max_parallel = execution_config.get("max_parallel_nodes", max_workers)
+        if "output" in diff.sections:
+            self.output_viewport.set_max_lines(self.config_data.get("output", {}).get("max_lines", DEFAULT_MAX_LINES))
+        if self.synced_api_name and (self.synced_api_name in diff.apis_removed or self.synced_api_name in diff.apis_reloaded):
+            self.output_viewport.append_output(f"{self.synced_api_name} was removed or changed module/class in config.json; sync again.")
+            self.synced_api_name = None
+            self.current_api_instance = None
+        self._apply_config_diff_to_comboboxes(diff)
+        self.output_viewport.append_output(f"Config reloaded: {diff.summary()}")
+
+    def _apply_config_diff_to_comboboxes(self, diff):
+        selected_api = self.api_combobox.currentText()
+        selected_env = self.env_combobox.currentText()
+        selected_tenant = self.tenant_combobox.currentText()
+        _update_sorted_items(self.api_combobox, diff.apis_added, diff.apis_removed)
+        if selected_api and selected_api not in self.config_model.apis:
+            self.api_combobox.blockSignals(True)
+            self.api_combobox.setCurrentIndex(-1)
+            self.api_combobox.blockSignals(False)
+            self._update_environment_combobox() # Cascades to tenants and actions
+            return
+        if not selected_api:
+            return
+        if selected_api in diff.environments:
+            _update_sorted_items(self.env_combobox, *diff.environments[selected_api])
+        if selected_env not in self.config_model.api(selected_api).environments:
+            self._update_environment_combobox() # Selected environment removed (or the first one added)
+            return
+        if (selected_api, selected_env) in diff.tenants:
+            _update_sorted_items(self.tenant_combobox, *diff.tenants[(selected_api, selected_env)])
+        if selected_tenant not in self.config_model.tenant_names(selected_api, selected_env):
+            self._update_tenant_combobox()
+            return
+        if selected_api in diff.apis_reloaded:
+            self._update_environment_combobox() # Refreshes the action list and the sync button
+
+    def _create_toolbar_separator(self):
+        separator = QWidget(self)
+        separator.setFixedWidth(7) # Let's keep your 3px width
+        # Match toolbar height dynamically or use a fixed reasonable value
+        # Access self.toolbar after it's been added
+        # If toolbar is already fully initialized and has a height
+        separator.setFixedHeight(13)
+
+        # Style the separator: a dark gray background with a subtle border and margin
+        separator.setStyleSheet("background-color: #555; border: 2px solid #444; margin-left: 7px;") # 10px margin on the left
+        return separator
+    
+    def _populate_api_combobox(self):
+        self.api_combobox.blockSignals(True)
+        self.api_combobox.clear()
+        self.api_combobox.addItems(self.config_model.api_names)
+        if self.api_combobox.count() > 0:
+            self.api_combobox.setCurrentIndex(-1) # Default to no selection
+        else:
+            # If no APIs, ensure dependent UI is also cleared/disabled
+            self._update_environment_combobox() # This will cascade to clear others
+        self.api_combobox.blockSignals(False)
+
+    def _update_environment_combobox(self):
+        selected_api = self.api_combobox.currentText()
+        self.env_combobox.blockSignals(True)
+        self.env_combobox.clear()
+        self.env_combobox.addItems(self.config_model.environment_names(selected_api))
+        self.env_combobox.blockSignals(False)
+        # Enable/disable sync button based on API selection
+        if hasattr(self, 'sync_action'):
+            can_sync = bool(selected_api) and (selected_api != self.synced_api_name)
+            self.sync_action.setEnabled(can_sync)
+
+        self._update_tenant_combobox() # Trigger update for tenant
+        # self._update_api_actions_list() # Moved to be called by _update_tenant_combobox
+
+    def _update_tenant_combobox(self):
+        selected_api = self.api_combobox.currentText()
+        selected_env = self.env_combobox.currentText()
+        self.tenant_combobox.blockSignals(True)
+        self.tenant_combobox.clear()
+        self.tenant_combobox.addItems(self.config_model.tenant_names(selected_api, selected_env))
+        self.tenant_combobox.blockSignals(False)
+        self._bind_api_context() # Signals were blocked above, so rebind explicitly
+        self._update_api_actions_list() #
+
+    def _update_api_actions_list(self):
+        """
+        Populates the api_list QListWidget with methods from the selected API
+        that are marked with the _is_api_call attribute.
+        """
+        self.api_list.clear()
+        selected_api_name = self.api_combobox.currentText()
+
+        if not selected_api_name:
+            return
+
+        api_config = self.config_data.get("apis", {}).get(selected_api_name)
+        if not api_config or "module" not in api_config or "class" not in api_config:
+            # self.output_viewport.append_output(f"Config for API '{selected_api_name}' missing module/class.")
+            print(f"Config for API '{selected_api_name}' missing module/class.")
+            return
+
+        module_name = api_config["module"]
+        class_name = api_config["class"]
+
+        try:
+            api_spec = api_registry.describe(module_name, class_name) # Manifest/cache hit; imports only new or modified modules
+            for call_name in api_spec.call_names:
+                item = QListWidgetItem(api_spec.calls[call_name].friendly_name)
+                item.setData(Qt.ItemDataRole.UserRole, call_name) # Keep the real method name for dispatching
+                self.api_list.addItem(item)
+            for node_type in NODE_TYPES: # Built-in nodes that check or reshape upstream outputs
+                item = QListWidgetItem(node_type.title())
+                item.setData(Qt.ItemDataRole.UserRole, node_type)
+                self.api_list.addItem(item)
+        except ImportError:
+            self.output_viewport.append_output(f"Error: Could not import API module {module_name}")
+            print(f"Error: Could not import module {module_name}")
+        except AttributeError:
+            self.output_viewport.append_output(f"Error: Could not find API class {class_name} in {module_name}")
+            print(f"Error: Could not find class {class_name} in module {module_name}")
+        except Exception as e:
+            self.output_viewport.append_output(f"Error loading actions for {selected_api_name}: {e}")
+
+
+    def _sync_api(self):
+        selected_api_name = self.api_combobox.currentText()
+        if not selected_api_name:
+            self.output_viewport.append_output("No API selected to sync.")
+            return
+
+        api_config = self.config_data.get("apis", {}).get(selected_api_name)
+        if not api_config or "module" not in api_config or "class" not in api_config:
+            self.output_viewport.append_output(f"Configuration for API '{selected_api_name}' is missing module/class details.")
+            self.current_api_instance = None
+            return
+
+        # Assume failure for synced_api_name until successful instantiation
+        original_synced_name = self.synced_api_name # Store in case we need to revert or for logic
+        self.synced_api_name = None # Tentatively clear, will be set on success
+        module_name = api_config["module"]
+        class_name = api_config["class"]
+
+        try:
+            self.output_viewport.append_output(f"Syncing API: {selected_api_name}...")
+            api_class = api_registry.resolve(module_name, class_name).cls
+            self.current_api_instance = api_class() # Instantiate the API
+            self.synced_api_name = selected_api_name # Mark this API as successfully synced
+            if original_synced_name and original_synced_name != selected_api_name:
+                session_registry.close(original_synced_name) # Release the pooled connections of the previous API
+            self.output_viewport.append_output(f"Successfully synced and instantiated API: {selected_api_name} ({class_name})")
+        except ImportError:
+            self.output_viewport.append_output(f"Error: Could not import API module '{module_name}'.")
+            self.current_api_instance = None
+            # self.synced_api_name remains None (or what it was cleared to)
+        except AttributeError:
+            self.output_viewport.append_output(f"Error: Could not find API class '{class_name}' in module '{module_name}'.")
+            self.current_api_instance = None
+            # self.synced_api_name remains None
+        except Exception as e:
+            self.output_viewport.append_output(f"Error instantiating API '{selected_api_name}': {e}")
+            self.current_api_instance = None
+            # self.synced_api_name remains None
+        finally:
+            # Refresh button states, especially the sync button, based on the outcome
+            self._update_environment_combobox()
+
+    def _bind_api_context(self):
+        # Point the synced API at the selected environment/tenant so its calls use that pooled session
+        if self.current_api_instance is None or self.synced_api_name != self.api_combobox.currentText():
+            return
+        self.current_api_instance.bind(self.env_combobox.currentText(), self.tenant_combobox.currentText())
+
+    def closeEvent(self, event):
+        self.execution_service.shutdown()
+        self._bench_stop.set()
+        self.blueprint_service.cancel()
+        if self._profiler is not None:
+            self._profiler.stop()
+        session_registry.close() # Shut down every pooled connection
+        cassette_library.close() # Writes the index of anything recorded
+        self.output_viewport.release_stdio()
+        super().closeEvent(event)
+
+    def _run_api_call(self, call_name, kwargs=None):
+        if self.current_api_instance is None or self.synced_api_name != self.api_combobox.currentText():
+            self.output_viewport.append_output("Sync the selected API before running calls.")
+            return
+        try:
+            call_id = self.execution_service.submit(self.current_api_instance, call_name, kwargs)
+        except AttributeError as e:
+            self.output_viewport.append_output(f"Error: {e}")
+            return
+        self.output_viewport.append_output(f"[#{call_id}] Queued {call_name} ({self.execution_service.in_flight()} in flight)")
+        return call_id
+
+    def _on_api_item_double_clicked(self, item):
+        self._run_api_call(item.data(Qt.ItemDataRole.UserRole))
+
+    def _on_call_started(self, call_id, call_name):
+        self.output_viewport.append_output(f"[#{call_id}] Running {call_name}...")
+
+    def _on_call_progress(self, call_id, message):
+        self.output_viewport.append_output(f"[#{call_id}] {message}")
+
+    def _on_call_finished(self, call_id, call_name, result, elapsed):
+        self.output_viewport.append_output(f"[#{call_id}] {call_name} finished in {elapsed * 1000:.1f} ms: {reprlib.repr(result)}")
+        self._finish_profile(call_id)
+
+    def _on_call_failed(self, call_id, call_name, error):
+        self.output_viewport.append_output(f"[#{call_id}] {call_name} failed: {error}")
+        self._finish_profile(call_id)
+
+    def _on_call_cancelled(self, call_id, call_name):
+        self.output_viewport.append_output(f"[#{call_id}] {call_name} cancelled")
+        self._finish_profile(call_id)
+
+    def _run_bench(self, call_name, kwargs):
+        if self.current_api_instance is None or self.synced_api_name != self.api_combobox.currentText():
+            self.output_viewport.append_output("Sync the selected API before benchmarking.")
+            return
+        if self._bench_thread is not None and self._bench_thread.is_alive():
+            self.output_viewport.append_output("A benchmark is already running (bench stop to abort).")
+            return
+        from engine.Bench import run_benchmark, split_bench_options # Loaded by the first bench, not at startup
+        try:
+            options, kwargs = split_bench_options(kwargs)
+            method = resolve_call(self.current_api_instance, call_name)
+        except (ValueError, AttributeError) as e:
+            self.output_viewport.append_output(f"Error: {e}")
+            return
+
+        def bench():
+            result = run_benchmark(lambda: method(**kwargs), call_name, stop_event=self._bench_stop, asynchronous=getattr(method, "_is_async", False), **options)
+            for line in result.report_lines():
+                self.output_viewport.append_output(line) # Thread-safe, flushed by the viewport's timer
+
+        self._bench_stop.clear()
+        self._bench_thread = threading.Thread(target=bench, name="ae-bench", daemon=True)
+        self._bench_thread.start()
+        target = f"{options['iterations']} requests" if options["iterations"] is not None else f"{options['duration']:g}s"
+        self.output_viewport.append_output(f"Benchmarking {call_name}: {target}, concurrency {options['concurrency']}")
+
+    def _run_matrix(self, target, kwargs):
+        # Runs against the selected API for every (filtered) environment/tenant; no sync needed, workers import it themselves
+        api_name = self.api_combobox.currentText()
+        if api_name not in self.config_data.get("apis", {}):
+            self.output_viewport.append_output("Select an API before running a matrix.")
+            return
+        if self._matrix_thread is not None and self._matrix_thread.is_alive():
+            self.output_viewport.append_output("A matrix run is already in progress.")
+            return
+        from engine.Matrix import MatrixJob, MatrixRunner, matrix_combinations, DEFAULT_MAX_PROCESSES, DEFAULT_MAX_CONCURRENCY # Pulls in multiprocessing
+        environments = str(kwargs.pop("envs")).split(",") if "envs" in kwargs else None
+        tenants = str(kwargs.pop("tenants")).split(",") if "tenants" in kwargs else None
+        matrix_config = self.config_data.get("matrix", {})
+        processes = kwargs.pop("processes", None) or matrix_config.get("processes", DEFAULT_MAX_PROCESSES)
+        if target == "play":
+            if not self.blueprint_viewport.blueprint.nodes:
+                self.output_viewport.append_output("The blueprint is empty.")
+                return
+            self.blueprint_viewport.sync_positions()
+            job = MatrixJob(api_name, flow_data=self.blueprint_viewport.blueprint.to_columns(), max_parallel=self.blueprint_service.max_parallel)
+        else:
+            job = MatrixJob(api_name, target, kwargs)
+        combinations = matrix_combinations(self.config_data, api_name, environments, tenants)
+        if not combinations:
+            self.output_viewport.append_output("No environment/tenant matches the filters.")
+            return
+
+        def on_cell(cell):
+            status = "ok" if cell.ok else f"failed: {cell.error}"
+            self.output_viewport.append_output(f"[matrix] {cell.environment}/{cell.tenant or '-'} {status} ({cell.elapsed * 1000:.1f} ms)")
+
+        runner = MatrixRunner(processes, matrix_config.get("max_concurrency", DEFAULT_MAX_CONCURRENCY), listener=on_cell)
+        config_data = self.config_data
+
+        def sweep():
+            try:
+                result = runner.run(job, combinations, config_data)
+            except Exception as e:
+                self.output_viewport.append_output(f"Matrix run failed: {e}")
+                return
+            for line in result.table_lines():
+                self.output_viewport.append_output(line) # Thread-safe, flushed by the viewport's timer
+
+        self._matrix_thread = threading.Thread(target=sweep, name="ae-matrix", daemon=True)
+        self._matrix_thread.start()
+        self.output_viewport.append_output(f"Matrix: {job.describe()} across {len(combinations)} environment/tenant combination(s)")
+
+    def _start_profile(self, target, args):
+        if self._profiler is not None:
+            self.output_viewport.append_output("A profile is already running; it ends with its call or blueprint run.")
+            return
+        from engine.Profiler import Profiler, SORT_COLUMNS, split_profile_options
+        options, kwargs = split_profile_options(parse_call_args(["force=true" if arg == "force" else arg for arg in args]))
+        if options["sort"] not in SORT_COLUMNS or options["by"] not in (None, "node", "call", "phase"):
+            raise ValueError(f"sort is one of {', '.join(SORT_COLUMNS)} and by one of node, call, phase")
+        profiler = Profiler(options["interval_ms"])
+        for handler in (self._on_node_started, self._on_node_progress, self._on_node_finished, self._on_node_cached,
+                        self._on_node_failed, self._on_node_skipped):
+            profiler.node_frame(handler, "node_id") # UI updates for a node count against it too
+        profiler.start()
+        started = self._play_with_options(kwargs) if target == "play" else self._run_api_call(target, kwargs)
+        if not started:
+            profiler.stop()
+            return
+        self._profiler = profiler
+        self._profile_target = "play" if target == "play" else started
+        self._profile_options = options
+        self.output_viewport.append_output(f"Profiling {target} every {options['interval_ms']:g} ms")
+
+    def _finish_profile(self, target):
+        if self._profiler is None or self._profile_target != target:
+            return
+        profile = self._profiler.stop()
+        self._profiler = None
+        self._profile = profile
+        options = self._profile_options
+        for line in profile.table_lines(options["sort"], options["by"], limit=PROFILE_OUTPUT_ROWS):
+            self.output_viewport.append_output(line)
+        if options["out"]:
+            self._save_profile(options["out"])
+        if self._profile_table is None:
+            self._profile_table = ProfileTable(self)
+        self._profile_table.show_profile(profile)
+
+    def _save_profile(self, path):
+        try:
+            self._profile.write_collapsed(path)
+        except OSError as e:
+            self.output_viewport.append_output(f"Could not save the profile: {e}")
+            return
+        self.output_viewport.append_output(f"Profile stacks written to {path} (collapsed format, for flamegraph.pl or speedscope)")
+
+    def _profile_command(self, args):
+        from engine.Profiler import SORT_COLUMNS, split_profile_options # Loaded by the first profile command, not at startup
+        if args and args[0] in ("show", "save") and self._profile is None:
+            self.output_viewport.append_output("Nothing profiled yet (profile call <method> or profile play).")
+        elif args and args[0] == "show":
+            options, _ = split_profile_options(parse_call_args(args[1:]))
+            for line in self._profile.table_lines(options["sort"], options["by"]):
+                self.output_viewport.append_output(line)
+        elif args and args[0] == "save" and len(args) > 1:
+            self._save_profile(args[1])
+        elif len(args) > 1 and args[0] == "call":
+            self._start_profile(args[1], args[2:])
+        elif args and args[0] == "play":
+            self._start_profile("play", args[1:])
+        else:
+            self.output_viewport.append_output(
+                "Usage: profile call <method> [key=value ...] | profile play [force] [parallel=n], with [interval=ms] "
+                f"[sort={'|'.join(SORT_COLUMNS)}] [by=node|call|phase] [out=path]; profile show [sort= by=]; profile save <path>"
+            )
+
+    def _set_transport(self, args):
+        if args:
+            if args[0] not in TRANSPORT_MODES:
+                self.output_viewport.append_output(f"Error: the transport mode is one of {', '.join(TRANSPORT_MODES)}")
+                return
+            # Until the next restart or edit of "transport" in config.json; sessions are rebuilt so every call switches over
+            cassette_library.configure({"mode": args[0], "path": args[1] if len(args) > 1 else cassette_library.path})
+            session_registry.configure(self.config_data)
+            response_cache.invalidate() # Otherwise cached responses would answer instead of the new transport
+        cassette_library.flush()
+        self.output_viewport.append_output(f"Transport: {cassette_library.mode}" + ("" if cassette_library.mode == "live" else f", cassettes in {cassette_library.path}"))
+
+    def _show_history(self, args):
+        if not run_history.enabled:
+            self.output_viewport.append_output("The run history is disabled (history.enabled in config.json).")
+            return
+        try:
+            lines = run_history.report_lines(parse_history_query(args))
+        except (ValueError, OSError) as e:
+            lines = [f"Error: {e}"]
+        for line in lines:
+            self.output_viewport.append_output(line)
+
+    def _show_stats(self, args):
+        if not args:
+            for line in call_metrics.report_lines():
+                self.output_viewport.append_output(line)
+        elif args[0] == "reset":
+            call_metrics.reset()
+            self.output_viewport.append_output("Call metrics reset")
+        elif args[0] in ("json", "prometheus") and len(args) > 1:
+            try:
+                write_stats(args[1])
+            except OSError as e:
+                self.output_viewport.append_output(f"Error: {e}")
+                return
+            self.output_viewport.append_output(f"Call metrics written to {args[1]}")
+        elif args[0] in ("json", "prometheus"):
+            self.output_viewport.append_output(call_metrics.to_json() if args[0] == "json" else call_metrics.to_prometheus())
+        else:
+            self.output_viewport.append_output("Usage: stats [reset|json|prometheus] [path]")
+
+    def _open_blueprint_dialog(self, _checked=False):
+        path, _ = QFileDialog.getOpenFileName(self, "Open Blueprint", "", "Blueprints (*.json *.json.gz);;All files (*)")
+        if path:
+            self._open_blueprint(path)
+
+    def _save_blueprint_dialog(self, _checked=False):
+        path, _ = QFileDialog.getSaveFileName(self, "Save Blueprint", "", "Blueprints (*.json *.json.gz)")
+        if path:
+            self._save_blueprint(path)
+
+    def _open_blueprint(self, path):
+        if self.blueprint_service.is_running():
+            self.output_viewport.append_output("Stop the running blueprint before opening another one.")
+            return
+        try:
+            flow_data = read_flow(path)
+            blueprint = Blueprint.from_dict(flow_data)
+        except (OSError, ValueError, KeyError) as e:
+            self.output_viewport.append_output(f"Could not open {path}: {type(e).__name__}: {e}")
+            return
+        # Target the API/environment/tenant saved with the flow, when config.json still has them
+        for combobox, key in ((self.api_combobox, "api"), (self.env_combobox, "environment"), (self.tenant_combobox, "tenant")):
+            if flow_data.get(key) and combobox.findText(flow_data[key], Qt.MatchFlag.MatchExactly) >= 0:
+                combobox.setCurrentText(flow_data[key])
+        self.blueprint_viewport.load_blueprint(blueprint)
+        self.output_viewport.append_output(f"Opened {path}: {len(blueprint.nodes)} node(s), {len(blueprint.edges)} connection(s)")
+
+    def _save_blueprint(self, path):
+        self.blueprint_viewport.sync_positions()
+        flow_data = {
+            "api": self.api_combobox.currentText() or None,
+            "environment": self.env_combobox.currentText() or None,
+            "tenant": self.tenant_combobox.currentText() or None,
+            **self.blueprint_viewport.blueprint.to_columns(),
+        }
+        try:
+            write_flow(path, flow_data)
+        except (OSError, TypeError, ValueError) as e:
+            self.output_viewport.append_output(f"Could not save {path}: {type(e).__name__}: {e}")
+            return
+        self.output_viewport.append_output(f"Saved {len(self.blueprint_viewport.blueprint.nodes)} node(s) to {path}")
+
+    def _play_with_options(self, options):
+        """`play` shell options: parallel=n, and force=true or force=<node ids> to re-run memoized nodes."""
+        if isinstance(options.get("parallel"), int) and options["parallel"] > 0:
+            self.blueprint_service.max_parallel = options["parallel"]
+        force = options.get("force", False)
+        if not isinstance(force, bool):
+            force = str(force).split(",") # Node ids
+        return self._play_blueprint(force=force)
+
+    def _play_blueprint(self, _checked=False, force=False):
+        if self.current_api_instance is None or self.synced_api_name != self.api_combobox.currentText():
+            self.output_viewport.append_output("Sync the selected API before playing the blueprint.")
+            return False
+        if not self.blueprint_viewport.blueprint.nodes:
+            self.output_viewport.append_output("The blueprint is empty.")
+            return False
+        self.blueprint_viewport.sync_positions()
+        # Run on a snapshot so edits made during the run don't race with the runner thread
+        snapshot = Blueprint.from_dict(self.blueprint_viewport.blueprint.to_dict())
+        self.blueprint_viewport.reset_node_status()
+        if self.blueprint_service.start(snapshot, self.current_api_instance, force):
+            self.output_viewport.append_output(f"Playing blueprint: {len(snapshot.nodes)} node(s), up to {self.blueprint_service.max_parallel} in parallel")
+            return True
+        self.output_viewport.append_output("A blueprint run is already in progress.")
+        return False
+
+    def _on_node_started(self, node_id):
+        self.blueprint_viewport.set_node_status(node_id, "running")
+
+    def _on_node_progress(self, node_id, message):
+        self.output_viewport.append_output(f"[{node_id}] {message}")
+
+    def _on_node_finished(self, node_id, output, elapsed):
+        self.blueprint_viewport.set_node_status(node_id, "done")
+        self.output_viewport.append_output(f"[{node_id}] finished in {elapsed * 1000:.1f} ms: {reprlib.repr(output)}")
+
+    def _on_node_cached(self, node_id, output):
+        self.blueprint_viewport.set_node_status(node_id, "cached")
+        self.output_viewport.append_output(f"[{node_id}] unchanged, reused: {reprlib.repr(output)}")
+
+    def _on_node_failed(self, node_id, error):
+        self.blueprint_viewport.set_node_status(node_id, "failed")
+        self.output_viewport.append_output(f"[{node_id}] failed: {error}")
+
+    def _on_node_skipped(self, node_id):
+        self.blueprint_viewport.set_node_status(node_id, "skipped")
+        self.output_viewport.append_output(f"[{node_id}] skipped")
+
+    def _on_blueprint_finished(self, result):
+        total_call_time = sum(result.timings.values())
+        self.output_viewport.append_output(
+            f"Blueprint finished in {result.elapsed * 1000:.1f} ms "
+            f"({len(result.outputs)} ok of which {len(result.cached)} reused, {len(result.errors)} failed, {len(result.skipped)} skipped; "
+            f"{total_call_time * 1000:.1f} ms of calls; history run={result.run_id})"
+        )
+        self._finish_profile("play")
+
+    def _on_blueprint_failed(self, error):
+        self.output_viewport.append_output(f"Blueprint run failed: {error}")
+        self._finish_profile("play")
+
+    def handle_shell_command(self, command):
+        # This is where you'll process commands from the shell
+        name, args = split_command(command)
+        if name == "help":
+            self.output_viewport.append_output("Available commands: help, clear, echo <text>, call <method> [key=value ...], cancel <id|all>, jobs, workers [n], play [parallel=n] [force|force=n1,n2], stop, memo [clear], cache [clear], bench <method> [n= duration= concurrency= rate= cache=on] [key=value ...], bench stop, stats [reset|json|prometheus] [path], matrix <method|play> [envs=a,b*] [tenants=x,y*] [processes=n] [key=value ...], history [stats] [call] [api= env= tenant= kind= since=7d until= run= limit= by=env,tenant], reload, transport [live|record|replay] [path], open <path>, save <path>, profile <call <method> [key=value ...]|play [force]> [interval=ms sort= by= out=path], profile show [sort= by=], profile save <path>")
+        elif name == "clear":
+            self.output_viewport.clear()
+        elif command.lower().startswith("echo "):
+            self.output_viewport.append_output(command[5:])
+        elif name == "call" and args:
+            try:
+                self._run_api_call(args[0], parse_call_args(args[1:]))
+            except ValueError as e:
+                self.output_viewport.append_output(f"Error: {e}")
+        elif name == "cancel" and args:
+            if args[0] == "all":
+                self.output_viewport.append_output(f"Cancelling {self.execution_service.cancel_all()} call(s)")
+            elif args[0].isdigit() and self.execution_service.cancel(int(args[0])):
+                self.output_viewport.append_output(f"Cancelling call #{args[0]}")
+            else:
+                self.output_viewport.append_output(f"No running call with id {args[0]}")
+        elif name == "jobs":
+            self.output_viewport.append_output(f"{self.execution_service.in_flight()} call(s) in flight, {self.execution_service.max_workers} worker(s)")
+        elif name == "workers":
+            if args and args[0].isdigit() and int(args[0]) > 0:
+                self.execution_service.set_max_workers(int(args[0]))
+            self.output_viewport.append_output(f"Concurrency limit: {self.execution_service.max_workers} worker(s)")
+        elif name == "play":
+            args = ["force=true" if arg == "force" else arg for arg in args] # Bare `force` re-runs every node
+            self._play_with_options(parse_call_args(args) if all("=" in arg for arg in args) else {})
+        elif name == "bench" and args:
+            if args[0] == "stop":
+                self._bench_stop.set()
+                self.output_viewport.append_output("Stopping benchmark")
+                return
+            try:
+                self._run_bench(args[0], parse_call_args(args[1:]))
+            except ValueError as e:
+                self.output_viewport.append_output(f"Error: {e}")
+        elif name == "stats":
+            self._show_stats(args)
+        elif name == "history":
+            self._show_history(args)
+        elif name == "matrix" and args:
+            try:
+                self._run_matrix(args[0], parse_call_args(args[1:]))
+            except (ValueError, KeyError) as e:
+                self.output_viewport.append_output(f"Error: {e}")
+        elif name == "reload":
+            self._reload_config(report_unchanged=True)
+        elif name == "transport":
+            self._set_transport(args)
+        elif name == "memo":
+            if args and args[0] == "clear":
+                node_memo.clear()
+                node_memo.reset_stats()
+                self.output_viewport.append_output("Node memo cleared; the next play runs every node")
+            else:
+                self.output_viewport.append_output("Node memo: " + ", ".join(f"{key}={value}" for key, value in node_memo.stats().items()))
+        elif name == "cache":
+            if args and args[0] == "clear":
+                response_cache.invalidate()
+                response_cache.reset_stats()
+                self.output_viewport.append_output("Response cache cleared")
+            else:
+                stats = response_cache.stats()
+                self.output_viewport.append_output("Response cache: " + ", ".join(f"{key}={value}" for key, value in stats.items()))
+        elif name == "open" and args:
+            self._open_blueprint(args[0])
+        elif name == "save" and args:
+            self._save_blueprint(args[0])
+        elif name == "profile":
+            try:
+                self._profile_command(args)
+            except ValueError as e:
+                self.output_viewport.append_output(f"Error: {e}")
+        elif name == "stop":
+            self.blueprint_service.cancel()
+            self.output_viewport.append_output("Stopping blueprint after the running nodes finish")
+        else:
             self.output_viewport.append_output(f"Unknown command: {command}")
\ No newline at end of file
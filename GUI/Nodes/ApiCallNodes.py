@@ -1,103 +1,190 @@
-from PySide6.QtWidgets import QGraphicsItem
-from PySide6.QtGui import QBrush, QColor, QPen, QFont, QFontMetrics, QPainter
-from PySide6.QtCore import Qt, QRectF, QPointF
-
-class ApiCallNode(QGraphicsItem):
-    def __init__(self, name="API Call", parent=None):
-        super().__init__(parent)
-        self.name = name
-        self.port_radius = 5
-        self.horizontal_padding = 20 # Padding around text
-        self.vertical_padding = 10  # Padding around text
-        self.title_bar_height = 20
-
-        # Calculate initial size based on text  
-        font = QFont("Arial", 10)
-        metrics = QFontMetrics(font)
-        text_width = metrics.horizontalAdvance(self.name)
-        text_height = metrics.height()
-
-        self.width = max(100, text_width + self.horizontal_padding * 2) # Min width of 100
-        self.height = text_height + self.title_bar_height + self.vertical_padding * 2 # Min height based on text
-
-        self.setFlag(QGraphicsItem.GraphicsItemFlag.ItemIsMovable)
-        self.setFlag(QGraphicsItem.GraphicsItemFlag.ItemIsSelectable)
-        self.setFlag(QGraphicsItem.GraphicsItemFlag.ItemSendsGeometryChanges) # Often useful, but boundingRect fix is more direct
-        self.setCacheMode(QGraphicsItem.CacheMode.DeviceCoordinateCache) # Could help performance, but might hide issues if boundingRect is wrong
-
-    def boundingRect(self):
-        # The bounding rectangle must fully encompass all drawn elements, including ports
-        # and a small buffer for anti-aliasing.
-        # A port (circle) centered at X +/- radius extends 'radius' further in that direction.
-        # Its center is at (width/2 + port_radius) from node center.
-        # Its outermost edge is (width/2 + port_radius) + port_radius = width/2 + 2*port_radius.
-        antialiasing_buffer = 4 # A small buffer for anti-aliasing artifacts
-
-        # Calculate max horizontal extent from node's center (0,0) to rightmost point of right port
-        max_x_extent = self.width / 2 + (2 * self.port_radius) + antialiasing_buffer
-        # Max vertical extent from node's center (0,0) to topmost/bottommost point of node/ports
-        # Assuming ports are vertically centered relative to node's center (Y=0)
-        # The node body itself extends self.height/2 vertically from its own center.
-        # The ports are centered at Y=0, so their vertical extent is port_radius.
-        max_y_extent = self.height / 2 + self.port_radius + antialiasing_buffer
-
-        return QRectF(
-            -max_x_extent,
-            -max_y_extent,
-            2 * max_x_extent, # Total width of bounding box
-            2 * max_y_extent, # Total height of bounding box
-        )
-
-
-    def paint(self, painter, option, widget):
-        # Set antialiasing for smoother drawing
-        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
-
-        # Node body
-        body_rect = QRectF(
-            -self.width / 2,
-            -self.height / 2 + self.title_bar_height,
-            self.width,
-            self.height - self.title_bar_height,
-        )
-        body_brush = QBrush(QColor(220, 220, 220))
-        body_pen = QPen(QColor(100, 100, 100))
-        painter.setBrush(body_brush)
-        painter.setPen(body_pen)
-        painter.drawRect(self.boundingRect())
-
-        # Title bar
-        title_rect = QRectF(
-            -self.width / 2,
-            -self.height / 2,
-            self.width,
-            self.title_bar_height,
-        )
-        title_brush = QBrush(QColor(150, 150, 150))
-        title_pen = QPen(QColor(80, 80, 80))
-        painter.setBrush(title_brush)
-        painter.setPen(title_pen)
-        painter.drawRect(title_rect)
-
-        # Node name text
-        font = QFont("Arial", 10)
-        painter.setFont(font)
-        # Calculate text position within the title bar
-        # Adjust text_rect to be within the title_rect
-        text_rect = title_rect.adjusted(self.horizontal_padding, 0, -self.horizontal_padding, 0)
-        # Center the text vertically within the title bar
-        text_rect.moveCenter(title_rect.center())
-        painter.setPen(QColor(0, 0, 0)) # Set text color to black for contrast
-        painter.drawText(text_rect, Qt.AlignmentFlag.AlignCenter | Qt.AlignmentFlag.AlignVCenter, self.name)
-
-        # Input port (left)
-        input_port_pos = QPointF(-self.width / 2 - self.port_radius, 0)
-        painter.setBrush(QBrush(QColor(100, 150, 255)))
-        painter.setPen(QPen(QColor(50, 100, 200)))
-        painter.drawEllipse(input_port_pos, self.port_radius, self.port_radius)
-
-        # Output port (right)
-        output_port_pos = QPointF(self.width / 2 + self.port_radius, 0)
-        painter.setBrush(QBrush(QColor(255, 150, 100)))
-        painter.setPen(QPen(QColor(200, 100, 50)))
-        painter.drawEllipse(output_port_pos, self.port_radius, self.port_radius)
\ No newline at end of file
+from PySide6.QtWidgets import QGraphicsItem
+from PySide6.QtGui import QBrush, QColor, QPen, QFont, QFontMetrics, QPainter
+from PySide6.QtCore import Qt, QRectF, QPointF
+
+STATUS_TITLE_COLORS = {
+    "idle": QColor(150, 150, 150),
+    "running": QColor(230, 200, 90),
+    "done": QColor(120, 190, 120),
+    "cached": QColor(140, 185, 210), # Output reused from an earlier run
+    "failed": QColor(220, 110, 110),
+    "skipped": QColor(185, 185, 185),
+}
+
+# Paint resources shared by every node instead of being rebuilt on each repaint
+STATUS_TITLE_BRUSHES = {status: QBrush(color) for status, color in STATUS_TITLE_COLORS.items()}
+BODY_BRUSH = QBrush(QColor(220, 220, 220))
+BODY_PEN = QPen(QColor(100, 100, 100))
+TITLE_PEN = QPen(QColor(80, 80, 80))
+TEXT_PEN = QPen(QColor(0, 0, 0))
+INPUT_PORT_BRUSH = QBrush(QColor(100, 150, 255))
+INPUT_PORT_PEN = QPen(QColor(50, 100, 200))
+OUTPUT_PORT_BRUSH = QBrush(QColor(255, 150, 100))
+OUTPUT_PORT_PEN = QPen(QColor(200, 100, 50))
+
+# Level of detail (view scale) below which parts of a node are no longer drawn
+DETAIL_LOD = 0.5 # Name text and ports
+OUTLINE_LOD = 0.2 # Anything but a flat status-coloured block
+
+_POSITION_HAS_CHANGED = QGraphicsItem.GraphicsItemChange.ItemPositionHasChanged # Looked up once; itemChange() runs for every item change
+
+class ApiCallNode(QGraphicsItem):
+    _font = None # Created with the first node, once a QGuiApplication exists
+    _text_height = 0
+    _text_widths = {} # name -> horizontal advance; generated flows repeat the same few call names
+
+    @classmethod
+    def _text_metrics(cls, text):
+        if cls._font is None:
+            cls._font = QFont("Arial", 10)
+            cls._metrics = QFontMetrics(cls._font)
+            cls._text_height = cls._metrics.height()
+        width = cls._text_widths.get(text)
+        if width is None:
+            width = cls._text_widths[text] = cls._metrics.horizontalAdvance(text)
+        return width, cls._text_height
+
+    port_radius = 5
+    horizontal_padding = 20 # Padding around text
+    vertical_padding = 10  # Padding around text
+    title_bar_height = 20
+    _layouts = {} # name -> (bounding rect, port offset)
+
+    @classmethod
+    def _size(cls, name):
+        # Calculate size based on text
+        text_width, text_height = cls._text_metrics(name)
+        width = max(100, text_width + cls.horizontal_padding * 2) # Min width of 100
+        height = text_height + cls.title_bar_height + cls.vertical_padding * 2 # Min height based on text
+        return width, height
+
+    @classmethod
+    def layout(cls, name):
+        """
+        (bounding rect around the centre, horizontal distance from the centre to each port) of a node titled `name`,
+        so views can place and connect nodes that have no item yet.
+        """
+        layout = cls._layouts.get(name)
+        if layout is None:
+            width, height = cls._size(name)
+            layout = cls._layouts[name] = (cls._compute_bounding_rect(width, height), width / 2 + cls.port_radius)
+        return layout
+
+    def __init__(self, name="API Call", parent=None, node_id=None, call_name=None):
+        super().__init__(parent)
+        self.name = name
+        self.node_id = node_id # Id of the matching node in the Blueprint model
+        self.call_name = call_name or name
+        self.edges = [] # Connection edges attached to either port
+        self.status = "idle"
+        self.width, self.height = self._size(self.name)
+
+        # Geometry never changes after construction, so paint() and the scene index reuse these
+        self._bounding_rect = self._compute_bounding_rect(self.width, self.height)
+        self._title_rect = QRectF(-self.width / 2, -self.height / 2, self.width, self.title_bar_height)
+        self._text_rect = self._title_rect.adjusted(self.horizontal_padding, 0, -self.horizontal_padding, 0)
+        self._text_rect.moveCenter(self._title_rect.center()) # Center the text vertically within the title bar
+        self._input_port_pos = QPointF(-self.width / 2 - self.port_radius, 0)
+        self._output_port_pos = QPointF(self.width / 2 + self.port_radius, 0)
+
+        # One setFlags() call: each flag change is a round trip through itemChange()
+        self.setFlags(
+            QGraphicsItem.GraphicsItemFlag.ItemIsMovable
+            | QGraphicsItem.GraphicsItemFlag.ItemIsSelectable
+            | QGraphicsItem.GraphicsItemFlag.ItemSendsGeometryChanges # Keeps attached edges following the node
+        )
+        # Panning blits the cached pixmap instead of calling paint(); QPixmapCache bounds the memory
+        self.setCacheMode(QGraphicsItem.CacheMode.DeviceCoordinateCache)
+
+    def boundingRect(self):
+        return self._bounding_rect
+
+    @classmethod
+    def _compute_bounding_rect(cls, width, height):
+        # The bounding rectangle must fully encompass all drawn elements, including ports
+        # and a small buffer for anti-aliasing.
+        # A port (circle) centered at X +/- radius extends 'radius' further in that direction.
+        # Its center is at (width/2 + port_radius) from node center.
+        # Its outermost edge is (width/2 + port_radius) + port_radius = width/2 + 2*port_radius.
+        antialiasing_buffer = 4 # A small buffer for anti-aliasing artifacts
+
+        # Calculate max horizontal extent from node's center (0,0) to rightmost point of right port
+        max_x_extent = width / 2 + (2 * cls.port_radius) + antialiasing_buffer
+        # Max vertical extent from node's center (0,0) to topmost/bottommost point of node/ports
+        # Assuming ports are vertically centered relative to node's center (Y=0)
+        # The node body itself extends self.height/2 vertically from its own center.
+        # The ports are centered at Y=0, so their vertical extent is port_radius.
+        max_y_extent = height / 2 + cls.port_radius + antialiasing_buffer
+
+        return QRectF(
+            -max_x_extent,
+            -max_y_extent,
+            2 * max_x_extent, # Total width of bounding box
+            2 * max_y_extent, # Total height of bounding box
+        )
+
+
+    def input_port_pos(self):
+        return QPointF(self._input_port_pos)
+
+    def output_port_pos(self):
+        return QPointF(self._output_port_pos)
+
+    def port_at(self, scene_pos, tolerance=4):
+        """Returns "input"/"output" when scene_pos is over one of the ports, otherwise None."""
+        local_pos = self.mapFromScene(scene_pos)
+        reach = self.port_radius + tolerance
+        for port, port_pos in (("input", self.input_port_pos()), ("output", self.output_port_pos())):
+            delta = local_pos - port_pos
+            if delta.x() * delta.x() + delta.y() * delta.y() <= reach * reach:
+                return port
+        return None
+
+    def set_status(self, status):
+        self.status = status
+        self.update()
+
+    def itemChange(self, change, value):
+        if change == _POSITION_HAS_CHANGED and self.edges:
+            for edge in self.edges:
+                edge.update_path()
+        return super().itemChange(change, value)
+
+    def paint(self, painter, option, widget):
+        title_brush = STATUS_TITLE_BRUSHES.get(self.status, STATUS_TITLE_BRUSHES["idle"])
+        lod = option.levelOfDetailFromTransform(painter.worldTransform())
+        if lod < OUTLINE_LOD:
+            # A node is only a few pixels wide at this zoom
+            painter.fillRect(self._bounding_rect, title_brush)
+            return
+
+        # Antialiasing only pays off once edges are large enough to see
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing, lod >= DETAIL_LOD)
+
+        # Node body
+        painter.setBrush(BODY_BRUSH)
+        painter.setPen(BODY_PEN)
+        painter.drawRect(self._bounding_rect)
+
+        # Title bar
+        painter.setBrush(title_brush)
+        painter.setPen(TITLE_PEN)
+        painter.drawRect(self._title_rect)
+
+        if lod < DETAIL_LOD:
+            return # Text and ports would be unreadable
+
+        # Node name text
+        painter.setFont(self._font)
+        painter.setPen(TEXT_PEN) # Black for contrast
+        painter.drawText(self._text_rect, Qt.AlignmentFlag.AlignCenter | Qt.AlignmentFlag.AlignVCenter, self.name)
+
+        # Input port (left)
+        painter.setBrush(INPUT_PORT_BRUSH)
+        painter.setPen(INPUT_PORT_PEN)
+        painter.drawEllipse(self._input_port_pos, self.port_radius, self.port_radius)
+
+        # Output port (right)
+        painter.setBrush(OUTPUT_PORT_BRUSH)
+        painter.setPen(OUTPUT_PORT_PEN)
+        painter.drawEllipse(self._output_port_pos, self.port_radius, self.port_radius)
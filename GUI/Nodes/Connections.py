@@ -0,0 +1,65 @@
+from PySide6.QtWidgets import QGraphicsPathItem, QGraphicsItem
+from PySide6.QtGui import QPainterPath, QPen, QColor, QPainter
+from PySide6.QtCore import Qt, QLineF
+
+EDGE_PEN = QPen(QColor(90, 90, 90), 2)
+PENDING_EDGE_PEN = QPen(QColor(90, 90, 90), 2, Qt.PenStyle.DashLine)
+FAR_EDGE_PEN = QPen(QColor(90, 90, 90), 0) # Cosmetic: one device pixel wide at any zoom
+STRAIGHT_EDGE_LOD = 0.35 # Below this view scale edges are drawn as plain lines
+
+def bezier_path(start, end):
+    # Horizontal tangents at both ends, like most node editors
+    path = QPainterPath(start)
+    handle = max(40.0, abs(end.x() - start.x()) / 2)
+    path.cubicTo(start.x() + handle, start.y(), end.x() - handle, end.y(), end.x(), end.y())
+    return path
+
+class ConnectionEdge(QGraphicsPathItem):
+    """Curve from a node's output port to another node's input port."""
+    def __init__(self, source_node, target_node, parent=None):
+        super().__init__(parent)
+        self.source_node = source_node
+        self.target_node = target_node
+        self._line = QLineF()
+        self.setPen(EDGE_PEN)
+        self.setZValue(-1) # Draw below the nodes
+        self.setFlag(QGraphicsItem.GraphicsItemFlag.ItemIsSelectable)
+        self.setCacheMode(QGraphicsItem.CacheMode.DeviceCoordinateCache) # Panning blits instead of calling paint()
+        source_node.edges.append(self)
+        target_node.edges.append(self)
+        self.update_path()
+
+    def update_path(self):
+        start = self.source_node.mapToScene(self.source_node.output_port_pos())
+        end = self.target_node.mapToScene(self.target_node.input_port_pos())
+        self._line = QLineF(start, end)
+        self.setPath(bezier_path(start, end))
+
+    def line(self):
+        """Straight port-to-port segment, used in place of the curve when zoomed out."""
+        return QLineF(self._line)
+
+    def paint(self, painter, option, widget=None):
+        if option.levelOfDetailFromTransform(painter.worldTransform()) >= STRAIGHT_EDGE_LOD:
+            super().paint(painter, option, widget)
+            return
+        # The curve is indistinguishable from a line when zoomed out, and much cheaper to rasterize
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing, False)
+        painter.setPen(FAR_EDGE_PEN)
+        painter.drawLine(self._line)
+
+    def detach(self):
+        for node in (self.source_node, self.target_node):
+            if self in node.edges:
+                node.edges.remove(self)
+
+class PendingConnection(QGraphicsPathItem):
+    """Dashed curve that follows the mouse while a connection is being dragged."""
+    def __init__(self, source_node, parent=None):
+        super().__init__(parent)
+        self.source_node = source_node
+        self.setPen(PENDING_EDGE_PEN)
+        self.setZValue(-1)
+
+    def update_end(self, scene_pos):
+        self.setPath(bezier_path(self.source_node.mapToScene(self.source_node.output_port_pos()), scene_pos))
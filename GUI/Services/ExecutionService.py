@@ -0,0 +1,116 @@
+import threading
+from PySide6.QtCore import QObject, Signal
+from engine.Executor import CallExecutor, DEFAULT_MAX_WORKERS
+from engine.GraphRunner import GraphRunner, DEFAULT_MAX_PARALLEL
+from engine.Memo import node_memo
+
+class ExecutionService(QObject):
+    """
+    Dispatches @api_call invocations off the GUI thread, async ones to the shared event loop (engine/AsyncLoop.py).
+    Signals are emitted from worker threads or the loop thread and delivered to GUI slots as queued connections.
+    """
+    call_started = Signal(int, str) # call_id, call name
+    call_progress = Signal(int, str) # call_id, message
+    call_finished = Signal(int, str, object, float) # call_id, call name, result, elapsed seconds
+    call_failed = Signal(int, str, str) # call_id, call name, error
+    call_cancelled = Signal(int, str) # call_id, call name
+
+    def __init__(self, max_workers=DEFAULT_MAX_WORKERS, parent=None):
+        super().__init__(parent)
+        self._executor = CallExecutor(max_workers=max_workers, listener=self)
+
+    @property
+    def max_workers(self):
+        return self._executor.max_workers
+
+    def set_max_workers(self, max_workers: int):
+        self._executor.set_max_workers(max_workers)
+
+    def submit(self, api_instance, call_name: str, kwargs=None) -> int:
+        return self._executor.submit(api_instance, call_name, kwargs)
+
+    def cancel(self, call_id: int) -> bool:
+        return self._executor.cancel(call_id)
+
+    def cancel_all(self) -> int:
+        return self._executor.cancel_all()
+
+    def in_flight(self) -> int:
+        return self._executor.in_flight()
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
+
+    # CallExecutor listener interface, called from worker threads and the event loop thread
+    def on_started(self, call_id, call_name):
+        self.call_started.emit(call_id, call_name)
+
+    def on_progress(self, call_id, message):
+        self.call_progress.emit(call_id, str(message))
+
+    def on_finished(self, call_id, call_name, result, elapsed):
+        self.call_finished.emit(call_id, call_name, result, elapsed)
+
+    def on_failed(self, call_id, call_name, error):
+        self.call_failed.emit(call_id, call_name, f"{type(error).__name__}: {error}")
+
+    def on_cancelled(self, call_id, call_name):
+        self.call_cancelled.emit(call_id, call_name)
+
+class BlueprintRunService(QObject):
+    """Runs a Blueprint on a background thread and reports node events as Qt signals."""
+    node_started = Signal(str)
+    node_progress = Signal(str, str) # node id, message
+    node_finished = Signal(str, object, float) # node id, output, elapsed seconds
+    node_failed = Signal(str, str) # node id, error
+    node_skipped = Signal(str)
+    node_cached = Signal(str, object) # node id, memoized output
+    run_finished = Signal(object) # GraphRunResult
+    run_failed = Signal(str)
+
+    def __init__(self, max_parallel=DEFAULT_MAX_PARALLEL, parent=None):
+        super().__init__(parent)
+        self.max_parallel = max_parallel
+        self._runner = None
+        self._thread = None
+
+    def is_running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, blueprint, api_instance, force=False) -> bool:
+        """Unchanged nodes reuse their outputs from earlier runs; `force` as for GraphRunner.run."""
+        if self.is_running():
+            return False
+        self._runner = GraphRunner(max_parallel=self.max_parallel, listener=self, memo=node_memo)
+        self._thread = threading.Thread(target=self._run, args=(self._runner, blueprint, api_instance, force), name="ae-blueprint", daemon=True)
+        self._thread.start()
+        return True
+
+    def cancel(self):
+        if self._runner is not None:
+            self._runner.cancel()
+
+    def _run(self, runner, blueprint, api_instance, force):
+        try:
+            self.run_finished.emit(runner.run(blueprint, api_instance, force=force))
+        except Exception as e:
+            self.run_failed.emit(f"{type(e).__name__}: {e}")
+
+    # GraphRunner listener interface, called from worker threads
+    def on_node_started(self, node_id):
+        self.node_started.emit(node_id)
+
+    def on_node_progress(self, node_id, message):
+        self.node_progress.emit(node_id, str(message))
+
+    def on_node_finished(self, node_id, output, elapsed):
+        self.node_finished.emit(node_id, output, elapsed)
+
+    def on_node_failed(self, node_id, error):
+        self.node_failed.emit(node_id, f"{type(error).__name__}: {error}")
+
+    def on_node_skipped(self, node_id):
+        self.node_skipped.emit(node_id)
+
+    def on_node_cached(self, node_id, output):
+        self.node_cached.emit(node_id, output)
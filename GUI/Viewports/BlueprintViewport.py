@@ -1,56 +1,452 @@
-from PySide6.QtWidgets import QGraphicsView, QGraphicsScene
-from PySide6.QtGui import QPainter
-from GUI.Nodes.ApiCallNodes import ApiCallNode
-from PySide6.QtCore import Qt
-
-class BlueprintViewport(QGraphicsView):
-    def __init__(self, parent=None):
-        super().__init__(parent)
-        self.setScene(QGraphicsScene())
-        self.setAcceptDrops(True) # Enable drag and drop
-        self.setDragMode(QGraphicsView.DragMode.NoDrag)
-        self.setRenderHint(QPainter.RenderHint.Antialiasing)
-        self.setSceneRect(-200, -200, 400, 400) # Define a larger scene area
-        self.scale_factor = 1.0
-
-    def dragEnterEvent(self, event):
-        if event.mimeData().hasText():
-            event.acceptProposedAction()
-            print(f"Drag Enter Event: Accepted. Data: {event.mimeData().text()}")
-        else:
-            event.ignore()
-            print(f"Drag Enter Event: Ignored. No text data.")
-
-    def dragMoveEvent(self, event):
-        if event.mimeData().hasText():
-            event.acceptProposedAction()
-        else:
-            event.ignore()
-
-    def dropEvent(self, event):
-        print("Drop event triggered (BlueprintViewport)") 
-        if event.mimeData().hasText():
-            text = event.mimeData().text()
-            node = ApiCallNode(name=text)
-            scene_pos = self.mapToScene(event.position().toPoint())
-            node.setPos(scene_pos)
-            self.scene().addItem(node)
-            event.acceptProposedAction()
-            print(f"Node '{text}' added at {scene_pos}")
-        else:
-            event.ignore()
-            print("Drop event: Ignored. No text data.")
-
-    def wheelEvent(self, event):
-        if event.modifiers() & Qt.KeyboardModifier.ControlModifier:
-            zoom_in_factor = 1.25
-            zoom_out_factor = 1 / zoom_in_factor
-            if event.angleDelta().y() > 0:
-                self.scale(zoom_in_factor, zoom_in_factor)
-                self.scale_factor *= zoom_in_factor
-            else:
-                self.scale(zoom_out_factor, zoom_out_factor)
-                self.scale_factor *= zoom_out_factor
-            event.accept()
-        else:
-            super().wheelEvent(event)
\ No newline at end of file
+import math, shlex
+from contextlib import contextmanager
+from PySide6.QtWidgets import QGraphicsView, QGraphicsScene, QInputDialog
+from PySide6.QtGui import QPainter, QPicture, QPixmap
+from GUI.Nodes.ApiCallNodes import ApiCallNode, STATUS_TITLE_BRUSHES, OUTLINE_LOD
+from GUI.Nodes.Connections import ConnectionEdge, PendingConnection, FAR_EDGE_PEN
+from PySide6.QtCore import Qt, QRectF, QPointF, QLineF
+from engine.Executor import parse_call_args
+from engine.Graph import Blueprint
+
+SCENE_MARGIN = 400 # Room to pan and drop new nodes past the outermost ones
+MAX_OVERVIEW_PIXELS = 8 * 1024 * 1024 # Largest overview raster cached per zoom level (32MB); beyond that it's replayed per frame
+GRID_CELL = 512 # Side of the grid cells that index the nodes and edges still without items
+MATERIALIZE_MARGIN = 256 # Items are created this far past the viewport edges, so short pans find them ready
+MAX_EDGE_CELLS = 64 # Pending edges whose bounding box covers more cells are tested one by one instead
+
+def _display_name(call_name):
+    return call_name.replace('_', ' ').title()
+
+def _cell_range(low, high):
+    return range(math.floor(low / GRID_CELL), math.floor(high / GRID_CELL) + 1)
+
+class BlueprintViewport(QGraphicsView):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        scene = QGraphicsScene()
+        scene.setItemIndexMethod(QGraphicsScene.ItemIndexMethod.BspTreeIndex)
+        scene.setSceneRect(-200, -200, 400, 400) # Starting area; grows with the flow
+        self.setScene(scene)
+        self.setAcceptDrops(True) # Enable drag and drop
+        self.setDragMode(QGraphicsView.DragMode.NoDrag)
+        self.setRenderHint(QPainter.RenderHint.Antialiasing)
+        # Items set every pen/brush/hint they use, and their bounding rects already include an antialiasing margin
+        self.setOptimizationFlags(
+            QGraphicsView.OptimizationFlag.DontSavePainterState | QGraphicsView.OptimizationFlag.DontAdjustForAntialiasing
+        )
+        self.scale_factor = 1.0
+        self.blueprint = Blueprint() # Execution model, kept in sync with the graphics items
+        self.node_items = {} # node id -> ApiCallNode, only for the nodes shown so far (see load_blueprint)
+        self._statuses = {} # node id -> run status, kept for nodes that have no item yet
+        self._pending_nodes = {} # grid cell -> ids of nodes without an item
+        self._pending_edges = {} # grid cell -> edges without an item whose bounding box touches the cell
+        self._long_edges = [] # (edge, bounding rect) of pending edges too long to index by cell
+        self._edge_keys = set() # (source, target) of the edges that have an item
+        self._pending_connection = None
+        self._bulk_depth = 0
+        self._overview = False # Zoomed out past OUTLINE_LOD: items hidden, flow drawn from _overview_picture
+        self._overview_picture = None
+        self._overview_pixmap = None # _overview_picture rasterized at _overview_pixmap_scale
+        self._overview_pixmap_scale = None
+
+    @contextmanager
+    def bulk_edit(self):
+        """
+        Batches many add_node()/connect_nodes() calls, e.g. when loading a generated flow: the scene rect
+        is sized once at the end. (Qt already defers BSP insertion of new items to one batched update;
+        switching to NoIndex meanwhile leaves the rebuilt index unused, so it's left alone.)
+        """
+        self._bulk_depth += 1
+        try:
+            yield
+        finally:
+            self._bulk_depth -= 1
+            if self._bulk_depth == 0:
+                self.grow_scene_rect(self.scene().itemsBoundingRect())
+
+    def grow_scene_rect(self, rect):
+        """
+        Extends the scene so rect (plus a margin) can be scrolled to. Growth is at least half the current size,
+        so a flow growing node by node only rebuilds the spatial index a logarithmic number of times.
+        """
+        scene_rect = self.scene().sceneRect()
+        if scene_rect.contains(rect):
+            return
+        grow_x = max(SCENE_MARGIN, scene_rect.width() / 2)
+        grow_y = max(SCENE_MARGIN, scene_rect.height() / 2)
+        grown = QRectF(scene_rect)
+        if rect.left() < scene_rect.left():
+            grown.setLeft(min(rect.left() - SCENE_MARGIN, scene_rect.left() - grow_x))
+        if rect.right() > scene_rect.right():
+            grown.setRight(max(rect.right() + SCENE_MARGIN, scene_rect.right() + grow_x))
+        if rect.top() < scene_rect.top():
+            grown.setTop(min(rect.top() - SCENE_MARGIN, scene_rect.top() - grow_y))
+        if rect.bottom() > scene_rect.bottom():
+            grown.setBottom(max(rect.bottom() + SCENE_MARGIN, scene_rect.bottom() + grow_y))
+        self.scene().setSceneRect(grown)
+
+    def add_node(self, call_name, scene_pos, params=None):
+        node = self.blueprint.add_node(call_name, params, scene_pos.x(), scene_pos.y())
+        item = self._create_node_item(node)
+        self._invalidate_overview()
+        if not self._bulk_depth:
+            self.grow_scene_rect(item.sceneBoundingRect())
+        return item
+
+    def connect_nodes(self, source_item, target_item):
+        try:
+            self.blueprint.connect(source_item.node_id, target_item.node_id)
+        except (KeyError, ValueError) as e:
+            print(f"Connection rejected: {e}")
+            return None
+        edge = self._create_edge_item(source_item, target_item)
+        self._invalidate_overview()
+        return edge
+
+    def clear(self):
+        """Removes every node and edge and starts a new, empty blueprint."""
+        self.scene().clear()
+        self._pending_connection = None
+        self.blueprint = Blueprint()
+        self.node_items = {}
+        self._statuses = {}
+        self._pending_nodes = {}
+        self._pending_edges = {}
+        self._long_edges = []
+        self._edge_keys = set()
+        self._invalidate_overview()
+
+    def load_blueprint(self, blueprint):
+        """
+        Shows a blueprint built elsewhere, e.g. read from a flow file. The model is complete right away, so it can be
+        run or saved at once, but only the nodes and edges near the viewport get graphics items now: the rest are
+        indexed on a grid of GRID_CELL and created as panning or zooming brings them into view.
+        """
+        self.clear()
+        self.blueprint = blueprint
+        nodes = blueprint.nodes
+        cells = {} # node id -> grid cell
+        for node_id, node in nodes.items():
+            cell = cells[node_id] = (math.floor(node.x / GRID_CELL), math.floor(node.y / GRID_CELL))
+            self._pending_nodes.setdefault(cell, set()).add(node_id)
+        for edge in blueprint.edges:
+            source_cell, target_cell = cells[edge.source], cells[edge.target]
+            if source_cell == target_cell:
+                self._pending_edges.setdefault(source_cell, []).append(edge)
+                continue
+            (source_column, source_row), (target_column, target_row) = source_cell, target_cell
+            columns = range(min(source_column, target_column), max(source_column, target_column) + 1)
+            rows = range(min(source_row, target_row), max(source_row, target_row) + 1)
+            if len(columns) * len(rows) > MAX_EDGE_CELLS:
+                source, target = nodes[edge.source], nodes[edge.target]
+                self._long_edges.append((edge, QRectF(QPointF(source.x, source.y), QPointF(target.x, target.y)).normalized()))
+                continue
+            for column in columns:
+                for row in rows:
+                    self._pending_edges.setdefault((column, row), []).append(edge)
+        self.resetTransform()
+        self.scale_factor = 1.0
+        if nodes:
+            xs = [node.x for node in nodes.values()]
+            ys = [node.y for node in nodes.values()]
+            left, top = min(xs), min(ys)
+            bounds = QRectF(left, top, max(xs) - left, max(ys) - top)
+            self.scene().setSceneRect(bounds.adjusted(-SCENE_MARGIN, -SCENE_MARGIN, SCENE_MARGIN, SCENE_MARGIN))
+            # Start at the top-left of a large flow rather than in its middle
+            view = self.viewport().rect()
+            self.centerOn(left + min(bounds.width(), view.width()) / 2, top + min(bounds.height(), view.height()) / 2)
+        self.viewport().update()
+
+    def _create_node_item(self, node):
+        item = ApiCallNode(name=_display_name(node.call), node_id=node.id, call_name=node.call)
+        item.setPos(node.x, node.y)
+        item.status = self._statuses.get(node.id, "idle")
+        item.setVisible(not self._overview)
+        self.scene().addItem(item)
+        self.node_items[node.id] = item
+        return item
+
+    def _create_edge_item(self, source_item, target_item):
+        edge = ConnectionEdge(source_item, target_item)
+        edge.setVisible(not self._overview)
+        self.scene().addItem(edge)
+        self._edge_keys.add((source_item.node_id, target_item.node_id))
+        return edge
+
+    def _materialize_node(self, node_id):
+        item = self.node_items.get(node_id)
+        if item is None:
+            node = self.blueprint.nodes.get(node_id)
+            if node is None: # Removed since it was indexed
+                return None
+            cell = self._pending_nodes.get((math.floor(node.x / GRID_CELL), math.floor(node.y / GRID_CELL)))
+            if cell is not None:
+                cell.discard(node_id)
+            item = self._create_node_item(node)
+        return item
+
+    def _materialize_edge(self, edge):
+        if (edge.source, edge.target) in self._edge_keys:
+            return
+        source_item = self._materialize_node(edge.source)
+        target_item = self._materialize_node(edge.target)
+        if source_item is not None and target_item is not None:
+            self._create_edge_item(source_item, target_item)
+
+    def _materialize_visible(self):
+        """Creates the items of the pending nodes and edges in (or near) the visible part of the scene."""
+        if not (self._pending_nodes or self._pending_edges or self._long_edges):
+            return
+        rect = self.mapToScene(self.viewport().rect()).boundingRect().adjusted(
+            -MATERIALIZE_MARGIN, -MATERIALIZE_MARGIN, MATERIALIZE_MARGIN, MATERIALIZE_MARGIN
+        )
+        cells = [(column, row) for column in _cell_range(rect.left(), rect.right()) for row in _cell_range(rect.top(), rect.bottom())]
+        for cell in cells:
+            for node_id in self._pending_nodes.pop(cell, ()):
+                self._materialize_node(node_id)
+        for cell in cells:
+            for edge in self._pending_edges.pop(cell, ()):
+                self._materialize_edge(edge)
+        if self._long_edges:
+            remaining = []
+            for edge, bounds in self._long_edges:
+                if bounds.intersects(rect):
+                    self._materialize_edge(edge)
+                else:
+                    remaining.append((edge, bounds))
+            self._long_edges = remaining
+
+    def remove_selected(self):
+        for item in self.scene().selectedItems():
+            if isinstance(item, ConnectionEdge):
+                self.blueprint.disconnect(item.source_node.node_id, item.target_node.node_id)
+                self._edge_keys.discard((item.source_node.node_id, item.target_node.node_id))
+                item.detach()
+                self.scene().removeItem(item)
+        for item in self.scene().selectedItems():
+            if isinstance(item, ApiCallNode):
+                for edge in list(item.edges):
+                    self._edge_keys.discard((edge.source_node.node_id, edge.target_node.node_id))
+                    edge.detach()
+                    self.scene().removeItem(edge)
+                self.blueprint.remove_node(item.node_id)
+                self.node_items.pop(item.node_id, None)
+                self._statuses.pop(item.node_id, None)
+                self.scene().removeItem(item)
+        self._invalidate_overview()
+
+    def set_node_status(self, node_id, status):
+        if node_id not in self.blueprint.nodes:
+            return
+        self._statuses[node_id] = status
+        item = self.node_items.get(node_id)
+        if item is not None:
+            item.set_status(status)
+        self._invalidate_overview()
+
+    def reset_node_status(self):
+        self._statuses.clear()
+        for item in self.node_items.values():
+            item.set_status("idle")
+        self._invalidate_overview()
+
+    def _set_overview(self, overview):
+        # One visibility pass per zoom threshold crossing; hidden items are skipped by the scene index
+        self._overview = overview
+        for item in self.node_items.values():
+            item.setVisible(not overview)
+            for edge in item.edges:
+                if edge.source_node is item:
+                    edge.setVisible(not overview)
+
+    def _invalidate_overview(self):
+        self._overview_picture = None
+        self._overview_pixmap = None
+        self._overview_pixmap_scale = None
+        if self._overview:
+            self.viewport().update()
+
+    def _record_overview(self):
+        """
+        The whole flow as status-coloured blocks and straight edges, recorded once and replayed per frame.
+        Drawn from the model, so nodes that have no item yet show up too.
+        """
+        picture = QPicture()
+        painter = QPainter(picture)
+        rects_by_status = {}
+        ports = {} # node id -> (input port, output port) in scene coordinates
+        node_items, statuses = self.node_items, self._statuses
+        for node in self.blueprint.nodes.values():
+            bounds, port_offset = ApiCallNode.layout(_display_name(node.call))
+            item = node_items.get(node.id)
+            # Items may have been dragged since the model was last synced
+            x, y = (item.x(), item.y()) if item is not None else (node.x, node.y)
+            rects_by_status.setdefault(statuses.get(node.id, "idle"), []).append(bounds.translated(x, y))
+            ports[node.id] = (QPointF(x - port_offset, y), QPointF(x + port_offset, y))
+        lines = [QLineF(ports[edge.source][1], ports[edge.target][0]) for edge in self.blueprint.edges]
+        painter.setPen(FAR_EDGE_PEN)
+        painter.drawLines(lines)
+        painter.setPen(Qt.PenStyle.NoPen)
+        for status, rects in rects_by_status.items():
+            painter.setBrush(STATUS_TITLE_BRUSHES.get(status, STATUS_TITLE_BRUSHES["idle"]))
+            painter.drawRects(rects)
+        painter.end()
+        return picture
+
+    def _render_overview_pixmap(self, scale_x, scale_y):
+        bounds = self._overview_picture.boundingRect()
+        width, height = int(bounds.width() * scale_x) + 2, int(bounds.height() * scale_y) + 2
+        if bounds.isEmpty() or width * height > MAX_OVERVIEW_PIXELS:
+            return None
+        pixmap = QPixmap(width, height)
+        pixmap.fill(Qt.GlobalColor.transparent)
+        painter = QPainter(pixmap)
+        painter.scale(scale_x, scale_y)
+        painter.translate(-bounds.x(), -bounds.y())
+        painter.drawPicture(0, 0, self._overview_picture)
+        painter.end()
+        return pixmap
+
+    def paintEvent(self, event):
+        # Past this zoom every node would be a flat block anyway; drawing them as items costs a Python
+        # paint() call each, which no longer keeps up once thousands of nodes are in view
+        overview = self.transform().m11() < OUTLINE_LOD
+        if overview != self._overview:
+            self._set_overview(overview)
+        if not overview:
+            self._materialize_visible()
+        super().paintEvent(event)
+
+    def drawBackground(self, painter, rect):
+        super().drawBackground(painter, rect)
+        if not self._overview:
+            return
+        if self._overview_picture is None:
+            self._overview_picture = self._record_overview()
+        transform = painter.worldTransform()
+        scale = (transform.m11(), transform.m22())
+        if self._overview_pixmap_scale != scale:
+            # Panning reuses the raster; only zooming or editing the flow renders it again
+            self._overview_pixmap = self._render_overview_pixmap(*scale)
+            self._overview_pixmap_scale = scale
+        if self._overview_pixmap is None:
+            painter.drawPicture(0, 0, self._overview_picture)
+            return
+        origin = transform.map(self._overview_picture.boundingRect().topLeft())
+        painter.save()
+        painter.resetTransform()
+        painter.drawPixmap(origin, self._overview_pixmap) # 1:1 blit in device pixels
+        painter.restore()
+
+    def sync_positions(self):
+        # Node positions only live on the items while the user drags them around
+        for node_id, item in self.node_items.items():
+            node = self.blueprint.nodes[node_id]
+            node.x, node.y = item.pos().x(), item.pos().y()
+
+    def _node_item_at(self, view_pos):
+        for item in self.items(view_pos):
+            if isinstance(item, ApiCallNode):
+                return item
+        return None
+
+    def mousePressEvent(self, event):
+        item = self._node_item_at(event.position().toPoint())
+        scene_pos = self.mapToScene(event.position().toPoint())
+        if event.button() == Qt.MouseButton.LeftButton and item is not None and item.port_at(scene_pos) == "output":
+            # Start dragging a new connection out of the output port
+            self._pending_connection = PendingConnection(item)
+            self._pending_connection.update_end(scene_pos)
+            self.scene().addItem(self._pending_connection)
+            event.accept()
+            return
+        super().mousePressEvent(event)
+
+    def mouseMoveEvent(self, event):
+        if self._pending_connection is not None:
+            self._pending_connection.update_end(self.mapToScene(event.position().toPoint()))
+            event.accept()
+            return
+        super().mouseMoveEvent(event)
+
+    def mouseReleaseEvent(self, event):
+        if self._pending_connection is not None:
+            source_item = self._pending_connection.source_node
+            self.scene().removeItem(self._pending_connection)
+            self._pending_connection = None
+            target_item = self._node_item_at(event.position().toPoint())
+            if target_item is not None and target_item is not source_item:
+                self.connect_nodes(source_item, target_item)
+            event.accept()
+            return
+        super().mouseReleaseEvent(event)
+        # Nodes dragged towards the edge extend the canvas
+        selected = self.scene().selectedItems()
+        if selected:
+            moved = QRectF()
+            for item in selected:
+                moved = moved.united(item.sceneBoundingRect())
+            self.grow_scene_rect(moved)
+            self._invalidate_overview()
+
+    def mouseDoubleClickEvent(self, event):
+        item = self._node_item_at(event.position().toPoint())
+        if item is None:
+            super().mouseDoubleClickEvent(event)
+            return
+        node = self.blueprint.nodes[item.node_id]
+        current = " ".join(f"{key}={value}" for key, value in node.params.items())
+        text, ok = QInputDialog.getText(self, item.name, "Parameters (key=value ...):", text=current)
+        if ok:
+            try:
+                node.params = parse_call_args(shlex.split(text))
+            except ValueError as e:
+                print(f"Invalid parameters for {item.name}: {e}")
+        event.accept()
+
+    def keyPressEvent(self, event):
+        if event.key() in (Qt.Key.Key_Delete, Qt.Key.Key_Backspace):
+            self.remove_selected()
+            event.accept()
+            return
+        super().keyPressEvent(event)
+
+    def dragEnterEvent(self, event):
+        if event.mimeData().hasText():
+            event.acceptProposedAction()
+            print(f"Drag Enter Event: Accepted. Data: {event.mimeData().text()}")
+        else:
+            event.ignore()
+            print(f"Drag Enter Event: Ignored. No text data.")
+
+    def dragMoveEvent(self, event):
+        if event.mimeData().hasText():
+            event.acceptProposedAction()
+        else:
+            event.ignore()
+
+    def dropEvent(self, event):
+        print("Drop event triggered (BlueprintViewport)") 
+        if event.mimeData().hasText():
+            text = event.mimeData().text()
+            scene_pos = self.mapToScene(event.position().toPoint())
+            self.add_node(text, scene_pos)
+            event.acceptProposedAction()
+            print(f"Node '{text}' added at {scene_pos}")
+        else:
+            event.ignore()
+            print("Drop event: Ignored. No text data.")
+
+    def wheelEvent(self, event):
+        if event.modifiers() & Qt.KeyboardModifier.ControlModifier:
+            zoom_in_factor = 1.25
+            zoom_out_factor = 1 / zoom_in_factor
+            if event.angleDelta().y() > 0:
+                self.scale(zoom_in_factor, zoom_in_factor)
+                self.scale_factor *= zoom_in_factor
+            else:
+                self.scale(zoom_out_factor, zoom_out_factor)
+                self.scale_factor *= zoom_out_factor
+            event.accept()
+        else:
+            super().wheelEvent(event)
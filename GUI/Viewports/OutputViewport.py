@@ -1,42 +1,96 @@
-from PySide6.QtCore import Signal, Qt
-from PySide6.QtWidgets import (
-    QWidget,
-    QVBoxLayout,
-    QTextEdit,
-    QLineEdit
-)
-
-class OutputViewport(QWidget): 
-    command_entered = Signal(str) # Custom signal to emit when a command is entered
-    def __init__(self, parent=None):
-        super().__init__(parent)
-        main_layout = QVBoxLayout(self)
-        main_layout.setContentsMargins(0, 0, 0, 0) # Remove margins for a cleaner look
-
-        # Output Display Area
-        self.output_display = QTextEdit() # Use QTextEdit or QPlainTextEdit
-        self.output_display.setReadOnly(True)
-        self.output_display.setPlaceholderText("Output will appear here...")
-        self.output_display.setTextInteractionFlags(Qt.TextInteractionFlag.TextSelectableByMouse | Qt.TextInteractionFlag.TextSelectableByKeyboard)
-        main_layout.addWidget(self.output_display)
-
-        # Input Line
-        self.input_line = QLineEdit()
-        self.input_line.setPlaceholderText("Enter command here...")
-        self.input_line.returnPressed.connect(self._on_return_pressed) # Connect Enter key press
-        main_layout.addWidget(self.input_line)
-
-        # Initial message
-        self.append_output("Welcome to the Automation Engine Shell!")
-        self.append_output("Type a command and press Enter.")
-
-    def _on_return_pressed(self):
-        command = self.input_line.text()
-        if command:
-            self.append_output(f"> {command}") # Echo the command
-            self.command_entered.emit(command) # Emit the command for processing
-            self.input_line.clear() # Clear the input line
-
-    def append_output(self, text):
-        self.output_display.append(text)
-        self.output_display.verticalScrollBar().setValue(self.output_display.verticalScrollBar().maximum())
+import time
+from PySide6.QtCore import Signal, Qt, QTimer
+from PySide6.QtWidgets import (
+    QWidget,
+    QVBoxLayout,
+    QPlainTextEdit,
+    QLineEdit
+)
+from engine.LogSink import LogSink, StdioCapture, DEFAULT_MAX_LINES
+
+DEFAULT_FLUSH_INTERVAL_MS = 50
+
+class OutputViewport(QWidget): 
+    command_entered = Signal(str) # Custom signal to emit when a command is entered
+    def __init__(self, parent=None, max_lines=DEFAULT_MAX_LINES, flush_interval_ms=DEFAULT_FLUSH_INTERVAL_MS):
+        super().__init__(parent)
+        main_layout = QVBoxLayout(self)
+        main_layout.setContentsMargins(0, 0, 0, 0) # Remove margins for a cleaner look
+
+        # Output Display Area
+        self.output_display = QPlainTextEdit() # Plain text: no rich text layout per line
+        self.output_display.setReadOnly(True)
+        self.output_display.setPlaceholderText("Output will appear here...")
+        self.output_display.setTextInteractionFlags(Qt.TextInteractionFlag.TextSelectableByMouse | Qt.TextInteractionFlag.TextSelectableByKeyboard)
+        self.output_display.setMaximumBlockCount(max_lines) # Ring buffer: oldest lines are discarded
+        self.output_display.setUndoRedoEnabled(False)
+        main_layout.addWidget(self.output_display)
+
+        # Input Line
+        self.input_line = QLineEdit()
+        self.input_line.setPlaceholderText("Enter command here...")
+        self.input_line.returnPressed.connect(self._on_return_pressed) # Connect Enter key press
+        main_layout.addWidget(self.input_line)
+
+        # Lines from any thread are queued here and inserted in one batch per timer tick
+        self.sink = LogSink(max_pending=max_lines)
+        self._capture = StdioCapture(self.sink)
+        self._flush_interval_ms = flush_interval_ms
+        self._flush_timer = QTimer(self)
+        self._flush_timer.setInterval(flush_interval_ms)
+        self._flush_timer.timeout.connect(self.flush)
+        self._flush_timer.start()
+
+        # Initial message
+        self.append_output("Welcome to the Automation Engine Shell!")
+        self.append_output("Type a command and press Enter.")
+
+    def _on_return_pressed(self):
+        command = self.input_line.text()
+        if command:
+            self.append_output(f"> {command}") # Echo the command
+            self.command_entered.emit(command) # Emit the command for processing
+            self.input_line.clear() # Clear the input line
+
+    def append_output(self, text):
+        # Safe to call from any thread; shown on the next flush
+        self.sink.put(text)
+
+    def capture_stdio(self, echo_to_console=False):
+        """Sends print() and logging output (including from API code on worker threads) to this viewport."""
+        if echo_to_console:
+            import sys
+            self.sink.echo = sys.__stdout__
+        self._capture.install()
+
+    def release_stdio(self):
+        self._capture.uninstall()
+        self.sink.echo = None
+
+    def clear(self):
+        self.sink.clear()
+        self.output_display.clear()
+
+    def set_max_lines(self, max_lines: int):
+        self.sink.max_pending = max_lines
+        self.output_display.setMaximumBlockCount(max_lines)
+
+    def flush(self):
+        lines, dropped = self.sink.drain()
+        if not lines and not dropped:
+            return
+        start = time.perf_counter()
+        scroll_bar = self.output_display.verticalScrollBar()
+        follow = scroll_bar.value() >= scroll_bar.maximum() - 2 # Don't yank the view while the user scrolls back
+        if dropped:
+            lines.appendleft(f"... {dropped} line(s) dropped ...")
+        if len(lines) >= self.output_display.maximumBlockCount():
+            # The batch replaces the whole buffer anyway; resetting is far cheaper than append + trim
+            self.output_display.setPlainText("\n".join(lines))
+        else:
+            self.output_display.appendPlainText("\n".join(lines))
+        if follow:
+            scroll_bar.setValue(scroll_bar.maximum())
+        # Back off under floods so inserting never takes more than about half of the event loop's time
+        elapsed_ms = int((time.perf_counter() - start) * 1000)
+        self._flush_timer.setInterval(max(self._flush_interval_ms, 2 * elapsed_ms))
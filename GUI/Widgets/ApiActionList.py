@@ -0,0 +1,15 @@
+from PySide6.QtWidgets import QListWidget, QAbstractItemView
+from PySide6.QtCore import Qt, QMimeData
+
+class ApiActionList(QListWidget):
+    """List of the synced API's calls; items drag onto the blueprint as plain text method names."""
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setDragEnabled(True)
+        self.setDragDropMode(QAbstractItemView.DragDropMode.DragOnly)
+
+    def mimeData(self, items):
+        mime_data = QMimeData()
+        if items:
+            mime_data.setText(items[0].data(Qt.ItemDataRole.UserRole))
+        return mime_data
@@ -0,0 +1,36 @@
+from PySide6.QtWidgets import QTableWidget, QTableWidgetItem, QAbstractItemView, QHeaderView
+from PySide6.QtCore import Qt
+
+class ProfileTable(QTableWidget):
+    """Rows of the last profile in a window of their own; click a column header to sort by it."""
+    COLUMNS = ("Node", "Call", "Phase", "ms", "%", "Samples")
+
+    def __init__(self, parent=None):
+        super().__init__(0, len(self.COLUMNS), parent)
+        self.setWindowFlag(Qt.WindowType.Window)
+        self.setWindowTitle("Profile")
+        self.resize(640, 360)
+        self.setHorizontalHeaderLabels(self.COLUMNS)
+        self.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.ResizeToContents)
+        self.verticalHeader().setVisible(False)
+        self.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+
+    def show_profile(self, profile):
+        total = profile.seconds
+        rows = profile.rows()
+        self.setSortingEnabled(False) # Otherwise rows move while they're being filled in
+        self.setRowCount(len(rows))
+        for index, row in enumerate(rows):
+            values = (row.node, row.call, row.phase, round(row.ms, 1), round(100 * row.seconds / total, 1) if total else 0.0, row.samples)
+            for column, value in enumerate(values):
+                item = QTableWidgetItem()
+                item.setData(Qt.ItemDataRole.DisplayRole, value) # Numbers sort as numbers
+                if not isinstance(value, str):
+                    item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+                self.setItem(index, column, item)
+        self.setSortingEnabled(True)
+        self.sortItems(3, Qt.SortOrder.DescendingOrder)
+        self.setWindowTitle(f"Profile: {total * 1000:.1f} ms of thread time in {profile.elapsed:.2f}s")
+        self.show()
+        self.raise_()
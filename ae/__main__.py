@@ -0,0 +1,183 @@
+"""
+Headless entry point: `python -m ae run flow.json --api ExampleAPI --env staging --tenant name`.
+Never imports Qt, so runners start fast and can be fanned out by the hundred.
+"""
+import os, sys, argparse
+
+# Defaults that live in engine modules are filled in by _fill_defaults(), so parsing (and `--help`) loads no engine code
+CONFIG_HELP = "Path to config.json (default: data/config.json)"
+
+def _add_target_arguments(parser):
+    parser.add_argument("--api", help="API name from config.json")
+    parser.add_argument("--env", help="Environment of the API")
+    parser.add_argument("--tenant", help="Tenant of the environment")
+    parser.add_argument("--config", help=CONFIG_HELP)
+    parser.add_argument("--base-url", help="Override the API's base URL (e.g. a stand-in server)")
+    parser.add_argument("--stats-out", help="Write call metrics when done (.prom/.txt: Prometheus text, otherwise JSON)")
+    _add_transport_arguments(parser)
+
+def _add_transport_arguments(parser):
+    transport = parser.add_mutually_exclusive_group()
+    transport.add_argument("--record", metavar="DIR", help="Record every response to cassettes in DIR")
+    transport.add_argument("--replay", metavar="DIR", help="Answer every request from the cassettes in DIR, without network access")
+
+def _add_profile_arguments(parser):
+    parser.add_argument("--profile", action="store_true", help="Sample the run and print where the time went (per node, call and phase) to stderr")
+    parser.add_argument("--profile-out", metavar="PATH", help="Also write the samples as collapsed stacks for flamegraph.pl/speedscope (implies --profile)")
+    parser.add_argument("--profile-sort", default="ms", help="Column the profile table is sorted by: ms, samples, node, call or phase")
+    parser.add_argument("--profile-interval", type=float, metavar="MS", help="Sampling interval (default: 2)")
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m ae", description="Run Automation Engine flows without a display.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="Execute a saved blueprint and stream events as JSON lines")
+    run_parser.add_argument("flow", help="Blueprint file (.json, or .json.gz compressed)")
+    run_parser.add_argument("--max-parallel", type=int, help="Nodes executed concurrently (default: 8)")
+    _add_target_arguments(run_parser)
+    _add_profile_arguments(run_parser)
+
+    call_parser = commands.add_parser("call", help="Execute a single API call")
+    call_parser.add_argument("call_name", help="Method name of the @api_call")
+    call_parser.add_argument("params", nargs="*", help="key=value parameters")
+    _add_target_arguments(call_parser)
+    _add_profile_arguments(call_parser)
+
+    bench_parser = commands.add_parser("bench", help="Load-test an API call and report throughput and latency percentiles")
+    bench_parser.add_argument("call_name", help="Method name of the @api_call")
+    bench_parser.add_argument("params", nargs="*", help="key=value call parameters and bench options: n, duration, concurrency, rate, cache=on")
+    _add_target_arguments(bench_parser)
+
+    standin_parser = commands.add_parser("standin", help="Serve the local stand-in API backend")
+    standin_parser.add_argument("--host", default="127.0.0.1")
+    standin_parser.add_argument("--port", type=int, default=5000)
+    standin_parser.add_argument("--latency-ms", type=float, default=0.0, help="Delay injected before every response")
+    standin_parser.add_argument("--records", type=int, default=10, help="Items in each generated payload")
+    standin_parser.add_argument("--rate-limit", type=float, help="Answer requests over this many per second with 429 + Retry-After")
+    standin_parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with 503")
+    standin_parser.add_argument("--cassette", action="append", default=[], help="Replay this cassette file or folder of cassettes (repeatable)")
+    standin_parser.add_argument("--jitter-ms", type=float, default=0.0, help="Random extra delay of up to this much per response")
+    standin_parser.add_argument("--recorded-latency", type=float, default=0.0, help="Also wait this multiple of each cassette response's recorded time")
+
+    matrix_parser = commands.add_parser("matrix", help="Run a call or blueprint for every environment/tenant in parallel processes")
+    matrix_parser.add_argument("target", help="Method name of the @api_call, or a blueprint file (.json or .json.gz)")
+    matrix_parser.add_argument("params", nargs="*", help="key=value call parameters")
+    matrix_parser.add_argument("--envs", help="Comma-separated environments or patterns such as 'prod*' (default: all)")
+    matrix_parser.add_argument("--tenants", help="Comma-separated tenants or patterns (default: all)")
+    matrix_parser.add_argument("--processes", type=int, help="Worker processes (default: matrix.processes in config.json)")
+    matrix_parser.add_argument("--max-parallel", type=int, help="Nodes executed concurrently per blueprint (default: 8)")
+    matrix_parser.add_argument("--api", help="API name from config.json")
+    matrix_parser.add_argument("--config", help=CONFIG_HELP)
+    matrix_parser.add_argument("--base-url", help="Override the API's base URL (e.g. a stand-in server)")
+    _add_transport_arguments(matrix_parser)
+
+    history_parser = commands.add_parser("history", help="Query the run history: recent runs, or latency percentiles with 'stats'")
+    history_parser.add_argument("query", nargs="*", help="[stats] [call] [api= env= tenant= kind= since=7d until= run= limit= by=env,tenant]")
+    history_parser.add_argument("--config", help=CONFIG_HELP)
+
+    manifest_parser = commands.add_parser("manifest", help="Rebuild the API manifest used for lazy loading")
+    manifest_parser.add_argument("--config", help=CONFIG_HELP)
+    manifest_parser.add_argument("--output", help="Manifest file to write (default: data/api_manifest.json)")
+    return parser
+
+def _fill_defaults(parser, args):
+    """Fills in the defaults left out of build_parser(), importing their modules only for the command being run."""
+    if getattr(args, "config", False) is None:
+        from engine.Config import DEFAULT_CONFIG_PATH
+        args.config = DEFAULT_CONFIG_PATH
+    if getattr(args, "output", False) is None:
+        from engine.Config import DEFAULT_MANIFEST_PATH
+        args.output = DEFAULT_MANIFEST_PATH
+    if getattr(args, "max_parallel", False) is None:
+        from engine.GraphRunner import DEFAULT_MAX_PARALLEL
+        args.max_parallel = DEFAULT_MAX_PARALLEL
+    if getattr(args, "profile", False) or getattr(args, "profile_out", None):
+        from engine.Profiler import DEFAULT_INTERVAL_MS, SORT_COLUMNS
+        if args.profile_sort not in SORT_COLUMNS:
+            parser.error(f"argument --profile-sort: invalid choice: {args.profile_sort!r} (choose from {', '.join(SORT_COLUMNS)})")
+        if args.profile_interval is None:
+            args.profile_interval = DEFAULT_INTERVAL_MS
+
+def _run_matrix(args, reporter):
+    from engine import Headless
+    from engine.Executor import parse_call_args
+    from engine.Graph import FLOW_FILE_SUFFIXES
+    from engine.Matrix import MatrixJob, matrix_combinations
+    flow_data = Headless.load_flow(args.target) if args.target.endswith(FLOW_FILE_SUFFIXES) else None
+    target = Headless.resolve_target(args, flow_data)
+    if flow_data is not None:
+        job = MatrixJob(target.api_name, flow_data=flow_data, max_parallel=args.max_parallel, base_url=args.base_url)
+    else:
+        job = MatrixJob(target.api_name, args.target, parse_call_args(args.params), base_url=args.base_url)
+    environments = args.envs.split(",") if args.envs else None
+    tenants = args.tenants.split(",") if args.tenants else None
+    combinations = matrix_combinations(target.config_data, target.api_name, environments, tenants)
+    return Headless.run_matrix(job, combinations, target.config_data, reporter, args.processes)
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    _fill_defaults(parser, args)
+    if args.command == "manifest":
+        from engine.Config import load_config, build_manifest
+        specs = build_manifest(load_config(args.config), args.output)
+        print(f"Wrote {len(specs)} API(s) to {args.output}")
+        return 0
+    if args.command == "history":
+        from apis.History import run_history, parse_history_query
+        from engine.Config import load_config
+        run_history.configure({**load_config(args.config).get("history", {}), "enabled": False}) # Read-only: no writer thread
+        try:
+            lines = run_history.report_lines(parse_history_query(args.query))
+        except (ValueError, OSError) as e:
+            print(f"error: {e}", file=sys.stderr)
+            return 2
+        print("\n".join(lines))
+        return 0
+    if args.command == "standin":
+        from apis.Cassette import open_cassettes
+        from engine.StandInServer import StandInServer
+        try:
+            cassettes = open_cassettes(args.cassette)
+        except OSError as e:
+            print(f"error: {e}", file=sys.stderr)
+            return 2
+        server = StandInServer(args.host, args.port, args.latency_ms / 1000, args.records, args.rate_limit, args.error_rate,
+                               cassettes=cassettes, jitter=args.jitter_ms / 1000, recorded_latency=args.recorded_latency)
+        replaying = f", replaying {sum(len(cassette.keys) for cassette in cassettes)} request(s) from {len(cassettes)} cassette(s)" if cassettes else ""
+        print(f"Stand-in server on {server.url} (latency {args.latency_ms:g} ms{replaying})", file=sys.stderr)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            server.server_close()
+        return 0
+    from engine import Headless
+    from engine.Executor import parse_call_args
+
+    reporter = Headless.JsonLinesReporter(sys.stdout)
+    try:
+        with Headless.api_output_to_stderr():
+            if args.command == "run":
+                flow_data = Headless.load_flow(args.flow)
+                target = Headless.resolve_target(args, flow_data)
+                with Headless.profiled(args, reporter):
+                    ok = Headless.run_flow(flow_data, target, args.max_parallel, reporter, os.path.basename(args.flow))
+            elif args.command == "matrix":
+                ok = _run_matrix(args, reporter)
+            elif args.command == "bench":
+                ok = Headless.run_bench(args.call_name, parse_call_args(args.params), Headless.resolve_target(args), reporter)
+            else:
+                kwargs, target = parse_call_args(args.params), Headless.resolve_target(args)
+                with Headless.profiled(args, reporter):
+                    ok = Headless.run_call(args.call_name, kwargs, target, reporter)
+        if getattr(args, "stats_out", None):
+            from engine.Config import write_stats
+            write_stats(args.stats_out)
+    except (OSError, ValueError, KeyError, ImportError, AttributeError) as e:
+        # Setup problems (bad flow file, unknown API/call, ...) are reported on the stream too
+        reporter.emit("error", error=f"{type(e).__name__}: {e}")
+        return 2
+    return 0 if ok else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,232 @@
+import json as jsonlib, asyncio
+from time import perf_counter_ns
+from urllib.parse import urlsplit, urlencode
+from requests.exceptions import ConnectionError, ConnectTimeout, HTTPError, Timeout
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+from apis.Cache import revalidation_enabled, response_cache
+from apis.Cassette import request_key
+from apis.Http import CassetteMiss, UNRECORDED_HEADERS, UNRECORDED_STATUSES, ValidatorStore, has_validators
+from apis.Metrics import call_metrics
+
+DEFAULT_ASYNC_CONNECTIONS = 1024 # Open connections per async session, over all hosts
+DEFAULT_ASYNC_LIMIT = 8192 # Requests in flight per async session, those waiting for a connection included
+
+def _import_aiohttp():
+    try:
+        import aiohttp # Optional dependency, only needed for async API calls
+    except ImportError:
+        raise ImportError("Install the 'aiohttp' package to make async (async def) API calls") from None
+    return aiohttp
+
+class AsyncRequest:
+    __slots__ = ("method", "url", "headers", "body")
+    def __init__(self, method, url, headers, body):
+        self.method = method
+        self.url = url
+        self.headers = headers
+        self.body = body # bytes or None; what Resilience.may_retry() and the cassette key look at
+
+class AsyncResponse:
+    """A response read in full, with the parts of requests.Response that API calls use."""
+    __slots__ = ("status_code", "reason", "headers", "content", "encoding", "url", "request", "ttfb_ns", "revalidated")
+    def __init__(self, status_code, reason, headers, content, url, request, ttfb_ns, revalidated=False):
+        self.status_code = status_code
+        self.reason = reason
+        self.headers = headers
+        self.content = content
+        self.encoding = get_encoding_from_headers(headers)
+        self.url = url
+        self.request = request
+        self.ttfb_ns = ttfb_ns
+        self.revalidated = revalidated # A 304 answered from the stored body
+
+    @property
+    def ok(self):
+        return self.status_code < 400
+
+    @property
+    def text(self):
+        return self.content.decode(self.encoding or "utf-8", errors="replace")
+
+    def json(self, **kwargs):
+        return jsonlib.loads(self.content, **kwargs)
+
+    def raise_for_status(self):
+        if 400 <= self.status_code < 600:
+            kind = "Client" if self.status_code < 500 else "Server"
+            raise HTTPError(f"{self.status_code} {kind} Error: {self.reason} for url: {self.url}", response=self)
+
+class AsyncSession:
+    """
+    The asyncio counterpart of a registry session, `self.async_session` in API classes; bound to one event loop.
+    An aiohttp connector keeps up to `async_connections` (pool config) keep-alive connections open, and a semaphore
+    lets at most `async_limit` requests be in flight, so a fan-out of thousands of calls queues instead of exhausting
+    sockets or memory. Rate limits, retries and the circuit breaker (apis/Resilience.py), cassettes and conditional
+    GETs while a cached @api_call reloads behave as in PooledAdapter, whose validators it shares.
+    Errors are raised as the requests exceptions, so API calls handle both paths alike.
+    """
+    def __init__(self, loop, headers, auth, pool_config: dict, resilience=None, cassette=None, validators=None):
+        aiohttp = _import_aiohttp()
+        self.loop = loop
+        self.resilience = resilience
+        self.cassette = cassette
+        self.validators = validators if validators is not None else ValidatorStore()
+        self.limit = pool_config.get("async_limit", DEFAULT_ASYNC_LIMIT)
+        self._semaphore = asyncio.Semaphore(self.limit)
+        self._aiohttp = aiohttp
+        self._connect_timeout_error = getattr(aiohttp, "ConnectionTimeoutError", ()) # aiohttp >= 3.10
+        connector = aiohttp.TCPConnector(limit=pool_config.get("async_connections", DEFAULT_ASYNC_CONNECTIONS), limit_per_host=0)
+        self._client = aiohttp.ClientSession(
+            connector=connector,
+            headers=headers,
+            auth=aiohttp.BasicAuth(auth[0], auth[1] or "") if auth else None,
+        )
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+    def put(self, url, **kwargs):
+        return self.request("PUT", url, **kwargs)
+
+    def patch(self, url, **kwargs):
+        return self.request("PATCH", url, **kwargs)
+
+    def delete(self, url, **kwargs):
+        return self.request("DELETE", url, **kwargs)
+
+    async def request(self, method, url, params=None, data=None, json=None, headers=None, timeout=None) -> AsyncResponse:
+        """Sends the request and reads the whole body; `timeout` (seconds) bounds the complete exchange."""
+        method = method.upper()
+        headers = dict(headers or {})
+        if params:
+            url += ("&" if urlsplit(url).query else "?") + urlencode(params, doseq=True)
+        if json is not None:
+            data = jsonlib.dumps(json).encode()
+            headers.setdefault("Content-Type", "application/json")
+        elif isinstance(data, dict):
+            data = urlencode(data, doseq=True).encode()
+            headers.setdefault("Content-Type", "application/x-www-form-urlencoded")
+        elif isinstance(data, str):
+            data = data.encode()
+        request = AsyncRequest(method, url, headers, data)
+        async with self._semaphore:
+            if self.resilience is None or (self.cassette is not None and self.cassette.replaying):
+                return await self._send_measured(request, timeout)
+            return await self._send_resilient(request, timeout)
+
+    async def close(self):
+        await self._client.close()
+
+    def close_soon(self):
+        """Closes the session on its own loop from any thread; skipped once that loop stopped (it took the sockets along)."""
+        loop = self.loop
+        if loop.is_closed() or not loop.is_running():
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            loop.create_task(self.close())
+        else:
+            asyncio.run_coroutine_threadsafe(self.close(), loop)
+
+    async def _send_resilient(self, request, timeout):
+        resilience = self.resilience
+        endpoint = urlsplit(request.url).netloc
+        breaker = resilience.breaker(endpoint)
+        limiter = resilience.limiter
+        attempt = 0
+        while True:
+            breaker.before_request(endpoint)
+            wait = limiter.reserve() # Shared with the threaded session of the same tenant
+            if wait:
+                await asyncio.sleep(wait)
+            try:
+                response = await self._send_measured(request, timeout)
+            except (ConnectionError, Timeout) as e:
+                delay = resilience.error_delay(request, attempt, e, breaker)
+                if delay is None:
+                    raise
+            else:
+                delay = resilience.response_delay(request, attempt, response, breaker)
+                if delay is None:
+                    return response
+            attempt += 1
+            record = call_metrics.task_record.get() if call_metrics.enabled else None
+            if record is not None:
+                record.retries += 1
+            if delay:
+                await asyncio.sleep(delay)
+
+    async def _send_measured(self, request, timeout):
+        response = await self._send(request, timeout)
+        record = call_metrics.task_record.get() if call_metrics.enabled else None
+        if record is not None: # Inside an instrumented async @api_call
+            record.status = 304 if response.revalidated else response.status_code
+            record.ttfb_ns = response.ttfb_ns
+            record.request_bytes += len(request.body) if request.body else 0
+            content_length = response.headers.get("Content-Length")
+            if response.revalidated:
+                pass # Only the 304 went over the wire
+            elif content_length and content_length.isdigit():
+                record.response_bytes += int(content_length)
+            else:
+                record.response_bytes += len(response.content)
+        return response
+
+    async def _send(self, request, timeout):
+        cassette = self.cassette
+        if cassette is None:
+            return await self._send_live(request, timeout)
+        key = request_key(request.method, request.url, request.body)
+        if cassette.replaying:
+            start = perf_counter_ns()
+            recorded = cassette.lookup(key)
+            if recorded is None:
+                raise CassetteMiss(f"No recorded response for {key} in {cassette.path}", request=request)
+            headers = CaseInsensitiveDict(recorded.headers)
+            headers["Content-Length"] = str(len(recorded.body))
+            return AsyncResponse(recorded.status, recorded.reason, headers, bytes(recorded.body), request.url, request, perf_counter_ns() - start)
+        response = await self._send_live(request, timeout)
+        if response.status_code not in UNRECORDED_STATUSES:
+            headers = {name: value for name, value in response.headers.items() if name.lower() not in UNRECORDED_HEADERS}
+            # A short buffered append under the cassette's lock; not worth a round trip through an executor
+            cassette.record(key, response.status_code, response.reason, headers, response.content, response.ttfb_ns / 1e9)
+        return response
+
+    async def _send_live(self, request, timeout):
+        if request.method != "GET" or not revalidation_enabled():
+            return await self._send_http(request, timeout)
+        stored = self.validators.conditions(request.url, request.headers)
+        response = await self._send_http(request, timeout)
+        if response.status_code == 304 and stored is not None:
+            response_cache.record_revalidated()
+            headers = stored.headers.copy()
+            headers.update(response.headers) # 304s may refresh caching headers
+            return AsyncResponse(200, "OK", headers, stored.content, response.url, request, response.ttfb_ns, revalidated=True)
+        if has_validators(response):
+            self.validators.store(request.url, response.headers, response.content, response.encoding)
+        return response
+
+    async def _send_http(self, request, timeout):
+        aiohttp = self._aiohttp
+        options = {} if timeout is None else {"timeout": aiohttp.ClientTimeout(total=timeout)}
+        start = perf_counter_ns()
+        try:
+            async with self._client.request(request.method, request.url, data=request.body, headers=request.headers, **options) as response:
+                ttfb_ns = perf_counter_ns() - start # The headers are in; the body is read next
+                content = await response.read()
+                return AsyncResponse(
+                    response.status, response.reason or "", CaseInsensitiveDict(response.headers.items()), content,
+                    str(response.url), request, ttfb_ns,
+                )
+        except asyncio.TimeoutError as e: # aiohttp's timeouts subclass it
+            error = ConnectTimeout if isinstance(e, self._connect_timeout_error) else Timeout
+            raise error(f"{request.method} {request.url} timed out", request=request) from e
+        except aiohttp.ClientError as e:
+            raise ConnectionError(f"{request.method} {request.url}: {e or type(e).__name__}", request=request) from e
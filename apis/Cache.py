@@ -0,0 +1,224 @@
+import sys, json, time, threading, contextlib, contextvars
+from collections import OrderedDict
+from concurrent.futures import Future
+
+DEFAULT_MAX_ENTRIES = 1024
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+class LruStore:
+    """OrderedDict-backed LRU bounded by entry count and by the summed size of its values."""
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.evictions = 0
+        self._items = OrderedDict() # key -> (value, size)
+
+    def __len__(self):
+        return len(self._items)
+
+    def keys(self):
+        return list(self._items)
+
+    def get(self, key):
+        item = self._items.get(key)
+        if item is None:
+            return None
+        self._items.move_to_end(key)
+        return item[0]
+
+    def put(self, key, value, size: int):
+        self.pop(key)
+        if size > self.max_bytes:
+            return # Would evict everything else and still not fit
+        self._items[key] = (value, size)
+        self.bytes += size
+        while len(self._items) > self.max_entries or self.bytes > self.max_bytes:
+            _, (_, evicted_size) = self._items.popitem(last=False)
+            self.bytes -= evicted_size
+            self.evictions += 1
+
+    def pop(self, key):
+        item = self._items.pop(key, None)
+        if item is not None:
+            self.bytes -= item[1]
+        return item
+
+    def clear(self):
+        self._items.clear()
+        self.bytes = 0
+
+class _Entry:
+    __slots__ = ("value", "expires_at")
+    def __init__(self, value, expires_at):
+        self.value = value
+        self.expires_at = expires_at
+
+# Context variables rather than thread-locals: per thread for threaded calls, per task for async ones
+_revalidation = contextvars.ContextVar("ae_revalidation", default=False)
+_bypass = contextvars.ContextVar("ae_bypass_cache", default=False)
+
+@contextlib.contextmanager
+def bypass_cache():
+    """Within this block cached @api_calls on the current thread (or asyncio task) always go to the network."""
+    token = _bypass.set(True)
+    try:
+        yield
+    finally:
+        _bypass.reset(token)
+
+def revalidation_enabled() -> bool:
+    """True while a cached @api_call is (re)loading, so its GETs may be sent as conditional requests."""
+    return _revalidation.get()
+
+class ResponseCache:
+    """
+    TTL + LRU cache for @api_call results with single-flight loading:
+    concurrent callers asking for the same key while it loads wait for that one call instead of issuing their own.
+    Cached values are shared between callers and must be treated as read-only.
+    """
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, max_bytes=DEFAULT_MAX_BYTES):
+        self._lock = threading.Lock()
+        self._store = LruStore(max_entries, max_bytes)
+        self._inflight = {} # key -> Future of the load in progress
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.revalidated = 0 # Reloads answered with 304 Not Modified
+
+    def configure(self, cache_config: dict):
+        with self._lock:
+            self._store.max_entries = cache_config.get("max_entries", DEFAULT_MAX_ENTRIES)
+            self._store.max_bytes = cache_config.get("max_bytes", DEFAULT_MAX_BYTES)
+            self._store.clear()
+
+    def get_or_load(self, key, ttl: float, loader):
+        if _bypass.get():
+            return loader()
+        entry, future, owner = self._lookup(key)
+        if entry is not None:
+            return entry.value
+        if not owner:
+            return future.result()
+        token = _revalidation.set(True)
+        try:
+            value = loader()
+        except BaseException as e:
+            self._fail(key, future, e)
+            raise
+        finally:
+            _revalidation.reset(token)
+        self._complete(key, future, ttl, value)
+        return value
+
+    async def get_or_load_async(self, key, ttl: float, loader):
+        """get_or_load() for async @api_calls: `loader` returns a coroutine, and callers waiting on a load await it."""
+        if _bypass.get():
+            return await loader()
+        entry, future, owner = self._lookup(key)
+        if entry is not None:
+            return entry.value
+        if not owner: # The load may be running on another thread or event loop
+            import asyncio # Already loaded by whoever runs this coroutine
+            return await asyncio.wrap_future(future)
+        token = _revalidation.set(True)
+        try:
+            value = await loader()
+        except BaseException as e:
+            self._fail(key, future, e)
+            raise
+        finally:
+            _revalidation.reset(token)
+        self._complete(key, future, ttl, value)
+        return value
+
+    def _lookup(self, key):
+        """(fresh entry or None, future of the load, whether the caller owns the load)."""
+        with self._lock:
+            entry = self._store.get(key)
+            if entry is not None and entry.expires_at > time.monotonic():
+                self.hits += 1
+                return entry, None, False
+            future = self._inflight.get(key)
+            if future is None:
+                future = self._inflight[key] = Future()
+                self.misses += 1
+                return None, future, True
+            self.coalesced += 1
+            return None, future, False
+
+    def _fail(self, key, future, error):
+        with self._lock:
+            del self._inflight[key]
+        future.set_exception(error)
+
+    def _complete(self, key, future, ttl, value):
+        size = estimate_size(value) if value is not None else 0 # Serializes the value; never under the lock every lookup takes
+        with self._lock:
+            del self._inflight[key]
+            if value is not None: # None is how API calls report failures; don't pin those
+                self._store.put(key, _Entry(value, time.monotonic() + ttl), size)
+        future.set_result(value)
+
+    def record_revalidated(self):
+        with self._lock:
+            self.revalidated += 1
+
+    def invalidate(self, predicate=None):
+        """Drops every entry, or those whose key matches predicate(key)."""
+        with self._lock:
+            if predicate is None:
+                self._store.clear()
+                return
+            for key in [key for key in self._store.keys() if predicate(key)]:
+                self._store.pop(key)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses + self.coalesced
+            return {
+                "entries": len(self._store),
+                "bytes": self._store.bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "revalidated": self.revalidated,
+                "evictions": self._store.evictions,
+                "hit_ratio": round((self.hits + self.coalesced) / lookups, 4) if lookups else 0.0,
+            }
+
+    def reset_stats(self):
+        with self._lock:
+            self.hits = self.misses = self.coalesced = self.revalidated = 0
+            self._store.evictions = 0
+
+def make_key(api_instance, call_name: str, args, kwargs, signature=None):
+    """
+    Cache key: API, environment, tenant, call and its arguments. With the call's inspect.Signature the arguments are
+    keyed by parameter name with defaults filled in, so f("x"), f(key_path="x") and f("x", select=None) share an entry.
+    """
+    if signature is not None:
+        try:
+            bound = signature.bind(api_instance, *args, **kwargs)
+        except TypeError:
+            pass # Arguments the call doesn't accept; it raises when invoked
+        else:
+            bound.apply_defaults()
+            args, kwargs = (), dict(list(bound.arguments.items())[1:]) # Without self
+    try:
+        arguments = (args, tuple(sorted(kwargs.items())))
+        hash(arguments)
+    except TypeError: # Unhashable arguments (dicts, lists): fall back to their JSON form
+        arguments = json.dumps([args, kwargs], sort_keys=True, default=repr)
+    return (getattr(api_instance, "_api_class_name", None), getattr(api_instance, "environment", None),
+            getattr(api_instance, "tenant", None), call_name, arguments)
+
+def estimate_size(value) -> int:
+    if isinstance(value, (bytes, str)):
+        return len(value)
+    try:
+        return len(json.dumps(value, default=repr))
+    except (TypeError, ValueError):
+        return sys.getsizeof(value)
+
+response_cache = ResponseCache()
@@ -0,0 +1,237 @@
+import os, re, json, mmap, time, atexit, struct, hashlib, threading
+from urllib.parse import urlsplit, parse_qsl, urlencode
+
+MODES = ("live", "record", "replay")
+DEFAULT_CASSETTE_DIR = os.path.join("~", ".ae", "cassettes")
+INDEX_VERSION = 1
+_ENTRY_HEADER = struct.Struct("<II") # Length of the JSON header, length of the body
+_UNSAFE_NAME = re.compile(r"[^A-Za-z0-9._-]")
+
+def request_key(method, url, body=None):
+    """
+    What a recorded exchange is looked up by: method, path and sorted query, and a hash of the body. The host is
+    left out so a cassette replays against any base URL, stand-in servers included.
+    """
+    parts = urlsplit(url)
+    key = f"{method.upper()} {parts.path or '/'}"
+    if parts.query:
+        key += "?" + urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    if body:
+        key += " " + hashlib.sha1(body.encode() if isinstance(body, str) else body).hexdigest()[:16]
+    return key
+
+class RecordedResponse:
+    __slots__ = ("status", "reason", "headers", "body", "elapsed")
+    def __init__(self, status, reason, headers, body, elapsed):
+        self.status = status
+        self.reason = reason
+        self.headers = headers
+        self.body = body
+        self.elapsed = elapsed # Seconds to the response headers when it was recorded
+
+class Cassette:
+    """
+    Recorded exchanges of one API/environment/tenant. The data file is append-only: per exchange a fixed-size length
+    prefix, a JSON header (key, status, headers, timing) and the raw body. A sidecar index (<file>.idx) maps each key to
+    the offsets of its responses, so replay maps the file into memory and reads only the bodies asked for.
+    A key recorded several times replays its responses in order and then keeps returning the last one; recording a key
+    again in a later session replaces its earlier responses.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.index_path = path + ".idx"
+        self.replaying = False
+        self._lock = threading.Lock()
+        self._index = {} # key -> [(header offset, header length, body length), ...]
+        self._size = 0 # Bytes of the data file covered by the index
+        self._mmap = None
+        self._file = None # Append handle while recording
+        self._replaced = set() # Keys re-recorded in this session
+        self._positions = {} # key -> responses already replayed
+        self._dirty = False
+
+    @property
+    def keys(self):
+        return list(self._index)
+
+    def open_for_replay(self):
+        with self._lock:
+            self.replaying = True
+            self._load_index()
+            if self._size:
+                with open(self.path, 'rb') as f:
+                    self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) # Stays valid after the file closes
+        return self
+
+    def open_for_record(self):
+        with self._lock:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._load_index()
+            self._file = open(self.path, 'ab')
+            if self._file.tell() != self._size: # Bytes past the index (an interrupted session) are dropped
+                self._file.truncate(self._size)
+                self._file.seek(self._size)
+        return self
+
+    def lookup(self, key):
+        """The next recorded response for key, or None."""
+        with self._lock:
+            entries = self._index.get(key)
+            if not entries:
+                return None
+            position = self._positions.get(key, 0)
+            self._positions[key] = position + 1
+            offset, header_length, body_length = entries[min(position, len(entries) - 1)]
+        data = self._mmap
+        header = json.loads(data[offset:offset + header_length])
+        body_offset = offset + header_length
+        return RecordedResponse(
+            header["status"], header.get("reason", ""), header.get("headers", {}),
+            data[body_offset:body_offset + body_length], header.get("elapsed", 0.0),
+        )
+
+    def record(self, key, status, reason, headers, body, elapsed):
+        header = json.dumps({"key": key, "status": status, "reason": reason, "headers": headers,
+                             "elapsed": round(elapsed, 6), "recorded_at": time.time()}).encode()
+        with self._lock:
+            if self._file is None:
+                raise ValueError(f"Cassette {self.path} isn't open for recording")
+            if key not in self._replaced:
+                self._replaced.add(key)
+                self._index[key] = []
+            offset = self._size + _ENTRY_HEADER.size
+            self._file.write(_ENTRY_HEADER.pack(len(header), len(body)))
+            self._file.write(header)
+            self._file.write(body)
+            self._index[key].append((offset, len(header), len(body)))
+            self._size = offset + len(header) + len(body)
+            self._dirty = True
+
+    def flush(self):
+        """Makes everything recorded so far replayable: the data is flushed and the index rewritten."""
+        with self._lock:
+            if self._file is None or not self._dirty:
+                return
+            self._file.flush()
+            tmp_path = self.index_path + ".tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump({"version": INDEX_VERSION, "size": self._size, "entries": self._index}, f)
+            os.replace(tmp_path, self.index_path)
+            self._dirty = False
+
+    def close(self):
+        self.flush()
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            if self._mmap is not None:
+                self._mmap.close()
+                self._mmap = None
+
+    def _load_index(self):
+        try:
+            data_size = os.path.getsize(self.path)
+        except OSError:
+            self._index, self._size = {}, 0
+            return
+        try:
+            with open(self.index_path, 'r') as f:
+                index = json.load(f)
+            if index.get("version") == INDEX_VERSION and index.get("size") <= data_size:
+                self._index = {key: [tuple(entry) for entry in entries] for key, entries in index["entries"].items()}
+                self._size = index["size"]
+                return
+        except (OSError, ValueError, AttributeError, TypeError):
+            pass
+        self._rebuild_index(data_size)
+
+    def _rebuild_index(self, data_size):
+        """Scans the entry headers (bodies are skipped) when the index is missing or from another version."""
+        index, offset = {}, 0
+        with open(self.path, 'rb') as f:
+            while offset + _ENTRY_HEADER.size <= data_size:
+                f.seek(offset)
+                header_length, body_length = _ENTRY_HEADER.unpack(f.read(_ENTRY_HEADER.size))
+                end = offset + _ENTRY_HEADER.size + header_length + body_length
+                if end > data_size:
+                    break # Partly written last entry
+                try:
+                    key = json.loads(f.read(header_length))["key"]
+                except (ValueError, KeyError):
+                    break
+                index.setdefault(key, []).append((offset + _ENTRY_HEADER.size, header_length, body_length))
+                offset = end
+        self._index, self._size = index, offset
+        self._dirty = True # Written back on the next flush
+
+def open_cassettes(paths):
+    """Cassettes to replay from files and folders (searched recursively for *.cassette), in the order given."""
+    cassettes = []
+    for path in paths:
+        path = os.path.expanduser(path)
+        if os.path.isdir(path):
+            for folder, _, files in sorted(os.walk(path)):
+                cassettes.extend(Cassette(os.path.join(folder, name)).open_for_replay() for name in sorted(files) if name.endswith(".cassette"))
+        elif os.path.isfile(path):
+            cassettes.append(Cassette(path).open_for_replay())
+        else:
+            raise FileNotFoundError(f"No cassette at {path}")
+    return cassettes
+
+class CassetteLibrary:
+    """
+    The "transport" section of config.json: `mode` live (default), record or replay, and `path`, the folder holding
+    one cassette per API/environment/tenant (<path>/<api>/<environment>/<tenant>.cassette).
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.mode = "live"
+        self.path = os.path.expanduser(DEFAULT_CASSETTE_DIR)
+        self._cassettes = {} # (api, environment, tenant) -> Cassette
+
+    def configure(self, transport_config: dict):
+        mode = transport_config.get("mode", "live")
+        if mode not in MODES:
+            raise ValueError(f"transport.mode must be one of {', '.join(MODES)}, not '{mode}'")
+        path = os.path.abspath(os.path.expanduser(transport_config.get("path") or DEFAULT_CASSETTE_DIR))
+        if (mode, path) != (self.mode, self.path):
+            self.close()
+        self.mode = mode
+        self.path = path
+
+    def cassette_path(self, api_name, environment=None, tenant=None):
+        parts = [_UNSAFE_NAME.sub("_", str(part)) if part else "_" for part in (api_name, environment, tenant)]
+        return os.path.join(self.path, parts[0], parts[1], parts[2] + ".cassette")
+
+    def cassette(self, api_name, environment=None, tenant=None):
+        """The open cassette of a session, or None in live mode."""
+        if self.mode == "live":
+            return None
+        key = (api_name, environment, tenant)
+        with self._lock:
+            cassette = self._cassettes.get(key)
+            if cassette is None:
+                cassette = Cassette(self.cassette_path(api_name, environment, tenant))
+                if self.mode == "replay":
+                    cassette.open_for_replay()
+                else:
+                    cassette.open_for_record()
+                self._cassettes[key] = cassette
+        return cassette
+
+    def flush(self):
+        with self._lock:
+            cassettes = list(self._cassettes.values())
+        for cassette in cassettes:
+            cassette.flush()
+
+    def close(self):
+        with self._lock:
+            cassettes = list(self._cassettes.values())
+            self._cassettes.clear()
+        for cassette in cassettes:
+            cassette.close()
+
+cassette_library = CassetteLibrary()
+atexit.register(cassette_library.close) # Recorded exchanges get their index even when nobody calls close()
@@ -1,58 +1,116 @@
-import requests, json
-from apis.Utils  import api_call, api_class
-
-@api_class(api_name="ExampleAPI")
-class ExampleAPI():
-
-    def __init__(self):
-        self.base_url = "http://localhost:5000"
-
-
-
-    @api_call
-    def call_get_data(self, key_path=None):
-        try:
-            if key_path:
-                url = f"{self.base_url}/data/{key_path}"
-            else:
-                url = f"{self.base_url}/data"
-            response = requests.get(url)
-            response.raise_for_status() # Raise an exception for HTTP errors (4xx or 5xx)
-            data = response.json()
-            print(f"Status Code: {response.status_code}")
-            print(f"Response Data: {json.dumps(data, indent=2)}")
-            return data
-        except requests.exceptions.RequestException as e:
-            print(f"Error fetching all data: {e}")
-            if hasattr(e, 'response') and e.response is not None:
-                print(f"Response Content: {e.response.text}")
-            return None
-        
-
-@api_class(api_name="APIleDugma")
-class DugmaAPI():
-
-    def __init__(self):
-        self.base_url = "http://localhost:5000"
-
-
-
-    @api_call
-    def call_tavi_akol(self, key_path=None):
-        try:
-            if key_path:
-                url = f"{self.base_url}/data/{key_path}"
-            else:
-                url = f"{self.base_url}/data"
-            response = requests.get(url)
-            response.raise_for_status() # Raise an exception for HTTP errors (4xx or 5xx)
-            data = response.json()
-            print(f"Status Code: {response.status_code}")
-            print(f"Response Data: {json.dumps(data, indent=2)}")
-            return data
-        except requests.exceptions.RequestException as e:
-            print(f"Error fetching all data: {e}")
-            if hasattr(e, 'response') and e.response is not None:
-                print(f"Response Content: {e.response.text}")
-            return None
-        
+import requests
+from apis.Utils  import api_call, api_class, gather_bounded, report_progress
+from apis.Streaming import load_json_stream, response_chunks, json_preview
+
+@api_class(api_name="ExampleAPI")
+class ExampleAPI():
+
+    def __init__(self):
+        self.base_url = "http://localhost:5000"
+
+
+
+    @api_call(cache_ttl=30) # Read-only endpoint; repeated lookups within 30s share one request
+    def call_get_data(self, key_path=None, select=None):
+        try:
+            if key_path:
+                url = f"{self.base_url}/data/{key_path}"
+            else:
+                url = f"{self.base_url}/data"
+            # Pooled keep-alive session for the bound environment/tenant; the body is parsed as it arrives
+            with self.session.get(url, stream=True) as response:
+                response.raise_for_status() # Raise an exception for HTTP errors (4xx or 5xx)
+                print(f"Status Code: {response.status_code}")
+                data = load_json_stream(response_chunks(response), select) # Only the `select` sub-tree (e.g. "items/0") is kept
+            if data is None and select:
+                print(f"Nothing at '{select}' in the response")
+            print(f"Response Data: {json_preview(data)}")
+            return data
+        except requests.exceptions.RequestException as e:
+            print(f"Error fetching all data: {e}")
+            if hasattr(e, 'response') and e.response is not None:
+                print(f"Response Content: {e.response.text}")
+            return None
+        except ValueError as e:
+            print(f"Invalid JSON in response: {e}")
+            return None
+
+    @api_call(cache_ttl=30)
+    async def call_get_data_async(self, key_path=None):
+        """call_get_data on the asyncio path: awaited on the event loop instead of holding a worker thread."""
+        try:
+            if key_path:
+                url = f"{self.base_url}/data/{key_path}"
+            else:
+                url = f"{self.base_url}/data"
+            response = await self.async_session.get(url) # Pooled aiohttp session for the bound environment/tenant
+            response.raise_for_status()
+            data = response.json()
+            print(f"Status Code: {response.status_code}")
+            print(f"Response Data: {json_preview(data)}")
+            return data
+        except requests.exceptions.RequestException as e:
+            print(f"Error fetching all data: {e}")
+            if hasattr(e, 'response') and e.response is not None:
+                print(f"Response Content: {e.response.text}")
+            return None
+        except ValueError as e:
+            print(f"Invalid JSON in response: {e}")
+            return None
+
+    @api_call
+    async def call_poll_key_paths(self, key_paths=None, limit=1000):
+        """Fetches many key paths at once (a list or comma-separated), at most `limit` requests in flight."""
+        if isinstance(key_paths, str):
+            key_paths = [key_path for key_path in key_paths.split(",") if key_path]
+        key_paths = list(key_paths or [])
+        session = self.async_session
+        done = 0
+
+        async def fetch(key_path):
+            nonlocal done
+            response = await session.get(f"{self.base_url}/data/{key_path}")
+            response.raise_for_status()
+            done += 1
+            if done % 1000 == 0:
+                report_progress(f"{done}/{len(key_paths)} key paths")
+            return response.json()
+
+        results = await gather_bounded((fetch(key_path) for key_path in key_paths), int(limit))
+        failed = [key_path for key_path, result in zip(key_paths, results) if isinstance(result, Exception)]
+        print(f"Fetched {len(key_paths) - len(failed)}/{len(key_paths)} key paths")
+        if failed:
+            print(f"First failure: {failed[0]}: {results[key_paths.index(failed[0])]}")
+        if key_paths and len(failed) == len(key_paths):
+            return None
+        # Failed key paths map to None
+        return {key_path: None if isinstance(result, Exception) else result for key_path, result in zip(key_paths, results)}
+        
+
+@api_class(api_name="APIleDugma")
+class DugmaAPI():
+
+    def __init__(self):
+        self.base_url = "http://localhost:5000"
+
+
+
+    @api_call
+    def call_tavi_akol(self, key_path=None):
+        try:
+            if key_path:
+                url = f"{self.base_url}/data/{key_path}"
+            else:
+                url = f"{self.base_url}/data"
+            response = self.session.get(url) # Pooled keep-alive session for the bound environment/tenant
+            response.raise_for_status() # Raise an exception for HTTP errors (4xx or 5xx)
+            data = response.json()
+            print(f"Status Code: {response.status_code}")
+            print(f"Response Data: {json_preview(data)}")
+            return data
+        except requests.exceptions.RequestException as e:
+            print(f"Error fetching all data: {e}")
+            if hasattr(e, 'response') and e.response is not None:
+                print(f"Response Content: {e.response.text}")
+            return None
+        
@@ -0,0 +1,523 @@
+import os, re, math, time, heapq, queue, atexit, hashlib, threading, contextvars
+from datetime import datetime
+from fnmatch import fnmatchcase
+from itertools import islice
+from apis.Metrics import LatencyHistogram, _bucket_index
+
+DEFAULT_HISTORY_PATH = os.path.join(os.path.expanduser("~"), ".ae", "history.sqlite3")
+DEFAULT_FLUSH_INTERVAL_MS = 500
+DEFAULT_BATCH_SIZE = 2000
+SCHEMA_VERSION = 1
+DIGEST_MAX_VALUES = 1024 # Values hashed per result; past that only container sizes count
+DIGEST_MAX_CHARS = 65536 # Characters hashed per string or bytes value, besides its length
+HOUR = 3600
+DAY = 86400
+ROLLUP_PERIODS = (DAY, HOUR) # Rollup tiers, largest first
+LABEL_COLUMNS = ("kind", "api", "environment", "tenant", "name")
+RUN_COLUMNS = ("ts", "ok", "http_status", "wall_ms", "ttfb_ms", "request_bytes", "response_bytes", "retries", "digest", "error", "run_id", "node")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS labels (
+    id INTEGER PRIMARY KEY,
+    kind TEXT NOT NULL, api TEXT NOT NULL, environment TEXT NOT NULL, tenant TEXT NOT NULL, name TEXT NOT NULL,
+    UNIQUE (kind, api, environment, tenant, name)
+);
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    label INTEGER NOT NULL REFERENCES labels (id),
+    ts REAL NOT NULL,
+    ok INTEGER NOT NULL,
+    http_status INTEGER,
+    wall_ms REAL NOT NULL,
+    ttfb_ms REAL,
+    request_bytes INTEGER NOT NULL DEFAULT 0,
+    response_bytes INTEGER NOT NULL DEFAULT 0,
+    retries INTEGER NOT NULL DEFAULT 0,
+    digest TEXT,
+    error TEXT,
+    run_id TEXT,
+    node TEXT
+);
+CREATE INDEX IF NOT EXISTS runs_label_ts ON runs (label, ts);
+CREATE INDEX IF NOT EXISTS runs_ts ON runs (ts);
+CREATE INDEX IF NOT EXISTS runs_run_id ON runs (run_id) WHERE run_id IS NOT NULL;
+CREATE TABLE IF NOT EXISTS rollup (
+    label INTEGER NOT NULL,
+    period INTEGER NOT NULL, -- seconds: one of ROLLUP_PERIODS
+    start INTEGER NOT NULL, -- ts // period
+    bucket INTEGER NOT NULL, -- LatencyHistogram bucket of the wall time
+    count INTEGER NOT NULL,
+    errors INTEGER NOT NULL,
+    total_ns INTEGER NOT NULL,
+    max_ns INTEGER NOT NULL,
+    response_bytes INTEGER NOT NULL,
+    PRIMARY KEY (label, period, start, bucket)
+) WITHOUT ROWID;
+"""
+
+_UPSERT_ROLLUP = """
+INSERT INTO rollup VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (label, period, start, bucket) DO UPDATE SET
+    count = count + excluded.count,
+    errors = errors + excluded.errors,
+    total_ns = total_ns + excluded.total_ns,
+    max_ns = MAX(max_ns, excluded.max_ns),
+    response_bytes = response_bytes + excluded.response_bytes
+"""
+
+def connect(path: str):
+    import sqlite3 # Loaded once history is read or written, not by every process that imports the decorators
+    connection = sqlite3.connect(path, timeout=30) # Matrix workers in other processes write to the same file
+    connection.execute("PRAGMA journal_mode=WAL") # Readers never block the writer and vice versa
+    connection.execute("PRAGMA synchronous=NORMAL") # WAL stays consistent; only the last commits can be lost on power loss
+    return connection
+
+def digest_of(value, max_values=DIGEST_MAX_VALUES):
+    """
+    Short hash of a result, to spot responses that changed between runs. Computed by the writer thread, with bounded
+    work: keys are taken in sorted order and only the first `max_values` values are hashed, plus every container's size.
+    """
+    if value is None:
+        return None
+    sha = hashlib.sha1()
+    try:
+        _feed_digest(sha, value, [max_values])
+    except (RuntimeError, RecursionError, KeyError): # e.g. mutated by another thread while being walked
+        return None
+    return sha.hexdigest()[:16]
+
+def _feed_digest(sha, item, budget):
+    if isinstance(item, dict):
+        sha.update(b"{%d" % len(item))
+        keys = sorted(item, key=str) if len(item) <= budget[0] else islice(item, budget[0]) # Sorting a huge dict isn't bounded
+        for key in keys:
+            if budget[0] <= 0:
+                break
+            sha.update(repr(key).encode())
+            _feed_digest(sha, item[key], budget)
+    elif isinstance(item, (list, tuple)):
+        sha.update(b"[%d" % len(item))
+        for element in item[:budget[0]]:
+            if budget[0] <= 0:
+                break
+            _feed_digest(sha, element, budget)
+    else:
+        budget[0] -= 1
+        if isinstance(item, (bytes, bytearray)):
+            sha.update(b"b%d:" % len(item))
+            sha.update(item[:DIGEST_MAX_CHARS])
+        elif isinstance(item, str):
+            sha.update(b"s%d:" % len(item))
+            sha.update(item[:DIGEST_MAX_CHARS].encode(errors="replace"))
+        else:
+            sha.update(repr(item).encode())
+
+class HistoryStats:
+    """Aggregate of the runs of one label group, built from rollup buckets plus the raw rows at the range edges."""
+    __slots__ = ("count", "errors", "wall", "response_bytes")
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.wall = LatencyHistogram()
+        self.response_bytes = 0
+
+    def add_bucket(self, bucket, count, errors, total_ns, max_ns, response_bytes):
+        self.count += count
+        self.errors += errors
+        self.response_bytes += response_bytes
+        wall = self.wall
+        wall.buckets[bucket] = wall.buckets.get(bucket, 0) + count
+        wall.count += count
+        wall.total_ns += total_ns
+        wall.max_ns = max(wall.max_ns, max_ns)
+
+    def to_dict(self):
+        wall = self.wall
+        to_ms = lambda value_ns: round(value_ns / 1e6, 3)
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "mean_ms": to_ms(wall.total_ns / wall.count) if wall.count else 0.0,
+            **{f"p{percentile}_ms": to_ms(wall.percentile_ns(percentile)) for percentile in (50, 90, 95, 99)},
+            "max_ms": to_ms(wall.max_ns),
+            "response_bytes": self.response_bytes,
+        }
+
+class RunHistory:
+    """
+    Persistent history of every API call and blueprint run, in SQLite (WAL mode).
+    record_*() only queue a tuple; a writer thread commits them in batches, alongside daily and hourly latency
+    histograms per label set (the rollup table) that keep queries over long ranges independent of the row count.
+    """
+    def __init__(self):
+        self.enabled = False
+        self.path = None
+        # run_id/node of the blueprint node running on this thread (or asyncio task), and whether recording is suppressed
+        self._context = contextvars.ContextVar("ae_history_context", default=(None, None))
+        self._suppressed = contextvars.ContextVar("ae_history_suppressed", default=False)
+        self._queue = queue.SimpleQueue()
+        self._writer = None
+        self._flush_interval = DEFAULT_FLUSH_INTERVAL_MS / 1000
+        self._batch_size = DEFAULT_BATCH_SIZE
+        self._retention_days = None
+        self._lock = threading.Lock()
+
+    def configure(self, history_config: dict):
+        """Applies the "history" section of config.json; the file is created on first use."""
+        path = os.path.abspath(os.path.expanduser(history_config.get("path") or DEFAULT_HISTORY_PATH))
+        enabled = history_config.get("enabled", True)
+        with self._lock:
+            if self._writer is not None and (not enabled or path != self.path):
+                self._stop_writer()
+            self.enabled = enabled
+            self.path = path
+            self._flush_interval = history_config.get("flush_interval_ms", DEFAULT_FLUSH_INTERVAL_MS) / 1000
+            self._batch_size = history_config.get("batch_size", DEFAULT_BATCH_SIZE)
+            self._retention_days = history_config.get("retention_days")
+            if enabled and self._writer is None:
+                import sqlite3
+                try:
+                    self._start_writer()
+                except (OSError, sqlite3.Error) as e:
+                    print(f"Run history disabled: can't open {path}: {e}") # Calls must keep working without it
+                    self.enabled = False
+
+    def set_context(self, run_id, node_id):
+        """Tags the calls made on this thread with a blueprint run and node; returns the previous (run_id, node_id)."""
+        previous = self._context.get()
+        self._context.set((run_id, node_id))
+        return previous
+
+    def set_suppressed(self, suppressed: bool) -> bool:
+        """Stops recording the calls made on this thread (e.g. bench load); returns the previous setting."""
+        previous = self._suppressed.get()
+        self._suppressed.set(suppressed)
+        return previous
+
+    def record_call(self, api_name, environment, tenant, call_name, wall_ns, error, record, result):
+        """Called by @api_call for every call; `error` is the exception raised, True for a None result, or False."""
+        if self._suppressed.get():
+            return
+        run_id, node_id = self._context.get()
+        # The writer digests the result; that walk is bounded, so results are released within a flush interval or so.
+        # Errors are queued as text, which doesn't keep their traceback's frames alive.
+        self._queue.put(("call", api_name, environment, tenant, call_name, time.time(), wall_ns, _error_text(error), record,
+                         result, run_id, node_id))
+
+    def record_run(self, api_name, environment, tenant, name, wall_ns, error, outputs, run_id):
+        """Records a whole blueprint run; its calls carry the same run_id."""
+        self._queue.put(("blueprint", api_name, environment, tenant, name, time.time(), wall_ns, _error_text(error), None,
+                         outputs, run_id, None))
+
+    def flush(self, timeout=10.0) -> bool:
+        """Waits until everything queued so far is committed."""
+        writer = self._writer
+        if writer is None or not writer.is_alive():
+            return True
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def close(self):
+        with self._lock:
+            if self._writer is not None:
+                self._stop_writer()
+
+    def _start_writer(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        connection = connect(self.path) # Schema set up here so queries work before the first write
+        try:
+            with connection:
+                connection.executescript(_SCHEMA)
+                connection.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+                if self._retention_days:
+                    # Raw rows and hourly rollups expire; daily rollups are small and kept for long-range queries
+                    cutoff = time.time() - self._retention_days * DAY
+                    connection.execute("DELETE FROM runs WHERE ts < ?", (cutoff,))
+                    connection.execute("DELETE FROM rollup WHERE period = ? AND start < ?", (HOUR, int(cutoff // HOUR)))
+        finally:
+            connection.close()
+        self._writer = threading.Thread(target=self._write_loop, args=(self.path,), name="ae-history", daemon=True)
+        self._writer.start()
+
+    def _stop_writer(self):
+        self._queue.put(None)
+        self._writer.join(timeout=10)
+        self._writer = None
+
+    def _write_loop(self, path):
+        import sqlite3
+        connection = connect(path) # sqlite3 connections belong to the thread that opened them
+        label_ids = {}
+        stopping = False
+        while not stopping:
+            try:
+                first = self._queue.get(timeout=self._flush_interval)
+            except queue.Empty:
+                continue
+            batch, waiters = [], []
+            item = first
+            while True:
+                if item is None:
+                    stopping = True
+                elif isinstance(item, threading.Event):
+                    waiters.append(item)
+                else:
+                    batch.append(item)
+                if stopping or len(batch) >= self._batch_size:
+                    break
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+            if batch:
+                try:
+                    self._write_batch(connection, batch, label_ids)
+                except sqlite3.Error as e:
+                    print(f"Run history: dropped {len(batch)} record(s): {e}")
+                    label_ids.clear() # The transaction was rolled back, new labels may not exist
+            for waiter in waiters:
+                waiter.set()
+        connection.close()
+
+    def _write_batch(self, connection, batch, label_ids):
+        rows, rollup = [], {}
+        for kind, api_name, environment, tenant, name, ts, wall_ns, error, record, result, run_id, node_id in batch:
+            labels = (kind, api_name or "", environment or "", tenant or "", name)
+            label_id = label_ids.get(labels)
+            if label_id is None:
+                connection.execute("INSERT OR IGNORE INTO labels (kind, api, environment, tenant, name) VALUES (?, ?, ?, ?, ?)", labels)
+                label_id = label_ids[labels] = connection.execute(
+                    "SELECT id FROM labels WHERE kind = ? AND api = ? AND environment = ? AND tenant = ? AND name = ?", labels
+                ).fetchone()[0]
+            failed = error is not False
+            error_text = error if failed else None
+            status = ttfb_ms = None
+            request_bytes = response_bytes = retries = 0
+            if record is not None:
+                status = record.status
+                ttfb_ms = record.ttfb_ns / 1e6 if record.ttfb_ns is not None else None
+                request_bytes, response_bytes, retries = record.request_bytes, record.response_bytes, record.retries
+            rows.append((label_id, ts, not failed, status, wall_ns / 1e6, ttfb_ms, request_bytes, response_bytes, retries,
+                         digest_of(result), error_text, run_id, node_id))
+            bucket = _bucket_index(wall_ns)
+            for period in ROLLUP_PERIODS:
+                key = (label_id, period, int(ts // period), bucket)
+                counts = rollup.get(key)
+                if counts is None:
+                    counts = rollup[key] = [0, 0, 0, 0, 0]
+                counts[0] += 1
+                counts[1] += failed
+                counts[2] += wall_ns
+                counts[3] = max(counts[3], wall_ns)
+                counts[4] += response_bytes
+        with connection:
+            connection.executemany(f"INSERT INTO runs (label, {', '.join(RUN_COLUMNS)}) VALUES ({', '.join('?' * 13)})", rows)
+            connection.executemany(_UPSERT_ROLLUP, [(*key, *counts) for key, counts in rollup.items()])
+
+    # Queries: each opens its own read connection, so they never wait on the writer
+
+    def _read(self):
+        if not self.path or not os.path.exists(self.path):
+            raise FileNotFoundError(f"No run history at {self.path}")
+        self.flush() # Include what this process queued so far
+        return connect(self.path)
+
+    def _matching_labels(self, connection, filters):
+        """label id -> labels dict for the label sets matching `filters` (values may be fnmatch patterns)."""
+        matches = {}
+        for row in connection.execute(f"SELECT id, {', '.join(LABEL_COLUMNS)} FROM labels"):
+            labels = dict(zip(LABEL_COLUMNS, row[1:]))
+            if all(fnmatchcase(labels[column], str(pattern)) for column, pattern in filters.items() if pattern is not None):
+                matches[row[0]] = labels
+        return matches
+
+    def recent(self, limit=20, run_id=None, since=None, until=None, **filters):
+        """Newest runs first, as dicts."""
+        connection = self._read()
+        try:
+            labels = self._matching_labels(connection, filters)
+            if not labels:
+                return []
+            where, params = _range_clause(since, until)
+            select = f"SELECT id, label, {', '.join(RUN_COLUMNS)} FROM runs"
+            filtered = len(labels) < connection.execute("SELECT COUNT(*) FROM labels").fetchone()[0]
+            if filtered and run_id is None:
+                # Newest rows of each label come straight off the (label, ts) index; merge them by time
+                sql = f"{select} WHERE {' AND '.join(['label = ?', *where])} ORDER BY ts DESC LIMIT ?"
+                per_label = [connection.execute(sql, (label_id, *params, limit)).fetchall() for label_id in labels]
+                rows = list(heapq.merge(*per_label, key=lambda row: row[2], reverse=True))[:limit]
+            else:
+                if filtered:
+                    where.append(f"label IN ({', '.join('?' * len(labels))})")
+                    params.extend(labels)
+                if run_id is not None:
+                    where.append("run_id = ?")
+                    params.append(str(run_id))
+                sql = select + (" WHERE " + " AND ".join(where) if where else "")
+                rows = connection.execute(sql + " ORDER BY id DESC LIMIT ?", (*params, limit)).fetchall()
+        finally:
+            connection.close()
+        return [{"id": row[0], **labels[row[1]], **dict(zip(RUN_COLUMNS, row[2:]))} for row in rows]
+
+    def stats(self, since=None, until=None, group_by=LABEL_COLUMNS, **filters):
+        """
+        {group labels tuple: HistoryStats} over [since, until). Whole days and hours come from the rollup table and
+        only the partial hours at both ends are read from raw rows, so the cost barely depends on the range or row count.
+        """
+        until = time.time() if until is None else until
+        spans, raw_ranges = _cover(since or 0, until, ROLLUP_PERIODS)
+        connection = self._read()
+        groups = {}
+        try:
+            labels = self._matching_labels(connection, filters)
+            if not labels:
+                return groups
+            label_ids = ", ".join(str(label_id) for label_id in labels) # Integers from the labels table
+            def stats_for(label_id):
+                key = tuple(labels[label_id][column] for column in group_by)
+                group = groups.get(key)
+                if group is None:
+                    group = groups[key] = HistoryStats()
+                return group
+            for period, first, end in spans:
+                for row in connection.execute(
+                    f"SELECT label, bucket, SUM(count), SUM(errors), SUM(total_ns), MAX(max_ns), SUM(response_bytes) FROM rollup "
+                    f"WHERE label IN ({label_ids}) AND period = ? AND start >= ? AND start < ? GROUP BY label, bucket", (period, first, end)
+                ):
+                    stats_for(row[0]).add_bucket(*row[1:])
+            for range_start, range_end in raw_ranges:
+                for label_id, ok, wall_ms, response_bytes in connection.execute(
+                    f"SELECT label, ok, wall_ms, response_bytes FROM runs WHERE label IN ({label_ids}) AND ts >= ? AND ts < ?",
+                    (range_start, range_end),
+                ):
+                    wall_ns = round(wall_ms * 1e6)
+                    stats_for(label_id).add_bucket(_bucket_index(wall_ns), 1, 0 if ok else 1, wall_ns, wall_ns, response_bytes)
+        finally:
+            connection.close()
+        return groups
+
+    def report_lines(self, query: dict):
+        """Shell/CLI output for a parse_history_query() result."""
+        action = query.pop("action")
+        if action == "stats":
+            group_by = query.pop("group_by", LABEL_COLUMNS)
+            groups = self.stats(group_by=group_by, **query)
+            if not groups:
+                return ["No matching runs in the history."]
+            lines = [f"{'/'.join(group_by):<48}{'runs':>8}{'err':>6}{'p50 ms':>10}{'p90 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}{'resp KB':>10}"]
+            for key, group in sorted(groups.items()):
+                summary = group.to_dict()
+                name = "/".join(part or "-" for part in key)
+                lines.append(f"{name:<48}{summary['count']:>8}{summary['errors']:>6}{summary['p50_ms']:>10}{summary['p90_ms']:>10}"
+                             f"{summary['p95_ms']:>10}{summary['p99_ms']:>10}{summary['max_ms']:>10}{summary['response_bytes'] / 1024:>10.1f}")
+            return lines
+        runs = self.recent(**query)
+        if not runs:
+            return ["No matching runs in the history."]
+        lines = []
+        for run in reversed(runs): # Oldest first, like the rest of the output
+            when = datetime.fromtimestamp(run["ts"]).strftime("%Y-%m-%d %H:%M:%S")
+            target = "/".join(run[column] or "-" for column in ("api", "environment", "tenant"))
+            status = "ok" if run["ok"] else f"failed ({run['error']})"
+            http = f" HTTP {run['http_status']}" if run["http_status"] else ""
+            run_tag = f" run {run['run_id']}" + (f"/{run['node']}" if run["node"] else "") if run["run_id"] else ""
+            lines.append(f"{when}  {run['kind']:<9} {run['name']} @ {target}  {status}{http}  {run['wall_ms']:.1f} ms  "
+                         f"{run['response_bytes']} B  {run['digest'] or '-'}{run_tag}")
+        return lines
+
+def _error_text(error):
+    """False for success, otherwise the text stored in the error column."""
+    if error is False:
+        return False
+    if isinstance(error, BaseException):
+        return f"{type(error).__name__}: {error}"
+    if isinstance(error, str):
+        return error
+    return "returned None"
+
+def _cover(start, end, periods):
+    """
+    Splits [start, end) into ([(period, first, end_index)] spans of whole rollup periods, largest tier first,
+    [(start, end)] leftovers to read from raw rows).
+    """
+    if start >= end:
+        return [], []
+    if not periods:
+        return [], [(start, end)]
+    period = periods[0]
+    first, last = math.ceil(start / period), int(end // period)
+    if first >= last:
+        return _cover(start, end, periods[1:])
+    spans, raw_ranges = [(period, first, last)], []
+    for piece_start, piece_end in ((start, first * period), (last * period, end)):
+        piece_spans, piece_raw = _cover(piece_start, piece_end, periods[1:])
+        spans += piece_spans
+        raw_ranges += piece_raw
+    return spans, raw_ranges
+
+def _range_clause(since, until):
+    where, params = [], []
+    if since is not None:
+        where.append("ts >= ?")
+        params.append(since)
+    if until is not None:
+        where.append("ts < ?")
+        params.append(until)
+    return where, params
+
+_DURATION = re.compile(r"(\d+(?:\.\d+)?)([smhdw])")
+_DURATION_SECONDS = {"s": 1, "m": 60, "h": HOUR, "d": 86400, "w": 7 * 86400}
+
+def parse_time(value, now=None) -> float:
+    """`7d`, `12h`, `30m`... ago, a unix timestamp, or an ISO date/time; returns a unix timestamp."""
+    value = str(value)
+    match = _DURATION.fullmatch(value)
+    if match:
+        return (now or time.time()) - float(match.group(1)) * _DURATION_SECONDS[match.group(2)]
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    try:
+        return datetime.fromisoformat(value).timestamp()
+    except ValueError:
+        raise ValueError(f"Can't read '{value}' as a time: use e.g. 7d, 12h, 30m or 2026-01-31") from None
+
+_FILTER_KEYS = {"kind": "kind", "api": "api", "env": "environment", "environment": "environment", "tenant": "tenant", "call": "name", "name": "name"}
+
+def parse_history_query(tokens):
+    """
+    Reads `[stats] [name] [api= env= tenant= kind= since= until= run= limit= by=env,tenant]` shell tokens into
+    keyword arguments for RunHistory.recent()/stats(), plus "action".
+    """
+    tokens = list(tokens)
+    query = {"action": "recent"}
+    if tokens and tokens[0] in ("stats", "recent"):
+        query["action"] = tokens.pop(0)
+    for token in tokens:
+        key, sep, value = token.partition("=")
+        if not sep:
+            if "name" in query:
+                raise ValueError(f"Expected key=value, got '{token}'")
+            query["name"] = token
+        elif key in _FILTER_KEYS:
+            query[_FILTER_KEYS[key]] = value
+        elif key in ("since", "until"):
+            query[key] = parse_time(value)
+        elif key == "run" and query["action"] == "recent":
+            query["run_id"] = value
+        elif key == "limit" and query["action"] == "recent":
+            query["limit"] = int(value)
+        elif key == "by" and query["action"] == "stats":
+            group_by = tuple(_FILTER_KEYS.get(column, column) for column in value.split(","))
+            unknown = [column for column in group_by if column not in LABEL_COLUMNS]
+            if unknown:
+                raise ValueError(f"Can't group by {', '.join(unknown)}; use {', '.join(LABEL_COLUMNS)}")
+            query["group_by"] = group_by
+        else:
+            raise ValueError(f"Unknown history option '{key}'")
+    return query
+
+run_history = RunHistory()
+atexit.register(run_history.close) # Commits what's still queued when the process exits
@@ -0,0 +1,208 @@
+import threading
+from datetime import timedelta
+from time import perf_counter_ns, sleep
+from urllib.parse import urlsplit
+from requests.adapters import HTTPAdapter
+from requests.exceptions import ConnectionError, Timeout
+from requests.models import Response
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+from apis.Cache import LruStore, revalidation_enabled, response_cache
+from apis.Cassette import request_key
+from apis.Metrics import call_metrics
+
+VALIDATOR_MAX_ENTRIES = 256
+VALIDATOR_MAX_BYTES = 16 * 1024 * 1024
+UNRECORDED_STATUSES = (429, 502, 503, 504) # Transient failures; recording them would replay an outage
+UNRECORDED_HEADERS = ("connection", "keep-alive", "transfer-encoding", "content-encoding", "content-length") # Describe the original transfer, not the stored body
+
+class CassetteMiss(ConnectionError):
+    """Replaying and the cassette has no response for this request. Nothing was sent over the network."""
+
+class _Validated:
+    __slots__ = ("etag", "last_modified", "headers", "content", "encoding")
+    def __init__(self, headers, content, encoding):
+        self.etag = headers.get("ETag")
+        self.last_modified = headers.get("Last-Modified")
+        self.headers = headers.copy()
+        self.content = content
+        self.encoding = encoding
+
+class ValidatorStore:
+    """
+    The ETag/Last-Modified validators and body of the last 200 per URL. One per tenant, shared by its threaded
+    (PooledAdapter) and async (apis/AsyncHttp.py) sessions, so either can revalidate what the other fetched.
+    """
+    def __init__(self, max_entries=VALIDATOR_MAX_ENTRIES, max_bytes=VALIDATOR_MAX_BYTES):
+        self._store = LruStore(max_entries, max_bytes)
+        self._lock = threading.Lock()
+
+    def conditions(self, url, headers):
+        """Adds the stored validators of `url` to the request headers; returns the stored entry, or None."""
+        with self._lock:
+            stored = self._store.get(url)
+        if stored is not None:
+            if stored.etag:
+                headers["If-None-Match"] = stored.etag
+            if stored.last_modified:
+                headers["If-Modified-Since"] = stored.last_modified
+        return stored
+
+    def store(self, url, headers, content, encoding):
+        validated = _Validated(headers, content, encoding)
+        with self._lock:
+            self._store.put(url, validated, len(content))
+
+def has_validators(response) -> bool:
+    return response.status_code == 200 and ("ETag" in response.headers or "Last-Modified" in response.headers)
+
+class PooledAdapter(HTTPAdapter):
+    """
+    Connection-pooling adapter used by every registry session.
+    While a cached @api_call reloads, GETs carry the ETag/Last-Modified validators of the last 200 for that URL,
+    and a 304 Not Modified is answered from the stored body.
+    With a Resilience (apis/Resilience.py) every request waits for the session's rate limiter and is refused while
+    its host's circuit is open; 429s, 5xx and connection errors are retried with jittered backoff or after Retry-After.
+    With a Cassette (apis/Cassette.py) responses are recorded as they arrive, or replayed without touching the network
+    (and without rate limits or retries).
+    """
+    def __init__(self, *args, resilience=None, cassette=None, validators=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.resilience = resilience
+        self.cassette = cassette
+        self.validators = validators if validators is not None else ValidatorStore()
+
+    def send(self, request, stream=False, **kwargs):
+        resilience = self.resilience
+        if resilience is None or (self.cassette is not None and self.cassette.replaying):
+            return self._send_measured(request, stream, **kwargs)
+        endpoint = urlsplit(request.url).netloc
+        breaker = resilience.breaker(endpoint)
+        limiter = resilience.limiter
+        attempt = 0
+        while True:
+            breaker.before_request(endpoint)
+            limiter.acquire()
+            try:
+                response = self._send_measured(request, stream, **kwargs)
+            except (ConnectionError, Timeout) as e:
+                delay = resilience.error_delay(request, attempt, e, breaker)
+                if delay is None:
+                    raise
+            else:
+                delay = resilience.response_delay(request, attempt, response, breaker)
+                if delay is None:
+                    return response
+                response.close() # Hands the connection back to the pool before waiting
+            attempt += 1
+            record = call_metrics.current() if call_metrics.enabled else None
+            if record is not None:
+                record.retries += 1
+            if delay:
+                sleep(delay)
+
+    def _send_measured(self, request, stream=False, **kwargs):
+        start = perf_counter_ns()
+        response = self._send(request, stream, **kwargs) # Returns once the headers are in; the body is read later
+        ttfb_ns = perf_counter_ns() - start
+        record = call_metrics.current() if call_metrics.enabled else None
+        if record is not None: # Inside an instrumented @api_call
+            revalidated = getattr(response, "revalidated", False)
+            record.status = 304 if revalidated else response.status_code
+            record.ttfb_ns = ttfb_ns
+            body = request.body
+            record.request_bytes += len(body) if isinstance(body, (bytes, str)) else 0
+            content_length = response.headers.get("Content-Length")
+            if revalidated:
+                pass # Only the 304 went over the wire
+            elif content_length and content_length.isdigit():
+                record.response_bytes += int(content_length)
+            elif not stream:
+                record.response_bytes += len(response.content)
+        return response
+
+    def _send(self, request, stream=False, **kwargs):
+        cassette = self.cassette
+        if cassette is None:
+            return self._send_live(request, stream, **kwargs)
+        key = request_key(request.method, request.url, request.body)
+        if cassette.replaying:
+            recorded = cassette.lookup(key)
+            if recorded is None:
+                raise CassetteMiss(f"No recorded response for {key} in {cassette.path}", request=request)
+            return self._from_recorded(recorded, request)
+        start = perf_counter_ns()
+        response = self._send_live(request, stream, **kwargs)
+        if response.status_code not in UNRECORDED_STATUSES:
+            elapsed = (perf_counter_ns() - start) / 1e9
+            body = response.content # Read in full; the caller then iterates over the stored bytes as if streamed
+            headers = {name: value for name, value in response.headers.items() if name.lower() not in UNRECORDED_HEADERS}
+            cassette.record(key, response.status_code, response.reason, headers, body, elapsed)
+        return response
+
+    def _send_live(self, request, stream=False, **kwargs):
+        if request.method != "GET" or not revalidation_enabled():
+            return super().send(request, stream=stream, **kwargs)
+
+        stored = self.validators.conditions(request.url, request.headers)
+        response = super().send(request, stream=stream, **kwargs)
+        if response.status_code == 304 and stored is not None:
+            response_cache.record_revalidated()
+            return self._from_validated(stored, request, response)
+        if has_validators(response):
+            if stream:
+                self._validate_when_read(request.url, response)
+            else:
+                self.validators.store(request.url, response.headers, response.content, response.encoding)
+        return response
+
+    def _validate_when_read(self, url, response):
+        """
+        A streamed body is only there once the caller has read it: the chunks are kept as they go by and the validators
+        stored when the body was read to the end. Bodies too large for the validator store aren't kept at all.
+        """
+        iter_content = response.iter_content
+        def iter_and_keep(chunk_size=1, decode_unicode=False):
+            chunks = []
+            size = 0
+            for chunk in iter_content(chunk_size, decode_unicode):
+                if chunks is not None:
+                    size += len(chunk)
+                    chunks.append(chunk)
+                    if size > VALIDATOR_MAX_BYTES or not isinstance(chunk, bytes):
+                        chunks = None
+                yield chunk
+            if chunks is not None:
+                self.validators.store(url, response.headers, b"".join(chunks), response.encoding)
+        response.iter_content = iter_and_keep # Also what response.content reads through
+
+    def _from_recorded(self, recorded, request):
+        response = Response()
+        response.status_code = recorded.status
+        response.reason = recorded.reason
+        response.headers = CaseInsensitiveDict(recorded.headers)
+        response.headers["Content-Length"] = str(len(recorded.body))
+        response._content = recorded.body
+        response._content_consumed = True
+        response.encoding = get_encoding_from_headers(response.headers)
+        response.url = request.url
+        response.request = request
+        response.elapsed = timedelta(0)
+        response.connection = self
+        return response
+
+    def _from_validated(self, stored, request, not_modified):
+        response = Response()
+        response.status_code = 200
+        response.reason = "OK"
+        response.headers = stored.headers.copy()
+        response.headers.update(not_modified.headers) # 304s may refresh caching headers
+        response._content = stored.content
+        response._content_consumed = True # iter_content() slices the stored body instead of reading a stream
+        response.encoding = stored.encoding
+        response.url = request.url
+        response.request = request
+        response.elapsed = not_modified.elapsed
+        response.connection = self
+        response.revalidated = True
+        return response
@@ -0,0 +1,290 @@
+import json, time, threading, contextvars
+
+SUB_BUCKET_BITS = 5 # 32 sub-buckets per power of two: values are kept within ~3%
+_SUB_BUCKETS = 1 << SUB_BUCKET_BITS
+
+def _bucket_index(value_ns: int) -> int:
+    # Log-linear (HdrHistogram-style) index using only integer ops
+    if value_ns < 2 * _SUB_BUCKETS:
+        return value_ns
+    exponent = value_ns.bit_length() - SUB_BUCKET_BITS - 1
+    return (exponent << SUB_BUCKET_BITS) + (value_ns >> exponent)
+
+def _bucket_value(index: int) -> int:
+    """Upper bound (ns) of the values that land in bucket `index`."""
+    if index < 2 * _SUB_BUCKETS:
+        return index
+    exponent = (index >> SUB_BUCKET_BITS) - 1
+    mantissa = (index & (_SUB_BUCKETS - 1)) | _SUB_BUCKETS
+    return ((mantissa + 1) << exponent) - 1
+
+class LatencyHistogram:
+    """
+    Low-overhead latency histogram: one dict increment per sample, percentiles computed on demand.
+    Not thread-safe; keep one per thread and merge() them.
+    """
+    __slots__ = ("buckets", "count", "total_ns", "min_ns", "max_ns")
+
+    def __init__(self):
+        self.buckets = {} # bucket index -> count
+        self.count = 0
+        self.total_ns = 0
+        self.min_ns = None
+        self.max_ns = 0
+
+    def record_ns(self, value_ns: int):
+        index = _bucket_index(value_ns)
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+        self.count += 1
+        self.total_ns += value_ns
+        if value_ns > self.max_ns:
+            self.max_ns = value_ns
+        if self.min_ns is None or value_ns < self.min_ns:
+            self.min_ns = value_ns
+
+    def record(self, seconds: float):
+        self.record_ns(int(seconds * 1e9))
+
+    def merge(self, other: "LatencyHistogram"):
+        for index, count in list(other.buckets.items()): # Copied first: `other` may still be recorded into by its thread
+            self.buckets[index] = self.buckets.get(index, 0) + count
+        self.count += other.count
+        self.total_ns += other.total_ns
+        self.max_ns = max(self.max_ns, other.max_ns)
+        if other.min_ns is not None and (self.min_ns is None or other.min_ns < self.min_ns):
+            self.min_ns = other.min_ns
+        return self
+
+    def percentile_ns(self, percentile: float) -> int:
+        if not self.count:
+            return 0
+        threshold = max(1, round(self.count * percentile / 100))
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen >= threshold:
+                return min(_bucket_value(index), self.max_ns)
+        return self.max_ns
+
+    def summary_ms(self) -> dict:
+        """count, mean, p50/p90/p99 and max in milliseconds."""
+        to_ms = lambda value_ns: round(value_ns / 1e6, 3)
+        return {
+            "count": self.count,
+            "mean": to_ms(self.total_ns / self.count) if self.count else 0.0,
+            "p50": to_ms(self.percentile_ns(50)),
+            "p90": to_ms(self.percentile_ns(90)),
+            "p99": to_ms(self.percentile_ns(99)),
+            "max": to_ms(self.max_ns),
+        }
+
+class CallRecord:
+    """HTTP details of the API call running on the current thread (or asyncio task), filled in by the transport layer."""
+    __slots__ = ("status", "ttfb_ns", "request_bytes", "response_bytes", "retries")
+    def __init__(self):
+        self.status = None
+        self.ttfb_ns = None
+        self.request_bytes = 0
+        self.response_bytes = 0
+        self.retries = 0
+
+class CallStats:
+    """
+    Aggregate for one (api, environment, tenant, call) label set.
+    Wall times go straight into bucket counts, a sum and a max; the count, and the `wall` histogram, are derived
+    from them when read, which keeps add() (run on every call) to a handful of operations.
+    """
+    __slots__ = ("errors", "wall_buckets", "wall_total_ns", "wall_max_ns", "ttfb", "request_bytes", "response_bytes", "retries", "statuses")
+    def __init__(self):
+        self.errors = 0
+        self.wall_buckets = {} # _bucket_index() -> count
+        self.wall_total_ns = 0
+        self.wall_max_ns = 0
+        self.ttfb = LatencyHistogram()
+        self.request_bytes = 0
+        self.response_bytes = 0
+        self.retries = 0
+        self.statuses = {} # HTTP status -> count
+
+    @property
+    def count(self):
+        return sum(list(self.wall_buckets.values()))
+
+    @property
+    def wall(self) -> LatencyHistogram:
+        histogram = LatencyHistogram()
+        histogram.buckets = dict(list(self.wall_buckets.items()))
+        histogram.count = sum(histogram.buckets.values())
+        histogram.total_ns = self.wall_total_ns
+        histogram.max_ns = self.wall_max_ns
+        if histogram.buckets:
+            histogram.min_ns = min(_bucket_value(index - 1) + 1 if index else 0 for index in histogram.buckets) # Lower bound of the lowest bucket
+        return histogram
+
+    def add(self, wall_ns: int, error: bool, record):
+        # Hot path of every instrumented call: _bucket_index() inlined, nothing derivable is maintained
+        shift = wall_ns.bit_length() - SUB_BUCKET_BITS - 1
+        index = wall_ns if shift <= 0 else (shift << SUB_BUCKET_BITS) + (wall_ns >> shift)
+        buckets = self.wall_buckets
+        buckets[index] = buckets.get(index, 0) + 1
+        self.wall_total_ns += wall_ns
+        if wall_ns > self.wall_max_ns:
+            self.wall_max_ns = wall_ns
+        if error:
+            self.errors += 1
+        if record is not None:
+            self.add_record(record)
+
+    def add_record(self, record):
+        """HTTP details of a call that made requests."""
+        if record.ttfb_ns is not None:
+            self.ttfb.record_ns(record.ttfb_ns)
+        self.request_bytes += record.request_bytes
+        self.response_bytes += record.response_bytes
+        self.retries += record.retries
+        if record.status is not None:
+            self.statuses[record.status] = self.statuses.get(record.status, 0) + 1
+
+    def merge(self, other: "CallStats"):
+        # `other` may be a thread's live stats: dicts are copied with list() before iterating, atomically under the GIL
+        for index, count in list(other.wall_buckets.items()):
+            self.wall_buckets[index] = self.wall_buckets.get(index, 0) + count
+        self.wall_total_ns += other.wall_total_ns
+        self.wall_max_ns = max(self.wall_max_ns, other.wall_max_ns)
+        self.errors += other.errors
+        self.ttfb.merge(other.ttfb)
+        self.request_bytes += other.request_bytes
+        self.response_bytes += other.response_bytes
+        self.retries += other.retries
+        for status, count in list(other.statuses.items()):
+            self.statuses[status] = self.statuses.get(status, 0) + count
+        return self
+
+    def to_dict(self):
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "wall_ms": self.wall.summary_ms(),
+            "ttfb_ms": self.ttfb.summary_ms(),
+            "request_bytes": self.request_bytes,
+            "response_bytes": self.response_bytes,
+            "retries": self.retries,
+            "statuses": {str(status): count for status, count in sorted(self.statuses.items(), key=str)},
+        }
+
+NO_CALL = object() # ThreadState.record outside of any instrumented call
+
+class ThreadState:
+    """What one thread records into; only that thread ever writes to it."""
+    __slots__ = ("stats", "record")
+    def __init__(self):
+        self.stats = {} # labels -> CallStats
+        self.record = NO_CALL # CallRecord of the innermost call, created on its first HTTP exchange (None until then)
+
+LABELS = ("api", "environment", "tenant", "call")
+
+class CallMetrics:
+    """
+    Per-call instrumentation for @api_call. Every thread aggregates into its own ThreadState without locking;
+    snapshot() merges them. A lock is only taken the first time a thread records anything.
+    Async calls interleave on their event loop's thread, so each keeps its CallRecord in `task_record` instead.
+    """
+    def __init__(self):
+        self.enabled = True
+        self.local = threading.local()
+        self.task_record = contextvars.ContextVar("ae_call_record", default=None)
+        self._lock = threading.Lock()
+        self._states = []
+
+    def thread_state(self) -> ThreadState:
+        try:
+            return self.local.state
+        except AttributeError:
+            state = self.local.state = ThreadState()
+            with self._lock:
+                self._states.append(state)
+            return state
+
+    def current(self):
+        """Record of the instrumented call running on this thread (created on demand), or None outside of one."""
+        state = self.thread_state()
+        record = state.record
+        if record is NO_CALL:
+            return None
+        if record is None:
+            record = state.record = CallRecord()
+        return record
+
+    def snapshot(self) -> dict:
+        """Merged stats of every thread: labels -> CallStats."""
+        with self._lock:
+            thread_stats = [state.stats for state in self._states]
+        merged = {}
+        for stats_by_label in thread_stats:
+            for labels, stats in list(stats_by_label.items()): # list() copies atomically while writers continue
+                merged.setdefault(labels, CallStats()).merge(stats)
+        return merged
+
+    def reset(self):
+        # Each thread's stats are swapped for an empty dict rather than cleared under it; a call finishing right now
+        # may still land in the old one and be dropped with it
+        with self._lock:
+            for state in self._states:
+                state.stats = {}
+
+    def to_json(self) -> str:
+        snapshot = self.snapshot()
+        return json.dumps({
+            "timestamp": time.time(),
+            "calls": [{**dict(zip(LABELS, labels)), **stats.to_dict()} for labels, stats in sorted(snapshot.items(), key=lambda item: tuple(map(str, item[0])))],
+        }, indent=2)
+
+    def to_prometheus(self) -> str:
+        lines = []
+        def metric(name, kind, help_text, samples):
+            lines.append(f"# HELP ae_{name} {help_text}")
+            lines.append(f"# TYPE ae_{name} {kind}")
+            for labels, value, extra_labels in samples:
+                label_text = ",".join(f'{key}="{_escape(label)}"' for key, label in (*zip(LABELS, labels), *extra_labels))
+                lines.append(f"ae_{name}{{{label_text}}} {value}")
+
+        snapshot = sorted(self.snapshot().items(), key=lambda item: tuple(map(str, item[0])))
+        metric("api_calls_total", "counter", "API calls made.", [(labels, stats.count, ()) for labels, stats in snapshot])
+        metric("api_call_errors_total", "counter", "API calls that raised or returned None.", [(labels, stats.errors, ()) for labels, stats in snapshot])
+        metric("api_call_retries_total", "counter", "HTTP retries made by API calls.", [(labels, stats.retries, ()) for labels, stats in snapshot])
+        metric("api_request_bytes_total", "counter", "Request body bytes sent.", [(labels, stats.request_bytes, ()) for labels, stats in snapshot])
+        metric("api_response_bytes_total", "counter", "Response body bytes received.", [(labels, stats.response_bytes, ()) for labels, stats in snapshot])
+        metric("api_responses_total", "counter", "HTTP responses by status.", [
+            (labels, count, (("status", status),)) for labels, stats in snapshot for status, count in sorted(stats.statuses.items(), key=str)
+        ])
+        for name, attribute, help_text in (("api_call_seconds", "wall", "Wall time of API calls."), ("api_ttfb_seconds", "ttfb", "Time to first byte of API responses.")):
+            samples = []
+            for labels, stats in snapshot:
+                histogram = getattr(stats, attribute)
+                for quantile in (50, 90, 99):
+                    samples.append((labels, histogram.percentile_ns(quantile) / 1e9, (("quantile", quantile / 100),)))
+            metric(name, "summary", help_text, samples)
+            for labels, stats in snapshot:
+                histogram = getattr(stats, attribute)
+                label_text = ",".join(f'{key}="{_escape(value)}"' for key, value in zip(LABELS, labels))
+                lines.append(f"ae_{name}_sum{{{label_text}}} {histogram.total_ns / 1e9}")
+                lines.append(f"ae_{name}_count{{{label_text}}} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    def report_lines(self):
+        snapshot = self.snapshot()
+        if not snapshot:
+            return ["No API calls recorded."]
+        lines = [f"{'api/env/tenant/call':<48}{'calls':>7}{'err':>5}{'p50 ms':>9}{'p99 ms':>9}{'ttfb50':>9}{'resp KB':>9}{'retry':>6}  statuses"]
+        for labels, stats in sorted(snapshot.items(), key=lambda item: tuple(map(str, item[0]))):
+            wall, ttfb = stats.wall.summary_ms(), stats.ttfb.summary_ms()
+            statuses = " ".join(f"{status}:{count}" for status, count in sorted(stats.statuses.items(), key=str))
+            name = "/".join(str(label) for label in labels)
+            lines.append(f"{name:<48}{stats.count:>7}{stats.errors:>5}{wall['p50']:>9}{wall['p99']:>9}{ttfb['p50']:>9}"
+                         f"{stats.response_bytes / 1024:>9.1f}{stats.retries:>6}  {statuses}")
+        return lines
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+call_metrics = CallMetrics()
@@ -0,0 +1,215 @@
+import os, sys, json, hashlib, inspect, importlib, importlib.util, threading
+
+MANIFEST_VERSION = 1
+
+class ParamSpec:
+    """One parameter of an API call, captured once when the call is decorated."""
+    def __init__(self, name: str, default=inspect.Parameter.empty, annotation=inspect.Parameter.empty):
+        self.name = name
+        self.default = default
+        self.annotation = annotation
+
+    @property
+    def required(self):
+        return self.default is inspect.Parameter.empty
+
+    def to_dict(self):
+        data = {"name": self.name, "required": self.required}
+        if not self.required:
+            data["default"] = self.default
+        if self.annotation is not inspect.Parameter.empty:
+            data["annotation"] = getattr(self.annotation, "__name__", str(self.annotation))
+        return data
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "ParamSpec":
+        if data.get("required", True):
+            return cls(data["name"])
+        return cls(data["name"], data.get("default"))
+
+class CallSpec:
+    """Metadata of one @api_call method."""
+    def __init__(self, name: str, params, doc=None):
+        self.name = name
+        self.friendly_name = name.replace('_', ' ').title()
+        self.params = list(params)
+        self.doc = doc
+
+    @classmethod
+    def from_function(cls, func) -> "CallSpec":
+        params = [
+            ParamSpec(param.name, param.default, param.annotation)
+            for index, param in enumerate(inspect.signature(func).parameters.values())
+            if index > 0 and param.kind in (param.POSITIONAL_OR_KEYWORD, param.KEYWORD_ONLY) # Skip self
+        ]
+        return cls(func.__name__, params, inspect.getdoc(func))
+
+    @property
+    def param_names(self):
+        return [param.name for param in self.params]
+
+    def to_dict(self):
+        return {"name": self.name, "params": [param.to_dict() for param in self.params], "doc": self.doc}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "CallSpec":
+        return cls(data["name"], [ParamSpec.from_dict(param) for param in data.get("params", [])], data.get("doc"))
+
+class ApiSpec:
+    """
+    An @api_class with its calls, indexed by method name.
+    Specs read from the manifest have no `cls` until the module is actually imported.
+    """
+    def __init__(self, api_name: str, module: str, class_name: str, calls, cls=None, file=None, mtime=None, digest=None):
+        self.api_name = api_name
+        self.cls = cls
+        self.module = module
+        self.class_name = class_name
+        self.calls = {call.name: call for call in calls}
+        self.call_names = sorted(self.calls) # Display order of the action list
+        self.file = file
+        self.mtime = mtime
+        self.digest = digest # Source hash, so a manifest stays valid across checkouts that reset mtimes
+
+    @classmethod
+    def from_class(cls, api_name: str, api_class, calls) -> "ApiSpec":
+        module = sys.modules.get(api_class.__module__)
+        file = getattr(module, "__file__", None)
+        return cls(api_name, api_class.__module__, api_class.__name__, calls, api_class, file, _mtime(file), _digest(file))
+
+    def is_stale(self):
+        if self.file is None:
+            return False
+        mtime = _mtime(self.file)
+        if mtime == self.mtime:
+            return False
+        if self.digest is not None and _digest(self.file) == self.digest:
+            self.mtime = mtime # Same source, only touched; skip hashing next time
+            return False
+        return True
+
+    def to_dict(self):
+        return {
+            "api_name": self.api_name,
+            "module": self.module,
+            "class": self.class_name,
+            "digest": self.digest,
+            "calls": [self.calls[name].to_dict() for name in self.call_names],
+        }
+
+    @classmethod
+    def from_manifest(cls, data: dict) -> "ApiSpec":
+        calls = [CallSpec.from_dict(call) for call in data.get("calls", [])]
+        return cls(data["api_name"], data["module"], data["class"], calls, file=_module_file(data["module"]), digest=data.get("digest"))
+
+class ApiRegistry:
+    """
+    Central index of every API class and call, filled in by the @api_class decorator as modules are imported.
+    Lookups are dict hits; a module is only re-imported when its file's mtime changed.
+    """
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._by_name = {} # api name -> ApiSpec
+        self._by_class = {} # (module, class name) -> ApiSpec
+        self._manifest = {} # (module, class name) -> ApiSpec without cls, read from the prebuilt manifest
+
+    def register(self, api_name: str, cls):
+        calls = [
+            member._call_spec for _, member in inspect.getmembers(cls, inspect.isfunction)
+            if getattr(member, "_is_api_call", False)
+        ]
+        spec = ApiSpec.from_class(api_name, cls, calls)
+        with self._lock:
+            self._by_name[api_name] = spec
+            self._by_class[(spec.module, spec.class_name)] = spec
+        return spec
+
+    def get(self, api_name: str):
+        """Spec registered under the @api_class name, or None if its module wasn't imported yet."""
+        return self._by_name.get(api_name)
+
+    def resolve(self, module_name: str, class_name: str) -> ApiSpec:
+        """Spec of module.class, importing (or re-importing a modified) module when needed."""
+        key = (module_name, class_name)
+        spec = self._by_class.get(key)
+        if spec is not None and not spec.is_stale():
+            return spec
+        with self._lock:
+            spec = self._by_class.get(key)
+            if spec is None or spec.is_stale():
+                module = sys.modules.get(module_name)
+                if module is not None and spec is not None:
+                    importlib.reload(module) # Re-runs the decorators, which re-register the classes
+                else:
+                    module = importlib.import_module(module_name)
+                spec = self._by_class.get(key)
+                if spec is None:
+                    if not hasattr(module, class_name):
+                        raise AttributeError(f"module '{module_name}' has no attribute '{class_name}'")
+                    raise AttributeError(f"'{class_name}' in '{module_name}' is not decorated with @api_class")
+        return spec
+
+    def describe(self, module_name: str, class_name: str) -> ApiSpec:
+        """
+        Spec for listing calls. Served from the manifest while the module's source is unchanged,
+        so browsing APIs never imports them; falls back to resolve() otherwise.
+        """
+        key = (module_name, class_name)
+        spec = self._by_class.get(key)
+        if spec is None:
+            spec = self._manifest.get(key)
+        if spec is not None and not spec.is_stale():
+            return spec
+        return self.resolve(module_name, class_name)
+
+    def load_manifest(self, manifest_path: str) -> int:
+        """Loads a manifest written by write_manifest(); returns the number of APIs it describes."""
+        try:
+            with open(manifest_path, 'r') as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return 0
+        if data.get("version") != MANIFEST_VERSION:
+            return 0
+        specs = [ApiSpec.from_manifest(entry) for entry in data.get("apis", [])]
+        with self._lock:
+            self._manifest = {(spec.module, spec.class_name): spec for spec in specs}
+        return len(specs)
+
+    def write_manifest(self, manifest_path: str, specs):
+        data = {"version": MANIFEST_VERSION, "apis": [spec.to_dict() for spec in specs]}
+        with open(manifest_path, 'w') as f:
+            json.dump(data, f, indent=2, default=repr)
+
+    def resolve_config(self, api_config: dict) -> ApiSpec:
+        """Spec of the module/class pair an entry of config.json points to."""
+        return self.resolve(api_config["module"], api_config["class"])
+
+    def apis(self):
+        return list(self._by_name.values())
+
+def _mtime(path):
+    try:
+        return os.stat(path).st_mtime_ns if path else None
+    except OSError:
+        return None
+
+def _digest(path):
+    if not path:
+        return None
+    try:
+        with open(path, 'rb') as f:
+            return hashlib.sha1(f.read().replace(b'\r\n', b'\n')).hexdigest() # Same hash for CRLF and LF checkouts
+    except OSError:
+        return None
+
+def _module_file(module_name):
+    # Locates the source without executing it; frozen builds have no file to compare against
+    try:
+        spec = importlib.util.find_spec(module_name)
+    except (ImportError, ValueError):
+        return None
+    origin = getattr(spec, "origin", None)
+    return origin if origin and os.path.isfile(origin) else None
+
+api_registry = ApiRegistry()
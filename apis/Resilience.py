@@ -0,0 +1,217 @@
+import time, random, threading
+from email.utils import parsedate_to_datetime
+from requests.exceptions import ConnectionError, ConnectTimeout, Timeout
+
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_BACKOFF_MS = 200 # First retry waits up to this long; doubles per attempt
+DEFAULT_MAX_BACKOFF_MS = 10000
+DEFAULT_MAX_RETRY_AFTER_S = 60 # Longer Retry-After values aren't waited out; the response is returned as is
+DEFAULT_BREAKER_FAILURES = 5
+DEFAULT_BREAKER_RESET_S = 30
+RETRY_STATUSES = (429, 502, 503, 504)
+IDEMPOTENT_METHODS = ("GET", "HEAD", "OPTIONS", "PUT", "DELETE")
+RECOVERY_STEP = 0.02 # Fraction of the configured rate regained per successful response after a 429
+DECREASE_COOLDOWN_S = 1.0 # 429s arriving together are one signal: the rate is cut at most once per cooldown
+
+class CircuitOpenError(ConnectionError):
+    """Raised without contacting the server while its circuit is open, so callers handle it like a connection error."""
+
+class TokenBucket:
+    """
+    Rate limiter shared by every thread calling one API/environment/tenant. acquire() reserves the next free slot and
+    sleeps until then, so waiting callers go out evenly spaced instead of spinning or bursting.
+    throttle() reacts to the server shedding load: with a rate (and adaptive) it halves the rate, and successes raise it
+    back towards the configured rate step by step (AIMD), settling near what the server accepts. Without a rate it
+    holds every caller back for the Retry-After instead.
+    """
+    def __init__(self, rate=None, burst=None, adaptive=True):
+        self.max_rate = rate
+        self.rate = rate
+        self.burst = burst or (max(1.0, rate / 10) if rate else 1.0) # Default: up to 100 ms worth of requests at once
+        self.adaptive = adaptive
+        self._lock = threading.Lock()
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._decreased_at = float("-inf")
+
+    def acquire(self) -> float:
+        """Blocks until the caller may send; returns the seconds waited."""
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    def reserve(self) -> float:
+        """Reserves the next free slot without waiting; returns the seconds until it comes (asyncio callers sleep it off)."""
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._paused_until)
+            if self.rate:
+                self._refill(now)
+                self._tokens -= 1 # Below zero: slots reserved by callers already waiting
+                if self._tokens < 0:
+                    start = max(start, now - self._tokens / self.rate)
+        return max(0.0, start - now)
+
+    def throttle(self, seconds: float) -> bool:
+        """Called on a 429 (or 503 + Retry-After); True when every caller is now held back for `seconds`."""
+        with self._lock:
+            now = time.monotonic()
+            if self.rate and self.adaptive:
+                if now - self._decreased_at >= DECREASE_COOLDOWN_S:
+                    self._refill(now)
+                    self.rate = max(self.max_rate * RECOVERY_STEP, self.rate / 2)
+                    self._decreased_at = now
+                return False
+            if self.rate:
+                return False # Fixed rate: only the rejected request waits
+            self._paused_until = max(self._paused_until, now + seconds)
+            return True
+
+    def on_success(self):
+        if self.adaptive and self.rate is not None and self.rate < self.max_rate: # Unlocked check: usually at full rate
+            with self._lock:
+                self._refill(time.monotonic())
+                self.rate = min(self.max_rate, self.rate + self.max_rate * RECOVERY_STEP)
+
+    def _refill(self, now):
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+class CircuitBreaker:
+    """
+    Fails fast while an endpoint is down. After `failures` consecutive failures (connection errors, 5xx) the circuit
+    opens and requests raise CircuitOpenError for `reset_timeout` seconds; then a single trial request goes through
+    (half-open) and its outcome closes the circuit or opens it again.
+    """
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half-open"
+
+    def __init__(self, failures=DEFAULT_BREAKER_FAILURES, reset_timeout=DEFAULT_BREAKER_RESET_S):
+        self.failure_threshold = failures
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self._opened_at = 0.0
+        self._trial_started = None # While half-open: when the trial request went out
+        self._lock = threading.Lock()
+
+    def before_request(self, endpoint):
+        if self.state is self.CLOSED: # Unlocked fast path
+            return
+        with self._lock:
+            now = time.monotonic()
+            if self.state is self.OPEN:
+                remaining = self._opened_at + self.reset_timeout - now
+                if remaining > 0:
+                    raise CircuitOpenError(f"Circuit open for {endpoint} after {self.failures} failures; retrying in {remaining:.1f}s")
+                self.state = self.HALF_OPEN
+                self._trial_started = None
+            if self.state is self.HALF_OPEN:
+                # A trial that never reported back (e.g. it raised something unexpected) is replaced after reset_timeout
+                if self._trial_started is not None and now - self._trial_started < self.reset_timeout:
+                    raise CircuitOpenError(f"Circuit half-open for {endpoint}; waiting on the trial request")
+                self._trial_started = now
+
+    def record_success(self):
+        if self.failures or self.state is not self.CLOSED:
+            with self._lock:
+                self.failures = 0
+                self.state = self.CLOSED
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state is self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+
+def retry_after_seconds(response):
+    """Seconds asked for by a Retry-After header (delta-seconds or HTTP date), or None."""
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+class Resilience:
+    """
+    Rate limit, retry and circuit-breaker state of one pooled session, from its merged "resilience" config blocks:
+    rate (req/s, default unlimited), burst, adaptive, max_retries, backoff_ms, max_backoff_ms, max_retry_after_s,
+    retry_statuses, retry_methods, breaker_failures and breaker_reset_s.
+    """
+    def __init__(self, config: dict):
+        self.limiter = TokenBucket(config.get("rate"), config.get("burst"), config.get("adaptive", True))
+        self.max_retries = config.get("max_retries", DEFAULT_MAX_RETRIES)
+        self.backoff = config.get("backoff_ms", DEFAULT_BACKOFF_MS) / 1000
+        self.max_backoff = config.get("max_backoff_ms", DEFAULT_MAX_BACKOFF_MS) / 1000
+        self.max_retry_after = config.get("max_retry_after_s", DEFAULT_MAX_RETRY_AFTER_S)
+        self.retry_statuses = frozenset(config.get("retry_statuses", RETRY_STATUSES))
+        self.retry_methods = frozenset(method.upper() for method in config.get("retry_methods", IDEMPOTENT_METHODS))
+        self._breaker_failures = config.get("breaker_failures", DEFAULT_BREAKER_FAILURES)
+        self._breaker_reset = config.get("breaker_reset_s", DEFAULT_BREAKER_RESET_S)
+        self._breakers = {} # host -> CircuitBreaker
+        self._lock = threading.Lock()
+
+    def breaker(self, endpoint) -> CircuitBreaker:
+        breaker = self._breakers.get(endpoint)
+        if breaker is None:
+            with self._lock:
+                breaker = self._breakers.setdefault(endpoint, CircuitBreaker(self._breaker_failures, self._breaker_reset))
+        return breaker
+
+    def backoff_delay(self, attempt) -> float:
+        """Full-jitter exponential backoff, so clients that failed together don't retry together."""
+        return random.uniform(0, min(self.max_backoff, self.backoff * (2 ** attempt)))
+
+    def error_delay(self, request, attempt, error, breaker):
+        """After a connection error or timeout: None to raise it, otherwise the seconds to wait before retrying."""
+        breaker.record_failure()
+        if not self.may_retry(request, attempt, error=error):
+            return None
+        return self.backoff_delay(attempt)
+
+    def response_delay(self, request, attempt, response, breaker):
+        """After a response: None to hand it to the caller, otherwise the seconds to wait before retrying."""
+        status = response.status_code
+        if status >= 500:
+            breaker.record_failure()
+        else:
+            breaker.record_success()
+        if status < 400:
+            self.limiter.on_success()
+            return None
+        retry_after = retry_after_seconds(response) if status in (429, 503) else None
+        shedding = status == 429 or retry_after is not None
+        delay = self.backoff_delay(attempt) if retry_after is None else retry_after
+        # Decided before throttling, which zeroes the delay: a Retry-After past the cap is returned as is
+        give_up = delay > self.max_retry_after or not self.may_retry(request, attempt, status=status)
+        if shedding and self.limiter.throttle(min(delay, self.max_retry_after)):
+            delay = 0.0 # Every caller is held back; the limiter makes them wait out the pause
+        return None if give_up else delay
+
+    def may_retry(self, request, attempt, error=None, status=None) -> bool:
+        if attempt >= self.max_retries:
+            return False
+        if request.body is not None and not isinstance(request.body, (bytes, str)):
+            return False # A streamed body can't be sent twice
+        if error is not None:
+            if isinstance(error, CircuitOpenError):
+                return False
+            # Nothing reached the server when the connection couldn't be made; otherwise only repeat safe methods
+            return isinstance(error, ConnectTimeout) or (isinstance(error, (ConnectionError, Timeout)) and request.method in self.retry_methods)
+        if status not in self.retry_statuses:
+            return False
+        return status == 429 or request.method in self.retry_methods # A 429 was rejected before being processed
+
+def resilience_from_config(config: dict):
+    """Resilience for the merged config, or None when it's turned off with "enabled": false."""
+    if not config.get("enabled", True):
+        return None
+    return Resilience(config)
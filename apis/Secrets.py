@@ -0,0 +1,58 @@
+import os, json, threading
+
+# A tenant's `id`/`secret` is either a literal string or a reference object with exactly one of these keys:
+#   {"env": "AE_PROD_SECRET"}          environment variable
+#   {"file": "~/.ae/secrets/prod"}     file contents, surrounding whitespace stripped
+#   {"keyring": "service/username"}    system keyring (needs the optional `keyring` package)
+SECRET_SOURCES = ("env", "file", "keyring")
+
+_cache = {}
+_lock = threading.Lock()
+
+def secret_problem(value):
+    """Why `value` isn't a usable id/secret setting, or None. Checks the shape only; nothing is resolved."""
+    if value is None or isinstance(value, str):
+        return None
+    if not isinstance(value, dict) or len(value) != 1 or next(iter(value)) not in SECRET_SOURCES:
+        return f"expected a string or one of {', '.join('{%r: ...}' % source for source in SECRET_SOURCES)}"
+    if not isinstance(next(iter(value.values())), str):
+        return "the reference must be a string"
+    return None
+
+def resolve_secret(value):
+    """
+    The credential a config value stands for. References are only loaded when a session for that tenant is
+    created, and each one once per process (until clear_secret_cache()); literal strings are returned as is.
+    """
+    if value is None or isinstance(value, str):
+        return value or ""
+    key = json.dumps(value, sort_keys=True)
+    with _lock:
+        if key in _cache:
+            return _cache[key]
+    (source, reference), = value.items()
+    if source == "env":
+        if reference not in os.environ:
+            raise KeyError(f"Environment variable '{reference}' for a tenant credential is not set")
+        secret = os.environ[reference]
+    elif source == "file":
+        with open(os.path.expanduser(reference), 'r') as f:
+            secret = f.read().strip()
+    elif source == "keyring":
+        try:
+            import keyring # Optional dependency, only needed for keyring references
+        except ImportError:
+            raise ImportError("Install the 'keyring' package to read tenant credentials from the system keyring") from None
+        service, _, username = reference.partition("/")
+        secret = keyring.get_password(service, username)
+        if secret is None:
+            raise KeyError(f"No keyring entry for '{reference}'")
+    else:
+        raise ValueError(f"Unknown secret source '{source}'")
+    with _lock:
+        _cache[key] = secret
+    return secret
+
+def clear_secret_cache():
+    with _lock:
+        _cache.clear()
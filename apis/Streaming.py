@@ -0,0 +1,270 @@
+import re, json, codecs
+from json.decoder import scanstring
+
+STREAM_CHUNK_SIZE = 64 * 1024
+DEFAULT_PREVIEW_CHARS = 4000
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+_NUMBER_RUN = re.compile(r'[-+0-9.eE]+')
+_NUMBER = re.compile(r'-?(?:0|[1-9]\d*)(\.\d+)?([eE][-+]?\d+)?')
+_RAW_TOKEN = re.compile(r'"[^"\\]*(?:\\.[^"\\]*)*"|[\[\]{}"]')
+_DECODER = json.JSONDecoder()
+_LITERALS = {"t": ("true", True), "f": ("false", False), "n": ("null", None)}
+
+# Parser states
+_VALUE, _VALUE_OR_END, _KEY, _KEY_OR_END, _COLON, _AFTER_VALUE, _RAW, _DONE = range(8)
+# What to do with a container right after its start event
+_SKIP, _CAPTURE = 1, 2
+
+class JsonEventParser:
+    """
+    Incremental JSON tokenizer: feed() text as it arrives and iterate the (event, path, value) tuples it yields.
+    Events are start_map/end_map/start_array/end_array (at the container's own path) and value.
+    `path` is the live list of map keys / array indexes, only valid until the next event; copy it if you keep it.
+    Only the unconsumed tail of the input is buffered, so memory stays bounded by the largest single token.
+
+    Right after a start_* event the consumer may call skip_value() or capture_value(): the container is then
+    decoded by json.decoder in one go (or bracket-counted while it spans chunks) instead of producing
+    per-token events, and a captured one comes back as a single value event.
+    """
+    def __init__(self):
+        self.path = []
+        self._stack = [] # True for maps, False for arrays
+        self._buffer = ""
+        self._state = _VALUE
+        self._raw_mode = None
+        self._raw_start = self._raw_scan = self._raw_depth = 0
+        self._raw_parts = [] # Text of a captured container from earlier chunks
+
+    def skip_value(self):
+        self._raw_mode = _SKIP
+
+    def capture_value(self):
+        self._raw_mode = _CAPTURE
+
+    def feed(self, text: str, final=False):
+        buffer = self._buffer + text if self._buffer else text
+        self._buffer = ""
+        position = yield from self._parse(buffer, final)
+        self._buffer = buffer[position:]
+        if final and self._state != _DONE:
+            raise json.JSONDecodeError("Unexpected end of JSON input", buffer, len(buffer))
+
+    def _parse(self, buffer, final):
+        path, stack = self.path, self._stack
+        position, end = 0, len(buffer)
+        state = self._state
+        while True:
+            if state == _RAW:
+                scan, depth, complete = self._raw_scan, self._raw_depth, False
+                for match in _RAW_TOKEN.finditer(buffer, scan):
+                    token = match.group()
+                    if token in "[{":
+                        depth += 1
+                    elif token in "]}":
+                        depth -= 1
+                        if depth == 0:
+                            complete, scan = True, match.end()
+                            break
+                    elif token == '"':
+                        break # String continues in the next chunk
+                    scan = match.end()
+                else:
+                    scan = end
+                if not complete:
+                    if final:
+                        raise json.JSONDecodeError("Unexpected end of JSON input", buffer, end)
+                    if self._raw_mode == _CAPTURE:
+                        self._raw_parts.append(buffer[self._raw_start:scan])
+                    position = scan # Only an unfinished string is carried over
+                    self._raw_scan, self._raw_start, self._raw_depth = 0, 0, depth
+                    break
+                if self._raw_mode == _CAPTURE:
+                    text = buffer[self._raw_start:scan]
+                    if self._raw_parts:
+                        self._raw_parts.append(text)
+                        text = "".join(self._raw_parts)
+                        self._raw_parts = []
+                    yield ("value", path, json.loads(text))
+                self._raw_mode = None
+                position = scan
+                state = _AFTER_VALUE if stack else _DONE
+                continue
+
+            position = _WHITESPACE.match(buffer, position).end()
+            if position >= end:
+                break
+            char = buffer[position]
+            if state == _DONE:
+                raise json.JSONDecodeError("Extra data", buffer, position)
+
+            if state == _VALUE_OR_END and char == "]" or state == _KEY_OR_END and char == "}":
+                position = yield from self._close(path, stack, position)
+                state = _AFTER_VALUE if stack else _DONE
+                continue
+            if state in (_VALUE_OR_END, _VALUE):
+                if char in "{[":
+                    is_map = char == "{"
+                    yield ("start_map" if is_map else "start_array", path, None)
+                    if self._raw_mode:
+                        try:
+                            value, new_position = _DECODER.raw_decode(buffer, position)
+                        except json.JSONDecodeError:
+                            if final:
+                                raise
+                            # Runs past this chunk; bracket-count it instead
+                            self._raw_start = self._raw_scan = position
+                            self._raw_depth = 0
+                            state = _RAW
+                            continue
+                        if self._raw_mode == _CAPTURE:
+                            yield ("value", path, value)
+                        self._raw_mode = None
+                        position = new_position
+                        state = _AFTER_VALUE if stack else _DONE
+                        continue
+                    stack.append(is_map)
+                    path.append(None if is_map else 0)
+                    state = _KEY_OR_END if is_map else _VALUE_OR_END
+                    position += 1
+                    continue
+                if char == '"':
+                    try:
+                        value, new_position = scanstring(buffer, position + 1)
+                    except json.JSONDecodeError:
+                        if final:
+                            raise
+                        break # String continues in the next chunk
+                elif char in "-0123456789":
+                    new_position = _NUMBER_RUN.match(buffer, position).end()
+                    if new_position == end and not final:
+                        break # Number may continue in the next chunk
+                    match = _NUMBER.fullmatch(buffer, position, new_position)
+                    if not match:
+                        raise json.JSONDecodeError("Invalid number", buffer, position)
+                    number = match.group(0)
+                    value = float(number) if match.group(1) or match.group(2) else int(number)
+                elif char in _LITERALS:
+                    literal, value = _LITERALS[char]
+                    if end - position < len(literal) and not final:
+                        break
+                    if not buffer.startswith(literal, position):
+                        raise json.JSONDecodeError("Invalid literal", buffer, position)
+                    new_position = position + len(literal)
+                else:
+                    raise json.JSONDecodeError("Expecting value", buffer, position)
+                yield ("value", path, value)
+                position = new_position
+                state = _AFTER_VALUE if stack else _DONE
+            elif state in (_KEY, _KEY_OR_END):
+                if char != '"':
+                    raise json.JSONDecodeError("Expecting property name enclosed in double quotes", buffer, position)
+                try:
+                    key, new_position = scanstring(buffer, position + 1)
+                except json.JSONDecodeError:
+                    if final:
+                        raise
+                    break
+                path[-1] = key
+                position = new_position
+                state = _COLON
+            elif state == _COLON:
+                if char != ":":
+                    raise json.JSONDecodeError("Expecting ':' delimiter", buffer, position)
+                position += 1
+                state = _VALUE
+            else: # _AFTER_VALUE
+                if char == ",":
+                    if stack[-1]:
+                        state = _KEY
+                    else:
+                        path[-1] += 1
+                        state = _VALUE
+                    position += 1
+                elif char in "]}":
+                    if (char == "}") != stack[-1]:
+                        raise json.JSONDecodeError("Mismatched closing bracket", buffer, position)
+                    position = yield from self._close(path, stack, position)
+                    state = _AFTER_VALUE if stack else _DONE
+                else:
+                    raise json.JSONDecodeError("Expecting ',' delimiter", buffer, position)
+        self._state = state
+        return position
+
+    def _close(self, path, stack, position):
+        is_map = stack.pop()
+        path.pop()
+        yield ("end_map" if is_map else "end_array", path, None)
+        return position + 1
+
+def parse_key_path(key_path):
+    """'items/3/name' or 'items.3.name' -> ['items', '3', 'name'] (None or '' selects the whole document)."""
+    if not key_path:
+        return []
+    return [segment for segment in re.split(r"[./]", str(key_path)) if segment]
+
+def _matches(path, target):
+    for index, segment in enumerate(target):
+        if str(path[index]) != segment:
+            return False
+    return True
+
+def iter_values(chunks, key_path=None, depth_offset=0):
+    """
+    Yields every value found at key_path (depth_offset=0) or, with depth_offset=1, each child of it
+    (array items / map values), materializing only those sub-trees. `chunks` are str or utf-8 bytes.
+    Containers off the key path are skipped and selected ones decoded by json's C decoder,
+    so only the spine down to the selection goes through the Python tokenizer.
+    """
+    target = parse_key_path(key_path)
+    target_depth = len(target) + depth_offset
+    if not target_depth:
+        # The whole document is wanted anyway
+        yield json.loads(b"".join(chunk if isinstance(chunk, bytes) else chunk.encode() for chunk in chunks))
+        return
+    parser = JsonEventParser()
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    chunks = iter(chunks)
+    while True:
+        chunk = next(chunks, None)
+        final = chunk is None
+        text = decoder.decode(b"" if final else chunk, final) if final or isinstance(chunk, bytes) else chunk
+        for event, path, value in parser.feed(text, final):
+            depth = len(path)
+            if event == "value":
+                if depth == target_depth and _matches(path, target):
+                    yield value
+                    if depth_offset == 0:
+                        return # The document may be far larger than the selection; stop reading
+            elif event != "end_map" and event != "end_array":
+                if depth == target_depth and _matches(path, target):
+                    parser.capture_value()
+                elif depth >= target_depth or not _matches(path, target[:depth]):
+                    parser.skip_value()
+        if final:
+            return
+
+def load_json_stream(chunks, key_path=None, default=None):
+    """The sub-tree at key_path (the whole document when key_path is empty), or default if it's absent."""
+    for value in iter_values(chunks, key_path):
+        return value
+    return default
+
+def iter_json_items(chunks, key_path=None):
+    """Streams the items of the array (or values of the map) at key_path one at a time."""
+    return iter_values(chunks, key_path, depth_offset=1)
+
+def response_chunks(response, chunk_size=STREAM_CHUNK_SIZE):
+    """Body chunks of a `stream=True` requests response."""
+    return response.iter_content(chunk_size=chunk_size)
+
+def json_preview(value, max_chars=DEFAULT_PREVIEW_CHARS, indent=2):
+    """Pretty-printed JSON cut off after max_chars; never serializes more than it shows."""
+    parts = []
+    size = 0
+    for part in json.JSONEncoder(indent=indent, default=repr).iterencode(value):
+        parts.append(part)
+        size += len(part)
+        if size > max_chars:
+            return "".join(parts)[:max_chars] + f"\n... (truncated at {max_chars} characters)"
+    return "".join(parts)
@@ -1,16 +1,339 @@
-import functools
-
-def api_class(api_name: str):
-    """Decorator to mark a class as an API class."""
-    def class_wrapper(cls):
-        setattr(cls, '_api_class_name', api_name)
-        return cls
-    return class_wrapper
-
-def api_call(func):
-    """Decorator to mark a method as an API call."""
-    @functools.wraps(func)
-    def wrapper(*args, **kwargs):
-        return func(*args, **kwargs)
-    wrapper._is_api_call = True # type: ignore[attr-defined] # Attribute to identify marked methods
-    return wrapper
\ No newline at end of file
+import inspect
+import functools
+import threading
+import contextvars
+from time import perf_counter_ns
+from apis.Cache import make_key, response_cache
+from apis.History import run_history
+from apis.Metrics import SUB_BUCKET_BITS, CallRecord, CallStats, call_metrics
+from apis.Registry import CallSpec, api_registry
+
+DEFAULT_POOL_CONNECTIONS = 10 # Number of distinct hosts kept in each session's pool
+DEFAULT_POOL_MAXSIZE = 32 # Keep-alive connections kept per host
+
+class SessionRegistry:
+    """
+    Shared registry of pooled keep-alive HTTP sessions, one per (API, environment, tenant), and for async calls one
+    AsyncSession (apis/AsyncHttp.py) per event loop and (API, environment, tenant).
+    Pool sizing, rate limits/retries ("resilience"), default headers and credentials are read from config.json.
+    Both kinds of session of a tenant share its rate limiter and circuit breakers.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._sessions = {}
+        self._async_sessions = {} # (loop, api, environment, tenant) -> AsyncSession
+        self._resilience = {} # (api, environment, tenant) -> Resilience or None
+        self._validators = {} # (api, environment, tenant) -> ValidatorStore
+        self._apis_config = {}
+
+    def configure(self, config_data: dict, stale=None):
+        """
+        Sessions built from the old config may carry stale headers/credentials: all of them are closed, or with
+        `stale` (a hot reload) only those under one of its (api, environment, tenant) scopes, None matching anything.
+        """
+        if stale is None:
+            self.close()
+            self._apis_config = config_data.get("apis", {})
+            return
+        self._apis_config = config_data.get("apis", {})
+        self._close_where(lambda key: any(
+            all(part is None or part == value for part, value in zip(scope, key)) for scope in stale
+        ))
+
+    def get(self, api_name, environment=None, tenant=None):
+        key = (api_name, environment, tenant)
+        session = self._sessions.get(key) # Fast path without taking the lock
+        if session is None:
+            with self._lock:
+                session = self._sessions.get(key)
+                if session is None:
+                    session = self._create_session(api_name, environment, tenant)
+                    self._sessions[key] = session
+        return session
+
+    def get_async(self, api_name, environment=None, tenant=None):
+        """The AsyncSession of the running event loop; call it from a coroutine."""
+        import asyncio # Loaded already by whatever runs the coroutine
+        key = (asyncio.get_running_loop(), api_name, environment, tenant)
+        session = self._async_sessions.get(key)
+        if session is None:
+            with self._lock:
+                session = self._async_sessions.get(key)
+                if session is None:
+                    for closed in [other for other in self._async_sessions if other[0].is_closed()]:
+                        del self._async_sessions[closed] # Loops that finished, e.g. an asyncio.run() in a script
+                    session = self._create_async_session(*key)
+                    self._async_sessions[key] = session
+        return session
+
+    def pop_async_sessions(self, loop):
+        """Takes the async sessions of an event loop out of the registry, for whoever stops the loop to close them."""
+        with self._lock:
+            keys = [key for key in self._async_sessions if key[0] is loop]
+            return [self._async_sessions.pop(key) for key in keys]
+
+    def close(self, api_name=None):
+        """Closes the sessions of one API, or every session when api_name is None."""
+        self._close_where(lambda key: api_name is None or key[0] == api_name)
+
+    def _close_where(self, predicate):
+        with self._lock:
+            keys = [key for key in self._sessions if predicate(key)]
+            sessions = [self._sessions.pop(key) for key in keys]
+            async_keys = [key for key in self._async_sessions if predicate(key[1:])]
+            async_sessions = [self._async_sessions.pop(key) for key in async_keys]
+            for key in [key for key in self._resilience if predicate(key)]:
+                del self._resilience[key]
+            for key in [key for key in self._validators if predicate(key)]:
+                del self._validators[key]
+        for session in sessions:
+            session.close()
+        for session in async_sessions:
+            session.close_soon()
+
+    def _levels(self, api_name, environment, tenant):
+        api_config: dict = self._apis_config.get(api_name, {})
+        env_config: dict = api_config.get("environments", {}).get(environment, {})
+        tenant_config: dict = env_config.get("tenants", {}).get(tenant, {})
+        return api_config, env_config, tenant_config
+
+    def _merged(self, levels, section):
+        # More specific levels override the settings of the broader ones
+        return {key: value for level in levels for key, value in level.get(section, {}).items()}
+
+    def _resilience_for(self, key, levels):
+        """Rate limit and breaker state of a tenant, created once and shared by its sessions. Called under the lock."""
+        from apis.Resilience import resilience_from_config
+        if key not in self._resilience:
+            self._resilience[key] = resilience_from_config(self._merged(levels, "resilience"))
+        return self._resilience[key]
+
+    def _validators_for(self, key):
+        """ETag/Last-Modified store of a tenant, shared by its threaded and async sessions. Called under the lock."""
+        from apis.Http import ValidatorStore
+        if key not in self._validators:
+            self._validators[key] = ValidatorStore()
+        return self._validators[key]
+
+    def _auth(self, levels):
+        from apis.Secrets import resolve_secret
+        tenant_config = levels[2]
+        if not tenant_config.get("id"):
+            return None
+        # Only now, for a tenant actually being called, are its credentials loaded
+        return resolve_secret(tenant_config["id"]), resolve_secret(tenant_config.get("secret"))
+
+    def _create_session(self, api_name, environment, tenant):
+        import requests # Imported here so loading the decorators stays cheap
+        from apis.Cassette import cassette_library
+        from apis.Http import PooledAdapter
+
+        levels = self._levels(api_name, environment, tenant)
+        pool_config = self._merged(levels, "pool")
+        adapter = PooledAdapter(
+            pool_connections=pool_config.get("connections", DEFAULT_POOL_CONNECTIONS),
+            pool_maxsize=pool_config.get("maxsize", DEFAULT_POOL_MAXSIZE),
+            pool_block=pool_config.get("block", False),
+            resilience=self._resilience_for((api_name, environment, tenant), levels),
+            cassette=cassette_library.cassette(api_name, environment, tenant), # None unless recording or replaying
+            validators=self._validators_for((api_name, environment, tenant)),
+        )
+        session = requests.Session()
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+
+        for level in levels:
+            session.headers.update(level.get("headers", {}))
+        auth = self._auth(levels)
+        if auth is not None:
+            session.auth = auth
+        return session
+
+    def _create_async_session(self, loop, api_name, environment, tenant):
+        from requests.structures import CaseInsensitiveDict
+        from apis.AsyncHttp import AsyncSession # Imports aiohttp, an optional dependency
+        from apis.Cassette import cassette_library
+
+        levels = self._levels(api_name, environment, tenant)
+        headers = CaseInsensitiveDict() # Merged like requests.Session.headers: "accept" overrides "Accept"
+        for level in levels:
+            headers.update(level.get("headers", {}))
+        return AsyncSession(
+            loop, dict(headers.items()), self._auth(levels), self._merged(levels, "pool"),
+            resilience=self._resilience_for((api_name, environment, tenant), levels),
+            cassette=cassette_library.cassette(api_name, environment, tenant),
+            validators=self._validators_for((api_name, environment, tenant)),
+        )
+
+session_registry = SessionRegistry()
+
+def _bind(self, environment, tenant):
+    """Targets the API instance at an environment/tenant from config.json."""
+    self.environment = environment
+    self.tenant = tenant
+
+def _session(self):
+    return session_registry.get(self._api_class_name, self.environment, self.tenant)
+
+def _async_session(self):
+    return session_registry.get_async(self._api_class_name, self.environment, self.tenant)
+
+def api_class(api_name: str):
+    """Decorator to mark a class as an API class."""
+    def class_wrapper(cls):
+        setattr(cls, '_api_class_name', api_name)
+        # Every instance starts unbound and gets its pooled session through `self.session` (`self.async_session` in async calls)
+        cls.environment = None
+        cls.tenant = None
+        cls.bind = _bind
+        cls.session = property(_session)
+        cls.async_session = property(_async_session)
+        api_registry.register(api_name, cls)
+        return cls
+    return class_wrapper
+
+def api_call(func=None, *, cache_ttl=None):
+    """
+    Decorator to mark a method as an API call.
+    Use as `@api_call`, or `@api_call(cache_ttl=seconds)` to cache results per API/environment/tenant/arguments.
+    `async def` methods become async API calls (awaited, see _async_api_call).
+    """
+    if func is None:
+        return lambda f: api_call(f, cache_ttl=cache_ttl)
+
+    if inspect.iscoroutinefunction(func):
+        return _mark_api_call(_async_api_call(func, cache_ttl), func, cache_ttl)
+    call_name = func.__name__
+    if cache_ttl is None:
+        invoke = func
+    else:
+        signature = inspect.signature(func) # Once per decorated function; binding to it normalizes the cache key
+        def invoke(self, *args, **kwargs):
+            key = make_key(self, call_name, args, kwargs, signature)
+            return response_cache.get_or_load(key, cache_ttl, lambda: func(self, *args, **kwargs))
+
+    thread_local = call_metrics.local
+    sub_bits, shift_base = SUB_BUCKET_BITS, SUB_BUCKET_BITS + 1 # The histogram resolution, bound as closure variables
+
+    @functools.wraps(func)
+    def wrapper(self, *args, **kwargs):
+        if not call_metrics.enabled:
+            return invoke(self, *args, **kwargs)
+        # Kept inline: this runs on every call, so it avoids helper calls and locks (CallStats.add() is inlined too)
+        try:
+            state = thread_local.state
+        except AttributeError: # First instrumented call on this thread
+            state = call_metrics.thread_state()
+        previous = state.record
+        state.record = None
+        error = True
+        result = None
+        start = perf_counter_ns()
+        try:
+            result = invoke(self, *args, **kwargs)
+            error = result is None # API classes report handled failures by returning None
+            return result
+        except BaseException as e:
+            error = e # Truthy, and the history keeps its message
+            raise
+        finally:
+            wall_ns = perf_counter_ns() - start
+            record, state.record = state.record, previous
+            labels = (self._api_class_name, self.environment, self.tenant, call_name)
+            stats = state.stats.get(labels)
+            if stats is None:
+                stats = state.stats[labels] = CallStats()
+            shift = wall_ns.bit_length() - shift_base # _bucket_index() of apis/Metrics.py, inlined
+            index = wall_ns if shift <= 0 else (shift << sub_bits) + (wall_ns >> shift)
+            buckets = stats.wall_buckets
+            buckets[index] = buckets.get(index, 0) + 1
+            stats.wall_total_ns += wall_ns
+            if wall_ns > stats.wall_max_ns:
+                stats.wall_max_ns = wall_ns
+            if error:
+                stats.errors += 1
+            if record is not None:
+                stats.add_record(record)
+            if run_history.enabled: # Queues a tuple with the result; the history writer thread digests and stores it
+                run_history.record_call(labels[0], labels[1], labels[2], call_name, wall_ns, error, record, result)
+    return _mark_api_call(wrapper, func, cache_ttl)
+
+def _async_api_call(func, cache_ttl):
+    """
+    Wrapper of an `async def` API call, with the same caching, metrics and history as the threaded one. Calls share
+    their event loop's thread, so each keeps its CallRecord in a context variable (one per asyncio task) instead of
+    the thread state; the totals still go into that thread's stats.
+    """
+    call_name = func.__name__
+    if cache_ttl is None:
+        invoke = func
+    else:
+        signature = inspect.signature(func)
+        async def invoke(self, *args, **kwargs):
+            key = make_key(self, call_name, args, kwargs, signature)
+            return await response_cache.get_or_load_async(key, cache_ttl, lambda: func(self, *args, **kwargs))
+
+    task_record = call_metrics.task_record
+
+    @functools.wraps(func)
+    async def wrapper(self, *args, **kwargs):
+        if not call_metrics.enabled:
+            return await invoke(self, *args, **kwargs)
+        token = task_record.set(CallRecord())
+        error = True
+        result = None
+        start = perf_counter_ns()
+        try:
+            result = await invoke(self, *args, **kwargs)
+            error = result is None
+            return result
+        except BaseException as e: # Cancellation included
+            error = e
+            raise
+        finally:
+            wall_ns = perf_counter_ns() - start
+            record = task_record.get()
+            task_record.reset(token)
+            labels = (self._api_class_name, self.environment, self.tenant, call_name)
+            stats_by_label = call_metrics.thread_state().stats
+            stats = stats_by_label.get(labels)
+            if stats is None:
+                stats = stats_by_label[labels] = CallStats()
+            stats.add(wall_ns, error, record)
+            if run_history.enabled:
+                run_history.record_call(labels[0], labels[1], labels[2], call_name, wall_ns, error, record, result)
+    return wrapper
+
+def _mark_api_call(wrapper, func, cache_ttl):
+    wrapper._is_api_call = True # type: ignore[attr-defined] # Attribute to identify marked methods
+    wrapper._is_async = inspect.iscoroutinefunction(func) # type: ignore[attr-defined] # Awaited on an event loop (engine/AsyncLoop.py)
+    wrapper._call_spec = CallSpec.from_function(func) # type: ignore[attr-defined] # Signature captured once for the registry
+    wrapper._cache_ttl = cache_ttl # type: ignore[attr-defined]
+    return wrapper
+
+async def gather_bounded(awaitables, limit: int):
+    """
+    Awaits all of `awaitables` with at most `limit` of them running at once, e.g. the requests of an async API call
+    fanning out over thousands of key paths. Results come back in order, exceptions in place of failed results.
+    """
+    import asyncio
+    semaphore = asyncio.Semaphore(limit)
+    async def bounded(awaitable):
+        async with semaphore:
+            return await awaitable
+    return await asyncio.gather(*(bounded(awaitable) for awaitable in awaitables), return_exceptions=True)
+
+# A context variable so each thread, and each asyncio task, reports to its own dispatcher
+_progress_callback = contextvars.ContextVar("ae_progress_callback", default=None)
+
+def report_progress(message: str):
+    """Reports progress from inside an @api_call to whoever dispatched it (no-op when called directly)."""
+    callback = _progress_callback.get()
+    if callback is not None:
+        callback(message)
+
+def set_progress_callback(callback):
+    """Installs the progress callback of the current thread (or asyncio task); returns the previous one."""
+    previous = _progress_callback.get()
+    _progress_callback.set(callback)
+    return previous
@@ -0,0 +1,71 @@
+"""
+Reproducible benchmark suite for the API call path, driven against the local stand-in server.
+Run from the repository root: `python -m benchmarks.BenchSuite [--latency-ms 2] [--replay] [--json results.json]`.
+Every scenario uses fixed request counts and a fixed injected latency, so runs are comparable across commits.
+With --replay the request is recorded once and then answered from a cassette, which measures the engine alone.
+"""
+import sys, json, shutil, argparse, tempfile, contextlib, io
+from apis.Cassette import cassette_library
+from engine.Bench import run_benchmark
+from engine.Config import apply_config, load_config, create_api_instance
+from engine.StandInServer import StandInServer
+
+# (name, bench options)
+SCENARIOS = [
+    ("serial", {"iterations": 200, "concurrency": 1}),
+    ("concurrency-8", {"iterations": 1000, "concurrency": 8}),
+    ("concurrency-32", {"iterations": 2000, "concurrency": 32}),
+    ("rate-200rps", {"iterations": 400, "concurrency": 16, "rate": 200}),
+    ("cached-concurrency-8", {"iterations": 5000, "concurrency": 8, "use_cache": True}),
+]
+
+def run_suite(latency_ms=2.0, records=10, api_name="ExampleAPI", call_name="call_get_data", replay=False):
+    server = StandInServer(port=0, latency=latency_ms / 1000, records=records).start() # Port 0: any free port
+    cassette_dir = tempfile.mkdtemp(prefix="ae-bench-") if replay else None
+    try:
+        config_data = load_config()
+        if replay:
+            config_data["transport"] = {"mode": "record", "path": cassette_dir}
+        apply_config(config_data)
+        environment = next(iter(config_data["apis"][api_name]["environments"]))
+        api_instance = create_api_instance(config_data, api_name, environment)
+        api_instance.base_url = server.url
+        method = getattr(api_instance, call_name)
+        if replay:
+            with contextlib.redirect_stdout(io.StringIO()):
+                method(key_path="bench")
+            config_data["transport"] = {"mode": "replay", "path": cassette_dir}
+            apply_config(config_data) # Flushes the recording; every scenario below runs without network access
+        results = []
+        for name, options in SCENARIOS:
+            with contextlib.redirect_stdout(io.StringIO()): # The example APIs print every response
+                result = run_benchmark(lambda: method(key_path="bench"), call_name, **options)
+            results.append((name, result))
+        return results
+    finally:
+        server.stop()
+        if cassette_dir:
+            cassette_library.close()
+            shutil.rmtree(cassette_dir, ignore_errors=True)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--latency-ms", type=float, default=2.0, help="Latency injected by the stand-in server")
+    parser.add_argument("--records", type=int, default=10, help="Items per response payload")
+    parser.add_argument("--replay", action="store_true", help="Answer requests from a cassette to measure the engine's own overhead")
+    parser.add_argument("--json", help="Also write the results to this file")
+    args = parser.parse_args(argv)
+
+    results = run_suite(args.latency_ms, args.records, replay=args.replay)
+    print(f"{'scenario':<22}{'req':>7}{'err':>5}{'req/s':>10}{'p50 ms':>9}{'p90 ms':>9}{'p99 ms':>9}{'max ms':>9}")
+    for name, result in results:
+        latency = result.histogram.summary_ms()
+        print(f"{name:<22}{result.count:>7}{result.errors:>5}{result.throughput:>10.1f}"
+              f"{latency['p50']:>9}{latency['p90']:>9}{latency['p99']:>9}{latency['max']:>9}")
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({name: result.to_dict() for name, result in results}, f, indent=2)
+    return 0 if all(result.errors == 0 for _, result in results) else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,128 @@
+"""
+Rendering benchmark for the blueprint canvas: builds generated flows of increasing size and times frames while panning.
+It also times opening each flow from a saved file: reading it, building the model and showing the first frame.
+Run from the repository root: `python -m benchmarks.BlueprintRender [--nodes 100 1000 10000] [--frames 60] [--json results.json]`.
+Without a display it renders offscreen; frame times then reflect the raster paint engine only.
+"""
+import os, sys, json, time, argparse, tempfile
+
+if not os.environ.get("QT_QPA_PLATFORM") and not os.environ.get("DISPLAY") and sys.platform.startswith("linux"):
+    os.environ["QT_QPA_PLATFORM"] = "offscreen"
+
+from PySide6.QtWidgets import QApplication
+from PySide6.QtCore import QPointF
+from GUI.Viewports.BlueprintViewport import BlueprintViewport
+from engine.Graph import Blueprint, read_flow, write_flow
+
+NODE_COUNTS = [100, 1000, 10000]
+# (name, view scale); None fits the whole flow into the view
+ZOOM_LEVELS = [("detail", 1.0), ("overview", 0.3), ("fit", None)]
+CALL_NAMES = ["call_get_data", "call_tavi_akol", "call_update_record", "call_list_users"]
+ROWS = 50
+COLUMN_SPACING = 220
+ROW_SPACING = 90
+VIEW_SIZE = (1280, 800)
+
+def build_flow(viewport, node_count, rows=ROWS):
+    """Grid of nodes in columns of `rows`, each wired to the node in the same row of the previous column."""
+    items = []
+    with viewport.bulk_edit():
+        for index in range(node_count):
+            column, row = divmod(index, rows)
+            position = QPointF(column * COLUMN_SPACING, row * ROW_SPACING)
+            items.append(viewport.add_node(CALL_NAMES[index % len(CALL_NAMES)], position))
+        for index in range(rows, node_count):
+            viewport.connect_nodes(items[index - rows], items[index])
+    return items
+
+def measure_load(app, viewport, node_count, rows=ROWS):
+    """Saves the generated flow to a file, then times opening it: read, model, items near the view, first frame."""
+    blueprint = Blueprint()
+    ids = []
+    for index in range(node_count):
+        column, row = divmod(index, rows)
+        ids.append(blueprint.add_node(CALL_NAMES[index % len(CALL_NAMES)], None, column * COLUMN_SPACING, row * ROW_SPACING).id)
+    for index in range(rows, node_count):
+        blueprint.connect(ids[index - rows], ids[index])
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "flow.json")
+        write_flow(path, blueprint.to_columns())
+        start = time.perf_counter()
+        viewport.load_blueprint(Blueprint.from_dict(read_flow(path)))
+        viewport.viewport().repaint()
+        app.processEvents()
+        return (time.perf_counter() - start) * 1000
+
+def measure_frames(app, viewport, frames):
+    """Pans across the scene one step per frame and returns each synchronous repaint's duration in ms."""
+    scroll_bar = viewport.horizontalScrollBar()
+    span = max(1, scroll_bar.maximum() - scroll_bar.minimum())
+    step = max(1, min(span // max(1, frames), 40))
+    timings = []
+    for frame in range(frames):
+        scroll_bar.setValue(scroll_bar.minimum() + (frame * step) % (span + 1))
+        app.processEvents()
+        start = time.perf_counter()
+        viewport.viewport().repaint()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+def frame_summary(timings):
+    ordered = sorted(timings)
+    mean = sum(ordered) / len(ordered)
+    return {
+        "frames": len(ordered),
+        "fps": round(1000 / mean, 1) if mean else None,
+        "mean_ms": round(mean, 3),
+        "p50_ms": round(ordered[len(ordered) // 2], 3),
+        "p95_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 3),
+        "max_ms": round(ordered[-1], 3),
+    }
+
+def run_suite(node_counts=NODE_COUNTS, frames=60):
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+    results = []
+    for node_count in node_counts:
+        viewport = BlueprintViewport()
+        viewport.resize(*VIEW_SIZE)
+        viewport.show()
+        load_ms = measure_load(app, viewport, node_count)
+        viewport.clear()
+        start = time.perf_counter()
+        build_flow(viewport, node_count)
+        app.processEvents()
+        build_ms = (time.perf_counter() - start) * 1000
+        for zoom_name, scale in ZOOM_LEVELS:
+            viewport.resetTransform()
+            if scale is None:
+                viewport.fitInView(viewport.scene().itemsBoundingRect())
+            else:
+                viewport.scale(scale, scale)
+            viewport.repaint() # Warm-up frame at this zoom
+            summary = frame_summary(measure_frames(app, viewport, frames))
+            summary.update({"nodes": node_count, "zoom": zoom_name, "build_ms": round(build_ms, 1), "load_ms": round(load_ms, 1)})
+            results.append(summary)
+        viewport.close()
+        viewport.deleteLater()
+        app.processEvents()
+    return results
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--nodes", type=int, nargs="+", default=NODE_COUNTS, help="Node counts to render")
+    parser.add_argument("--frames", type=int, default=60, help="Frames timed per zoom level")
+    parser.add_argument("--json", help="Also write the results to this file")
+    args = parser.parse_args(argv)
+
+    results = run_suite(args.nodes, args.frames)
+    print(f"{'nodes':>7}  {'zoom':<10}{'build ms':>10}{'load ms':>9}{'fps':>9}{'mean ms':>9}{'p50 ms':>9}{'p95 ms':>9}{'max ms':>9}")
+    for result in results:
+        print(f"{result['nodes']:>7}  {result['zoom']:<10}{result['build_ms']:>10}{result['load_ms']:>9}{result['fps']:>9}"
+              f"{result['mean_ms']:>9}{result['p50_ms']:>9}{result['p95_ms']:>9}{result['max_ms']:>9}")
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,71 @@
+import atexit, asyncio, threading
+
+class AsyncLoop:
+    """
+    The process-wide asyncio event loop that async @api_calls run on, on a daemon thread started on first use.
+    The GUI could run asyncio on Qt's own loop (PySide6.QtAsyncio) instead, but headless runs, bench and matrix workers
+    have no Qt loop, and API code that parses a large body between awaits would then freeze the window. So every front
+    end shares this one loop thread: the GUI submits coroutines here and gets the outcome back the way it does from
+    worker threads, through callbacks that emit queued signals. The one thread carries thousands of concurrent requests
+    where the worker pools would need a thread each.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._loop = None
+        self._thread = None
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        loop = self._loop
+        if loop is None:
+            with self._lock:
+                if self._loop is None:
+                    started = threading.Event()
+                    self._thread = threading.Thread(target=self._serve, args=(started,), name="ae-asyncio", daemon=True)
+                    self._thread.start()
+                    started.wait()
+                loop = self._loop
+        return loop
+
+    def submit(self, coroutine):
+        """Schedules the coroutine on the loop from any thread; returns a concurrent.futures.Future (cancel() cancels the task)."""
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop)
+
+    def run(self, coroutine, timeout=None):
+        """Runs the coroutine on the loop and blocks until it's done; for threads that aren't the loop's."""
+        if self._thread is not None and threading.current_thread() is self._thread:
+            coroutine.close()
+            raise RuntimeError("AsyncLoop.run() would block the event loop it waits on; await the coroutine instead")
+        return self.submit(coroutine).result(timeout)
+
+    def stop(self):
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            self._loop = self._thread = None
+        if loop is None:
+            return
+        from apis.Utils import session_registry
+        sessions = session_registry.pop_async_sessions(loop)
+        if sessions:
+            async def close_sessions():
+                await asyncio.gather(*(session.close() for session in sessions), return_exceptions=True)
+            try:
+                asyncio.run_coroutine_threadsafe(close_sessions(), loop).result(timeout=5)
+            except Exception as e:
+                print(f"Closing async sessions failed: {type(e).__name__}: {e}")
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(timeout=5)
+
+    def _serve(self, started):
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        self._loop = loop
+        started.set()
+        try:
+            loop.run_forever()
+        finally:
+            loop.run_until_complete(loop.shutdown_asyncgens())
+            loop.close()
+
+async_loop = AsyncLoop()
+atexit.register(async_loop.stop)
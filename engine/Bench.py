@@ -0,0 +1,162 @@
+import time, threading, itertools, contextlib
+from apis.Cache import bypass_cache
+from apis.History import run_history
+from apis.Metrics import LatencyHistogram
+
+class BenchResult:
+    def __init__(self, call_name, concurrency, rate):
+        self.call_name = call_name
+        self.concurrency = concurrency
+        self.rate = rate
+        self.histogram = LatencyHistogram()
+        self.errors = 0
+        self.elapsed = 0.0
+        self.first_error = None
+
+    @property
+    def count(self):
+        return self.histogram.count
+
+    @property
+    def throughput(self):
+        return self.count / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def error_rate(self):
+        return self.errors / self.count if self.count else 0.0
+
+    def to_dict(self):
+        return {
+            "call": self.call_name,
+            "requests": self.count,
+            "errors": self.errors,
+            "error_rate": round(self.error_rate, 4),
+            "elapsed_s": round(self.elapsed, 3),
+            "throughput_rps": round(self.throughput, 1),
+            "concurrency": self.concurrency,
+            "target_rps": self.rate,
+            "latency_ms": self.histogram.summary_ms(),
+            "first_error": self.first_error,
+        }
+
+    def report_lines(self):
+        latency = self.histogram.summary_ms()
+        lines = [
+            f"bench {self.call_name}: {self.count} requests in {self.elapsed:.2f}s, concurrency {self.concurrency}"
+            + (f", target {self.rate:g} req/s" if self.rate else ""),
+            f"  throughput {self.throughput:.1f} req/s, errors {self.errors} ({self.error_rate:.2%})",
+            f"  latency ms  p50 {latency['p50']}  p90 {latency['p90']}  p99 {latency['p99']}  max {latency['max']}  mean {latency['mean']}",
+        ]
+        if self.first_error:
+            lines.append(f"  first error: {self.first_error}")
+        return lines
+
+def run_benchmark(func, call_name="call", iterations=None, duration=None, concurrency=1, rate=None, use_cache=False, stop_event=None,
+                  asynchronous=False):
+    """
+    Calls func() `iterations` times or for `duration` seconds from `concurrency` threads.
+    With `rate` (req/s) requests start on a fixed schedule and latency is measured from the scheduled start,
+    so a slow server shows up as latency instead of silently lowering the load (no coordinated omission).
+    An exception or a None result counts as an error, matching how API classes report failures.
+    With `asynchronous` func() returns a coroutine (an async @api_call) and the workers are `concurrency` tasks on the
+    shared event loop, so thousands of requests can be kept in flight.
+    """
+    if iterations is None and duration is None:
+        raise ValueError("Give iterations, duration or both")
+    if concurrency < 1:
+        raise ValueError("concurrency must be at least 1")
+    result = BenchResult(call_name, concurrency, rate)
+    tickets = itertools.count() # next() is atomic under the GIL, no lock needed
+    histograms = [LatencyHistogram() for _ in range(concurrency)] # One per worker, merged at the end
+    errors = [0] * concurrency
+    first_errors = []
+    start = time.perf_counter()
+    deadline = start + duration if duration else None
+    interval = 1.0 / rate if rate else 0.0
+
+    def next_request():
+        """(scheduled start, seconds to wait for it) of the next request, or None once the run is over."""
+        ticket = next(tickets)
+        if iterations is not None and ticket >= iterations:
+            return None
+        if stop_event is not None and stop_event.is_set():
+            return None
+        now = time.perf_counter()
+        wait = 0.0
+        if rate:
+            scheduled = start + ticket * interval
+            wait = max(0.0, scheduled - now)
+            now = scheduled
+        if deadline is not None and now >= deadline:
+            return None
+        return now, wait
+
+    def finished(slot, scheduled, ok, error=None):
+        if error is not None and not first_errors:
+            first_errors.append(f"{type(error).__name__}: {error}")
+        histograms[slot].record_ns(int((time.perf_counter() - scheduled) * 1e9))
+        if not ok:
+            errors[slot] += 1
+
+    def worker(slot):
+        run_history.set_suppressed(True) # Load-test calls would swamp the run history; the bench result is the record
+        with (contextlib.nullcontext() if use_cache else bypass_cache()):
+            while True:
+                request = next_request()
+                if request is None:
+                    return
+                scheduled, wait = request
+                if wait:
+                    time.sleep(wait)
+                try:
+                    finished(slot, scheduled, func() is not None)
+                except Exception as e:
+                    finished(slot, scheduled, False, e)
+
+    async def async_worker(slot):
+        import asyncio
+        run_history.set_suppressed(True) # Per task, like the thread-local setting of a worker thread
+        with (contextlib.nullcontext() if use_cache else bypass_cache()):
+            while True:
+                request = next_request()
+                if request is None:
+                    return
+                scheduled, wait = request
+                if wait:
+                    await asyncio.sleep(wait)
+                try:
+                    finished(slot, scheduled, await func() is not None)
+                except Exception as e:
+                    finished(slot, scheduled, False, e)
+
+    if asynchronous:
+        import asyncio
+        from engine.AsyncLoop import async_loop
+        async def run_workers():
+            await asyncio.gather(*(async_worker(slot) for slot in range(concurrency)))
+        async_loop.run(run_workers())
+    else:
+        threads = [threading.Thread(target=worker, args=(slot,), name=f"ae-bench-{slot}", daemon=True) for slot in range(concurrency)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    result.elapsed = time.perf_counter() - start
+    for histogram in histograms:
+        result.histogram.merge(histogram)
+    result.errors = sum(errors)
+    result.first_error = first_errors[0] if first_errors else None
+    return result
+
+BENCH_OPTIONS = ("n", "duration", "concurrency", "rate", "cache")
+
+def split_bench_options(kwargs: dict):
+    """Separates bench options (n, duration, concurrency, rate, cache) from the call's own parameters."""
+    options = {key: kwargs.pop(key) for key in BENCH_OPTIONS if key in kwargs}
+    return {
+        "iterations": int(options["n"]) if "n" in options else (None if "duration" in options else 100),
+        "duration": float(options["duration"]) if "duration" in options else None,
+        "concurrency": int(options.get("concurrency", 1)),
+        "rate": float(options["rate"]) if "rate" in options else None,
+        "use_cache": options.get("cache") in (True, "on", "true", 1),
+    }, kwargs
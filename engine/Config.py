@@ -0,0 +1,89 @@
+import os, sys
+from apis.Cache import response_cache
+from apis.Cassette import cassette_library
+from apis.History import run_history
+from apis.Metrics import call_metrics
+from apis.Registry import api_registry
+from apis.Secrets import clear_secret_cache
+from apis.Utils import session_registry
+from engine.ConfigModel import ConfigModel
+from engine.Memo import node_memo
+
+def data_dir():
+    """Folder holding config.json, both from source and inside a PyInstaller bundle."""
+    bundle_dir = getattr(sys, "_MEIPASS", None)
+    if bundle_dir:
+        return os.path.join(bundle_dir, "data")
+    return os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data"))
+
+DEFAULT_CONFIG_PATH = os.path.join(data_dir(), "config.json")
+DEFAULT_MANIFEST_PATH = os.path.join(data_dir(), "api_manifest.json")
+
+def load_config(config_path=DEFAULT_CONFIG_PATH) -> dict:
+    """
+    Reads and validates config.json; raises FileNotFoundError / json.JSONDecodeError like json.load does, or ConfigError.
+    Entries that don't validate are reported on stderr and left out.
+    """
+    return load_config_model(config_path).data
+
+def load_config_model(config_path=DEFAULT_CONFIG_PATH) -> ConfigModel:
+    model = ConfigModel.load(config_path)
+    for problem in model.problems:
+        print(f"config.json: {problem}", file=sys.stderr)
+    return model
+
+def apply_config(config_data: dict):
+    """Pushes the runtime sections of config.json to the shared session registry, caches and run history."""
+    cassette_library.configure(config_data.get("transport", {}))
+    session_registry.configure(config_data)
+    response_cache.configure(config_data.get("cache", {}))
+    node_memo.configure(config_data.get("memo", {}))
+    call_metrics.enabled = config_data.get("metrics", {}).get("enabled", True)
+    run_history.configure(config_data.get("history", {}))
+
+def apply_config_diff(config_data: dict, diff):
+    """
+    Like apply_config for a reloaded config.json, but only touches what the ConfigDiff says changed: sessions outside
+    diff.stale_sessions keep their open connections, and the cache/metrics/history keep their state.
+    """
+    if "transport" in diff.sections: # Every session switches between live, recording and replaying
+        cassette_library.configure(config_data.get("transport", {}))
+        session_registry.configure(config_data)
+        response_cache.invalidate()
+    else:
+        session_registry.configure(config_data, stale=diff.stale_sessions)
+    if "cache" in diff.sections:
+        response_cache.configure(config_data.get("cache", {}))
+    if "memo" in diff.sections:
+        node_memo.configure(config_data.get("memo", {}))
+    elif diff.stale_sessions:
+        node_memo.clear() # Outputs may depend on the headers/credentials that changed
+    if "metrics" in diff.sections:
+        call_metrics.enabled = config_data.get("metrics", {}).get("enabled", True)
+    if "history" in diff.sections:
+        run_history.configure(config_data.get("history", {}))
+    clear_secret_cache() # Referenced env vars/files/keyring entries are read again by the next session created
+
+def write_stats(path: str):
+    """Writes the call metrics snapshot as Prometheus text (.prom/.txt) or JSON (anything else)."""
+    text = call_metrics.to_prometheus() if path.endswith((".prom", ".txt")) else call_metrics.to_json()
+    with open(path, 'w') as f:
+        f.write(text)
+
+def create_api_instance(config_data: dict, api_name: str, environment=None, tenant=None):
+    """Imports and instantiates the API class configured under `api_name`, bound to environment/tenant."""
+    api_config = config_data.get("apis", {}).get(api_name)
+    if not api_config or "module" not in api_config or "class" not in api_config:
+        raise KeyError(f"Configuration for API '{api_name}' is missing module/class details.")
+    instance = api_registry.resolve_config(api_config).cls()
+    instance.bind(environment, tenant)
+    return instance
+
+def build_manifest(config_data: dict, manifest_path=DEFAULT_MANIFEST_PATH):
+    """Imports every configured API once and records its calls, so later startups can list them without importing."""
+    specs = {}
+    for api_config in config_data.get("apis", {}).values():
+        spec = api_registry.resolve_config(api_config)
+        specs[(spec.module, spec.class_name)] = spec
+    api_registry.write_manifest(manifest_path, specs.values())
+    return list(specs.values())
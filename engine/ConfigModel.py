@@ -0,0 +1,229 @@
+import json
+from apis.Cassette import MODES as TRANSPORT_MODES
+from apis.Secrets import secret_problem
+
+RUNTIME_SECTIONS = ("execution", "output", "cache", "memo", "metrics", "history", "matrix", "transport")
+_SETTINGS_OBJECTS = ("pool", "resilience", "headers") # Allowed at API, environment and tenant level
+
+class ConfigError(ValueError):
+    """config.json can't be used at all (as opposed to single entries being skipped)."""
+
+class TenantEntry:
+    __slots__ = ("name", "data")
+    def __init__(self, name, data):
+        self.name = name
+        self.data = data # Credentials stay unresolved here; see apis/Secrets.py
+
+class EnvironmentEntry:
+    __slots__ = ("name", "data", "tenants", "tenant_names")
+    def __init__(self, name, data, tenants):
+        self.name = name
+        self.data = data
+        self.tenants = tenants # name -> TenantEntry
+        self.tenant_names = tuple(sorted(tenants)) # Sorted once here, not on every combobox refresh
+
+class ApiEntry:
+    __slots__ = ("name", "data", "module", "class_name", "environments", "environment_names")
+    def __init__(self, name, data, environments):
+        self.name = name
+        self.data = data
+        self.module = data["module"]
+        self.class_name = data["class"]
+        self.environments = environments # name -> EnvironmentEntry
+        self.environment_names = tuple(sorted(environments))
+
+class ConfigModel:
+    """
+    Validated, indexed view of config.json. Entries that don't validate are left out and listed in `problems`;
+    `data` is the cleaned dict the runtime (sessions, cache, matrix, ...) reads.
+    """
+    def __init__(self, data: dict, apis: dict, problems: list):
+        self.data = data
+        self.apis = apis # name -> ApiEntry
+        self.api_names = tuple(sorted(apis))
+        self.problems = problems
+
+    @classmethod
+    def load(cls, config_path) -> "ConfigModel":
+        """Raises OSError, json.JSONDecodeError or ConfigError when the file can't be used at all."""
+        with open(config_path, 'r') as f:
+            return cls.from_data(json.load(f))
+
+    @classmethod
+    def empty(cls) -> "ConfigModel":
+        return cls({"apis": {}}, {}, [])
+
+    @classmethod
+    def from_data(cls, raw: dict) -> "ConfigModel":
+        if not isinstance(raw, dict):
+            raise ConfigError("config.json must hold a JSON object")
+        raw_apis = raw.get("apis", {})
+        if not isinstance(raw_apis, dict):
+            raise ConfigError("\"apis\" must be an object of API name -> settings")
+        problems = []
+        data = {}
+        for section, value in raw.items():
+            if section in RUNTIME_SECTIONS and not isinstance(value, dict):
+                problems.append(f"{section}: expected an object, section ignored")
+            elif section == "transport" and value.get("mode", "live") not in TRANSPORT_MODES:
+                problems.append(f"transport.mode: expected one of {', '.join(TRANSPORT_MODES)}, section ignored")
+            elif section != "apis":
+                data[section] = value
+        apis, data["apis"] = {}, {}
+        for api_name, api_data in raw_apis.items():
+            api_problems = []
+            entry = _api_entry(api_name, api_data, api_problems)
+            problems.extend(api_problems)
+            if entry is not None:
+                apis[api_name] = entry
+                data["apis"][api_name] = entry.data
+        return cls(data, apis, problems)
+
+    def api(self, api_name):
+        return self.apis.get(api_name)
+
+    def environment_names(self, api_name):
+        entry = self.apis.get(api_name)
+        return entry.environment_names if entry else ()
+
+    def tenant_names(self, api_name, environment):
+        entry = self.apis.get(api_name)
+        environment_entry = entry.environments.get(environment) if entry else None
+        return environment_entry.tenant_names if environment_entry else ()
+
+    def diff(self, new: "ConfigModel") -> "ConfigDiff":
+        """What changed from this config to `new`, down to the tenants whose sessions must be rebuilt."""
+        diff = ConfigDiff()
+        diff.sections = sorted(
+            section for section in set(self.data) | set(new.data)
+            if section != "apis" and self.data.get(section) != new.data.get(section)
+        )
+        diff.apis_added = sorted(set(new.apis) - set(self.apis))
+        diff.apis_removed = sorted(set(self.apis) - set(new.apis))
+        for name in diff.apis_removed:
+            diff.stale_sessions.append((name, None, None))
+        for name in set(self.apis) & set(new.apis):
+            old_api, new_api = self.apis[name], new.apis[name]
+            if old_api.data == new_api.data: # Most APIs: nothing below can differ either
+                continue
+            if (old_api.module, old_api.class_name) != (new_api.module, new_api.class_name):
+                diff.apis_reloaded.append(name)
+            if _settings(old_api.data, "environments") != _settings(new_api.data, "environments"):
+                diff.stale_sessions.append((name, None, None)) # API-wide pool/headers/resilience
+            added, removed = _added_removed(old_api.environments, new_api.environments)
+            if added or removed:
+                diff.environments[name] = (added, removed)
+            for environment in removed:
+                diff.stale_sessions.append((name, environment, None))
+            for environment in set(old_api.environments) & set(new_api.environments):
+                old_env, new_env = old_api.environments[environment], new_api.environments[environment]
+                if old_env.data == new_env.data:
+                    continue
+                if _settings(old_env.data, "tenants") != _settings(new_env.data, "tenants"):
+                    diff.stale_sessions.append((name, environment, None))
+                added, removed = _added_removed(old_env.tenants, new_env.tenants)
+                if added or removed:
+                    diff.tenants[(name, environment)] = (added, removed)
+                for tenant in set(old_env.tenants) & set(new_env.tenants) | set(removed):
+                    if tenant not in new_env.tenants or old_env.tenants[tenant].data != new_env.tenants[tenant].data:
+                        diff.stale_sessions.append((name, environment, tenant))
+        diff.apis_reloaded.sort()
+        return diff
+
+class ConfigDiff:
+    def __init__(self):
+        self.sections = [] # Changed top-level sections other than "apis"
+        self.apis_added = []
+        self.apis_removed = []
+        self.apis_reloaded = [] # module/class changed: instances of the old class are outdated
+        self.environments = {} # api -> (added, removed) for APIs in both configs
+        self.tenants = {} # (api, environment) -> (added, removed) for environments in both configs
+        self.stale_sessions = [] # (api, environment, tenant) scopes whose sessions must be rebuilt; None matches any
+
+    @property
+    def empty(self):
+        return not (self.sections or self.apis_added or self.apis_removed or self.apis_reloaded
+                    or self.environments or self.tenants or self.stale_sessions)
+
+    def summary(self):
+        parts = []
+        if self.apis_added or self.apis_removed:
+            parts.append(f"APIs +{len(self.apis_added)}/-{len(self.apis_removed)}")
+        if self.environments:
+            parts.append(f"environments +{sum(len(added) for added, _ in self.environments.values())}"
+                         f"/-{sum(len(removed) for _, removed in self.environments.values())}")
+        if self.tenants:
+            parts.append(f"tenants +{sum(len(added) for added, _ in self.tenants.values())}"
+                         f"/-{sum(len(removed) for _, removed in self.tenants.values())}")
+        if self.stale_sessions:
+            parts.append(f"{len(self.stale_sessions)} session scope(s) rebuilt")
+        if self.sections:
+            parts.append(f"sections: {', '.join(self.sections)}")
+        return "; ".join(parts) or "no changes"
+
+def _settings(data, child_key):
+    """An entry's own settings, without its children."""
+    return {key: value for key, value in data.items() if key != child_key}
+
+def _added_removed(old: dict, new: dict):
+    return sorted(set(new) - set(old)), sorted(set(old) - set(new))
+
+def _check_settings(data, path, problems):
+    for key in _SETTINGS_OBJECTS:
+        if key in data and not isinstance(data[key], dict):
+            problems.append(f"{path}.{key}: expected an object")
+            return False
+    return True
+
+def _api_entry(api_name, api_data, problems):
+    path = f"apis.{api_name}"
+    if not isinstance(api_data, dict):
+        problems.append(f"{path}: expected an object, API skipped")
+        return None
+    missing = [key for key in ("module", "class") if not isinstance(api_data.get(key), str) or not api_data.get(key)]
+    if missing:
+        problems.append(f"{path}: missing {' and '.join(missing)}, API skipped")
+        return None
+    if not _check_settings(api_data, path, problems):
+        problems[-1] += ", API skipped"
+        return None
+    raw_environments = api_data.get("environments") or {}
+    if not isinstance(raw_environments, dict):
+        problems.append(f"{path}.environments: expected an object, API skipped")
+        return None
+    environments, clean_environments = {}, {}
+    for environment, env_data in raw_environments.items():
+        env_path = f"{path}.environments.{environment}"
+        env_data = env_data or {} # `"staging": null` is an environment without settings or tenants
+        if not isinstance(env_data, dict):
+            problems.append(f"{env_path}: expected an object, environment skipped")
+            continue
+        if not _check_settings(env_data, env_path, problems):
+            problems[-1] += ", environment skipped"
+            continue
+        raw_tenants = env_data.get("tenants") or {}
+        if not isinstance(raw_tenants, dict):
+            problems.append(f"{env_path}.tenants: expected an object, environment skipped")
+            continue
+        tenants, clean_tenants = {}, {}
+        for tenant, tenant_data in raw_tenants.items():
+            tenant_path = f"{env_path}.tenants.{tenant}"
+            tenant_data = tenant_data or {}
+            if not isinstance(tenant_data, dict):
+                problems.append(f"{tenant_path}: expected an object, tenant skipped")
+                continue
+            if not _check_settings(tenant_data, tenant_path, problems):
+                problems[-1] += ", tenant skipped"
+                continue
+            credential_problems = [f"{key}: {secret_problem(tenant_data.get(key))}" for key in ("id", "secret")
+                                   if secret_problem(tenant_data.get(key))]
+            if credential_problems:
+                problems.append(f"{tenant_path}.{credential_problems[0]}, tenant skipped")
+                continue
+            tenants[tenant] = TenantEntry(tenant, tenant_data)
+            clean_tenants[tenant] = tenant_data
+        clean_env = {**env_data, "tenants": clean_tenants} if "tenants" in env_data else dict(env_data)
+        environments[environment] = EnvironmentEntry(environment, clean_env, tenants)
+        clean_environments[environment] = clean_env
+    clean_api = {**api_data, "environments": clean_environments}
+    return ApiEntry(api_name, clean_api, environments)
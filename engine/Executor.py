@@ -0,0 +1,167 @@
+import itertools, json, shlex, threading, time
+from concurrent.futures import ThreadPoolExecutor
+from apis.Utils import set_progress_callback
+
+DEFAULT_MAX_WORKERS = 8
+
+class CallCancelled(Exception):
+    """Raised for calls cancelled before their result was delivered."""
+
+class CallFailed(Exception):
+    """An @api_call returned None, which is how API calls report a failed request (after printing why)."""
+
+def parse_call_args(tokens):
+    """Turns shell tokens like `key_path=users/1 limit=5` into keyword arguments (JSON values when they parse)."""
+    kwargs = {}
+    for token in tokens:
+        key, sep, value = token.partition("=")
+        if not sep:
+            raise ValueError(f"Expected key=value, got '{token}'")
+        try:
+            kwargs[key] = json.loads(value)
+        except json.JSONDecodeError:
+            kwargs[key] = value
+    return kwargs
+
+def resolve_call(api_instance, call_name: str):
+    """
+    Returns the bound @api_call method `call_name` of the instance, or else the built-in node type of that name
+    ("extract", "assert"; see engine/Extract.py), which works on its input instead of calling the API.
+    """
+    method = getattr(api_instance, call_name, None)
+    if method is None or not getattr(method, "_is_api_call", False):
+        from engine.Extract import NODE_TYPES # Only loaded once a flow uses one
+        node_type = NODE_TYPES.get(call_name)
+        if node_type is None:
+            raise AttributeError(f"'{type(api_instance).__name__}' has no API call '{call_name}'")
+        return node_type
+    return method
+
+def call_method(method, kwargs):
+    """Calls a bound @api_call to completion from a thread; async ones run on the shared event loop (engine/AsyncLoop.py)."""
+    if getattr(method, "_is_async", False):
+        from engine.AsyncLoop import async_loop # asyncio is only loaded once an async call is made
+        return async_loop.run(method(**kwargs))
+    return method(**kwargs)
+
+def split_command(command: str):
+    """Splits a shell command into (name, args) honoring quotes."""
+    try:
+        tokens = shlex.split(command)
+    except ValueError: # Unbalanced quotes, e.g. `echo don't`
+        tokens = command.split()
+    return (tokens[0].lower(), tokens[1:]) if tokens else ("", [])
+
+class CallExecutor:
+    """
+    Runs @api_call invocations on a bounded worker pool; async calls run as tasks on the shared event loop instead,
+    where they take no worker and cancel() really interrupts them.
+    Listener callbacks are invoked from worker threads: on_started(call_id, name), on_progress(call_id, message),
+    on_finished(call_id, name, result, elapsed), on_failed(call_id, name, error) and on_cancelled(call_id, name).
+    """
+    def __init__(self, max_workers=DEFAULT_MAX_WORKERS, listener=None):
+        self.max_workers = max_workers
+        self.listener = listener
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ae-call")
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._calls = {} # call_id -> (name, future, cancel_event)
+
+    def set_max_workers(self, max_workers: int):
+        # ThreadPoolExecutor can't be resized; calls already running finish on the old pool
+        if max_workers < 1:
+            raise ValueError("max_workers must be at least 1")
+        old_pool = self._pool
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ae-call")
+        self.max_workers = max_workers
+        old_pool.shutdown(wait=False)
+
+    def submit(self, api_instance, call_name: str, kwargs=None) -> int:
+        method = resolve_call(api_instance, call_name)
+        call_id = next(self._ids)
+        cancel_event = threading.Event()
+        with self._lock:
+            if getattr(method, "_is_async", False):
+                from engine.AsyncLoop import async_loop
+                future = async_loop.submit(self._run_async(call_id, call_name, method, kwargs or {}, cancel_event))
+            else:
+                future = self._pool.submit(self._run, call_id, call_name, method, kwargs or {}, cancel_event)
+            self._calls[call_id] = (call_name, future, cancel_event)
+        return call_id
+
+    def cancel(self, call_id: int) -> bool:
+        """Cancels a queued call, or discards the result of a running one. Returns False for unknown ids."""
+        with self._lock:
+            entry = self._calls.get(call_id)
+        if entry is None:
+            return False
+        call_name, future, cancel_event = entry
+        cancel_event.set()
+        if future.cancel(): # Never started (or an async call, whose task now gets cancelled), so it won't report it
+            self._forget(call_id)
+            self._notify("on_cancelled", call_id, call_name)
+        return True
+
+    def cancel_all(self) -> int:
+        with self._lock:
+            call_ids = list(self._calls)
+        return sum(self.cancel(call_id) for call_id in call_ids)
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
+
+    def shutdown(self, wait=False):
+        self.cancel_all()
+        self._pool.shutdown(wait=wait, cancel_futures=True)
+
+    def _run(self, call_id, call_name, method, kwargs, cancel_event):
+        if cancel_event.is_set(): # Cancelled while the pool was picking it up
+            self._forget(call_id)
+            self._notify("on_cancelled", call_id, call_name)
+            raise CallCancelled(call_name)
+        self._notify("on_started", call_id, call_name)
+        previous = set_progress_callback(lambda message: self._notify("on_progress", call_id, message))
+        start = time.perf_counter()
+        try:
+            result = method(**kwargs)
+        except Exception as e:
+            if cancel_event.is_set():
+                self._notify("on_cancelled", call_id, call_name)
+            else:
+                self._notify("on_failed", call_id, call_name, e)
+            raise
+        finally:
+            set_progress_callback(previous)
+            self._forget(call_id)
+        if cancel_event.is_set():
+            self._notify("on_cancelled", call_id, call_name)
+            raise CallCancelled(call_name)
+        self._notify("on_finished", call_id, call_name, result, time.perf_counter() - start)
+        return result
+
+    async def _run_async(self, call_id, call_name, method, kwargs, cancel_event):
+        # Runs on the event loop; the callback is set in this task's own context, so nothing needs restoring
+        self._notify("on_started", call_id, call_name)
+        set_progress_callback(lambda message: self._notify("on_progress", call_id, message))
+        start = time.perf_counter()
+        try:
+            result = await method(**kwargs)
+        except Exception as e: # Not CancelledError: cancel() already reported that
+            self._notify("on_failed", call_id, call_name, e)
+            raise
+        finally:
+            self._forget(call_id)
+        if cancel_event.is_set(): # Cancelled as it completed; cancel() reported it
+            raise CallCancelled(call_name)
+        self._notify("on_finished", call_id, call_name, result, time.perf_counter() - start)
+        return result
+
+    def _forget(self, call_id):
+        with self._lock:
+            self._calls.pop(call_id, None)
+
+    def _notify(self, event, *args):
+        handler = getattr(self.listener, event, None)
+        if handler is not None:
+            handler(*args)
@@ -0,0 +1,357 @@
+import re, json, operator, functools, itertools
+
+NUMPY_MIN_VALUES = 64 # Shorter columns are compared in Python; converting them to an array costs more than it saves
+
+_NAME = re.compile(r"[\w-]+")
+_SLICE = re.compile(r"(-?\d*):(-?\d*)(?::(-?\d*))?\]")
+_INDEX = re.compile(r"(-?\d+)\]")
+_QUOTED_KEY = re.compile(r"""("(?:[^"\\]|\\.)*"|'(?:[^'\\]|\\.)*')\]""")
+_LITERAL = r"""-?\d+(?:\.\d+)?(?:[eE][+-]?\d+)?|"(?:[^"\\]|\\.)*"|'(?:[^'\\]|\\.)*'|true|false|null"""
+_FILTER = re.compile(
+    r"""\?\(\s*(@(?:\.[\w-]+|\[(?:-?\d+|"(?:[^"\\]|\\.)*"|'(?:[^'\\]|\\.)*')\])*)\s*"""
+    r"(?:(==|!=|<=|>=|<|>)\s*(" + _LITERAL + r"))?\s*\)\]"
+)
+
+_MISSING = object() # A record without the field, in aligned columns
+
+def _matches(value, pattern):
+    return isinstance(value, str) and re.search(pattern, value) is not None # re caches the compiled pattern
+
+OPERATORS = {
+    "==": operator.eq,
+    "!=": operator.ne,
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+    "in": lambda value, expected: value in expected,
+    "not_in": lambda value, expected: value not in expected,
+    "contains": lambda value, expected: hasattr(value, "__contains__") and expected in value,
+    "matches": _matches,
+}
+_VECTOR_OPERATORS = ("==", "!=", "<", "<=", ">", ">=") # Applied to a whole NumPy array at once
+_NUMBER_TYPES = frozenset((int, float))
+# Types Python compares the way JSON does; `object` is _MISSING. Anything else (bools, which equal 1 and 0, or
+# nested lists and objects that may hold them) goes through _JSON_OPERATORS.
+_PLAIN_TYPES = frozenset((int, float, str, type(None), object))
+
+def _json_equal(value, other):
+    """== that keeps true/false apart from 1/0, at any depth."""
+    if isinstance(value, bool) or isinstance(other, bool):
+        return type(value) is type(other) and value == other
+    if isinstance(value, (list, tuple)) and isinstance(other, (list, tuple)):
+        return len(value) == len(other) and all(map(_json_equal, value, other))
+    if isinstance(value, dict) and isinstance(other, dict):
+        return value.keys() == other.keys() and all(_json_equal(item, other[key]) for key, item in value.items())
+    return value == other
+
+def _json_in(value, container):
+    if isinstance(container, (list, tuple)):
+        return any(_json_equal(value, element) for element in container)
+    return value in container # Substrings, object keys
+
+def _json_ordered(function):
+    def compare(value, expected):
+        if isinstance(value, bool) != isinstance(expected, bool):
+            return False # true isn't greater than 0
+        return function(value, expected)
+    return compare
+
+_JSON_OPERATORS = {
+    **OPERATORS,
+    "==": _json_equal,
+    "!=": lambda value, expected: not _json_equal(value, expected),
+    "<": _json_ordered(operator.lt),
+    "<=": _json_ordered(operator.le),
+    ">": _json_ordered(operator.gt),
+    ">=": _json_ordered(operator.ge),
+    "in": _json_in,
+    "not_in": lambda value, expected: not _json_in(value, expected),
+    "contains": lambda value, expected: hasattr(value, "__contains__") and _json_in(expected, value),
+}
+
+class PathSyntaxError(ValueError):
+    """An extractor expression that doesn't parse."""
+    def __init__(self, message, expression, position):
+        super().__init__(f"{message} at position {position} of '{expression}'")
+        self.expression = expression
+        self.position = position
+
+class AssertionFailed(AssertionError):
+    """Raised by assert nodes; fails the node like any other error, so everything downstream is skipped."""
+
+@functools.lru_cache(maxsize=None)
+def _numpy():
+    try:
+        import numpy # Optional dependency; comparisons fall back to Python without it
+    except ImportError:
+        return None
+    return numpy
+
+class CompiledPath:
+    """
+    A parsed extractor expression, JSONPath-like: `$.orders[*].total`, `users[0].name`, `$..id`, `items[-3:]`,
+    `$.items[?(@.price > 10)].sku`, `$['key with spaces']`. Evaluation is set-at-a-time: each step maps the whole
+    list of current values at once (C-level itemgetter for field access when every value has the field) instead of
+    walking every record separately, and filters compare a whole column, with NumPy when it's installed.
+    """
+    def __init__(self, expression, steps):
+        self.expression = expression
+        self.steps = steps # (kind, argument) tuples, see _parse()
+        self.definite = all(kind in ("key", "index") for kind, _ in steps) # At most one match per document
+
+    def find(self, document) -> list:
+        """Every value the expression selects in the document."""
+        return self.find_all([document])
+
+    def find_all(self, documents) -> list:
+        """The matches of every document in order, e.g. of each record of a list."""
+        values = list(documents)
+        for step in self.steps:
+            if not values:
+                break
+            values = _STEPS[step[0]](values, step[1])
+        return values
+
+    def first(self, document, default=None):
+        values = self.find(document)
+        return values[0] if values else default
+
+    def column(self, records, default=None) -> list:
+        """One value per record for a definite expression, `default` where the record doesn't have it."""
+        if not self.definite:
+            raise ValueError(f"'{self.expression}' can select several values per record; column() needs a definite path")
+        values = _column(self.steps, records)
+        return [default if value is _MISSING else value for value in values]
+
+    def __repr__(self):
+        return f"CompiledPath({self.expression!r})"
+
+@functools.lru_cache(maxsize=1024)
+def compile_path(expression: str) -> CompiledPath:
+    """Parses an extractor expression once; flows evaluate the same few expressions over and over."""
+    return CompiledPath(expression, tuple(_parse(expression)))
+
+def _parse(expression, root="$"):
+    steps = []
+    position = 0
+    length = len(expression)
+    if expression.startswith(root):
+        position = 1
+    elif root == "@":
+        raise PathSyntaxError("Filter paths start with @", expression, 0)
+    else:
+        match = _NAME.match(expression)
+        if match: # A bare leading field, `users[0]` for `$.users[0]`
+            steps.append(("key", match.group()))
+            position = match.end()
+    while position < length:
+        if expression.startswith("..", position):
+            position += 2
+            if expression.startswith("*", position):
+                steps.append(("descend", None))
+                position += 1
+                continue
+            match = _NAME.match(expression, position)
+            if match is None:
+                raise PathSyntaxError("Expected a field name after '..'", expression, position)
+            steps.append(("descend", match.group()))
+            position = match.end()
+        elif expression[position] == ".":
+            position += 1
+            if expression.startswith("*", position):
+                steps.append(("wildcard", None))
+                position += 1
+                continue
+            match = _NAME.match(expression, position)
+            if match is None:
+                raise PathSyntaxError("Expected a field name after '.'", expression, position)
+            steps.append(("key", match.group()))
+            position = match.end()
+        elif expression[position] == "[":
+            position = _parse_bracket(expression, position + 1, steps)
+        else:
+            raise PathSyntaxError(f"Unexpected '{expression[position]}'", expression, position)
+    return steps
+
+def _parse_bracket(expression, position, steps):
+    """Parses the selector after a '[' into steps; returns the position after its ']'."""
+    if expression.startswith("*]", position):
+        steps.append(("wildcard", None))
+        return position + 2
+    match = _INDEX.match(expression, position)
+    if match:
+        steps.append(("index", int(match.group(1))))
+        return match.end()
+    match = _SLICE.match(expression, position)
+    if match:
+        start, stop, step = (int(part) if part else None for part in match.groups())
+        if step == 0:
+            raise PathSyntaxError("Slice step can't be zero", expression, position)
+        steps.append(("slice", slice(start, stop, step)))
+        return match.end()
+    match = _QUOTED_KEY.match(expression, position)
+    if match:
+        steps.append(("key", _literal(match.group(1))))
+        return match.end()
+    match = _FILTER.match(expression, position)
+    if match:
+        path, comparison, literal = match.groups()
+        field = _parse(path, root="@")
+        if not all(kind in ("key", "index") for kind, _ in field):
+            raise PathSyntaxError("Filter paths select one value per item", expression, position)
+        steps.append(("filter", (tuple(field), comparison, _literal(literal) if comparison else None)))
+        return match.end()
+    raise PathSyntaxError("Expected an index, slice, quoted key, * or ?(filter) after '['", expression, position)
+
+def _literal(text):
+    if text.startswith("'"):
+        return text[1:-1].replace("\\'", "'").replace("\\\\", "\\")
+    return json.loads(text)
+
+def _key(values, key):
+    try:
+        return list(map(operator.itemgetter(key), values)) # Every value is a record with the field
+    except (KeyError, TypeError, IndexError):
+        return [value[key] for value in values if isinstance(value, dict) and key in value]
+
+def _index(values, index):
+    return [value[index] for value in values if isinstance(value, list) and -len(value) <= index < len(value)]
+
+def _children(values, _=None):
+    children = []
+    for value in values:
+        if isinstance(value, list):
+            children.extend(value)
+        elif isinstance(value, dict):
+            children.extend(value.values())
+    return children
+
+def _slice(values, selection):
+    return [item for value in values if isinstance(value, list) for item in value[selection]]
+
+def _descend(values, key):
+    """`..key`: the field in the values and everything below them; `..*`: everything below them."""
+    found = []
+    level = values
+    while level:
+        if key is not None:
+            found.extend(value[key] for value in level if isinstance(value, dict) and key in value)
+        level = _children(level)
+        if key is None:
+            found.extend(level)
+    return found
+
+def _filter(values, condition):
+    field, comparison, literal = condition
+    items = _children(values)
+    column = _column(field, items)
+    if comparison is None: # [?(@.field)]: items that have it
+        return [item for item, value in zip(items, column) if value is not _MISSING]
+    return [items[index] for index in _selected(compare(column, comparison, literal)) if column[index] is not _MISSING]
+
+_STEPS = {
+    "key": _key,
+    "index": _index,
+    "wildcard": _children,
+    "slice": _slice,
+    "descend": _descend,
+    "filter": _filter,
+}
+
+def _column(steps, values):
+    # Like find_all() for definite steps, but keeps one entry per value so results line up with their records
+    for kind, argument in steps:
+        if kind == "key":
+            try:
+                values = list(map(operator.itemgetter(argument), values))
+                continue
+            except (KeyError, TypeError, IndexError):
+                pass
+            values = [value[argument] if isinstance(value, dict) and argument in value else _MISSING for value in values]
+        else:
+            values = [
+                value[argument] if isinstance(value, list) and -len(value) <= argument < len(value) else _MISSING
+                for value in values
+            ]
+    return values
+
+def compare(values, comparison: str, expected):
+    """
+    Whether each value satisfies `value <comparison> expected`, as a list of bools or a NumPy bool array.
+    Numeric columns are compared as one array when NumPy is installed; values that can't be compared
+    (missing, or of another type) don't satisfy anything. As in JSON, true and false are not equal to 1 and 0.
+    """
+    function = OPERATORS.get(comparison)
+    if function is None:
+        raise ValueError(f"Unknown comparison '{comparison}', expected one of {', '.join(OPERATORS)}")
+    if comparison == "matches": # Compiled once for the column rather than looked up in re's cache per value
+        search = re.compile(expected).search
+        return [isinstance(value, str) and search(value) is not None for value in values]
+    types = set(map(type, values))
+    if not (types <= _PLAIN_TYPES and _is_plain(expected)):
+        function = _JSON_OPERATORS[comparison]
+        return [_safe_compare(function, value, expected) for value in values]
+    if (comparison in _VECTOR_OPERATORS and len(values) >= NUMPY_MIN_VALUES and _is_number(expected)
+            and types <= _NUMBER_TYPES and _numpy() is not None): # NumPy is only imported for a long numeric column
+        array = _numpy().asarray(values)
+        if array.dtype.kind in "iuf": # Not ints too large for int64, which come out as objects
+            return function(array, expected)
+    try:
+        return list(map(function, values, itertools.repeat(expected)))
+    except TypeError: # A value of another type; only then is it worth checking one by one
+        return [_safe_compare(function, value, expected) for value in values]
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+def _is_plain(expected):
+    if isinstance(expected, (list, tuple, set, frozenset)):
+        return set(map(type, expected)) <= _PLAIN_TYPES
+    return type(expected) in _PLAIN_TYPES or isinstance(expected, dict) # Plain values are never equal to a dict; `in` checks its keys
+
+def _safe_compare(function, value, expected):
+    if value is _MISSING:
+        return False
+    try:
+        return bool(function(value, expected))
+    except TypeError:
+        return False
+
+def _selected(mask):
+    if isinstance(mask, list):
+        return [index for index, selected in enumerate(mask) if selected]
+    return _numpy().flatnonzero(mask).tolist()
+
+def _rejected(mask):
+    if isinstance(mask, list):
+        return [index for index, selected in enumerate(mask) if not selected]
+    return _numpy().flatnonzero(~mask).tolist()
+
+# Blueprint node types that run in the engine on their upstream output instead of calling the API
+# (engine/Executor.py resolve_call() falls back to these). The first parameter takes the upstream output.
+
+def extract(data=None, path="$"):
+    """The value at `path` in the upstream output (None when it's missing), or the list of matches of a path with *, .., slices or filters."""
+    compiled = compile_path(path)
+    if compiled.definite:
+        return compiled.first(data)
+    return compiled.find(data)
+
+def assert_values(data=None, path="$", op="==", expected=None, min_count=1):
+    """
+    Fails unless `path` selects at least `min_count` values in the upstream output and every one of them satisfies
+    `value <op> expected` (op "exists" only checks the count). Returns a summary for the run log.
+    """
+    values = compile_path(path).find(data)
+    if len(values) < min_count:
+        raise AssertionFailed(f"{path} selected {len(values)} value(s), expected at least {min_count}")
+    if op != "exists":
+        failed = _rejected(compare(values, op, expected))
+        if failed:
+            raise AssertionFailed(
+                f"{len(failed)} of {len(values)} value(s) at {path} are not {op} {expected!r}; first #{failed[0]}: {values[failed[0]]!r}"
+            )
+    return {"path": path, "checked": len(values), "failed": 0}
+
+NODE_TYPES = {"extract": extract, "assert": assert_values}
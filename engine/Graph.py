@@ -0,0 +1,257 @@
+import os, json, itertools
+from collections import deque
+
+FLOW_FORMAT = "ae-blueprint" # Marks the columnar flow file form (Blueprint.to_columns)
+FLOW_VERSION = 1 # Bumped when the columnar form changes; older versions stay readable
+FLOW_FILE_SUFFIXES = (".json", ".json.gz")
+_GZIP_MAGIC = b"\x1f\x8b"
+
+class BlueprintNode:
+    """One API call in a blueprint, with its static parameters and canvas position."""
+    def __init__(self, node_id: str, call: str, params=None, x=0.0, y=0.0):
+        self.id = node_id
+        self.call = call
+        self.params = dict(params or {})
+        self.x = x
+        self.y = y
+
+    def to_dict(self):
+        return {"id": self.id, "call": self.call, "params": self.params, "x": self.x, "y": self.y}
+
+class BlueprintEdge:
+    """
+    Connection from a node's output port to another node's input port.
+    The source output is passed to the target as `param`; when param is None the runner binds it to the
+    first parameter of the target call that isn't already set.
+    """
+    def __init__(self, source: str, target: str, param=None):
+        self.source = source
+        self.target = target
+        self.param = param
+
+    def to_dict(self):
+        return {"source": self.source, "target": self.target, "param": self.param}
+
+class Blueprint:
+    """Qt-free execution model behind the blueprint canvas: a DAG of API call nodes."""
+    def __init__(self):
+        self.nodes = {} # node id -> BlueprintNode, in insertion order
+        self.edges = []
+        self._children = {} # node id -> ids of the nodes its output feeds, for O(degree) checks in connect()
+        self._ids = itertools.count(1)
+
+    def add_node(self, call: str, params=None, x=0.0, y=0.0, node_id=None) -> BlueprintNode:
+        if node_id is None:
+            node_id = self._next_id()
+        elif node_id in self.nodes:
+            raise ValueError(f"Duplicate node id '{node_id}'")
+        node = BlueprintNode(node_id, call, params, x, y)
+        self.nodes[node_id] = node
+        return node
+
+    def remove_node(self, node_id: str):
+        self.nodes.pop(node_id, None)
+        self.edges = [edge for edge in self.edges if node_id not in (edge.source, edge.target)]
+        self._children.pop(node_id, None)
+        for children in self._children.values():
+            children.discard(node_id)
+
+    def connect(self, source: str, target: str, param=None) -> BlueprintEdge:
+        if source not in self.nodes or target not in self.nodes:
+            raise KeyError(f"Unknown node in connection {source} -> {target}")
+        if source == target:
+            raise ValueError("A node can't be connected to itself")
+        if target in self._children.get(source, ()):
+            raise ValueError(f"Nodes {source} and {target} are already connected")
+        if self._reaches(target, source):
+            raise ValueError(f"Connecting {source} -> {target} would create a cycle")
+        edge = BlueprintEdge(source, target, param)
+        self.edges.append(edge)
+        self._children.setdefault(source, set()).add(target)
+        return edge
+
+    def disconnect(self, source: str, target: str):
+        self.edges = [edge for edge in self.edges if (edge.source, edge.target) != (source, target)]
+        self._children.get(source, set()).discard(target)
+
+    def incoming(self, node_id: str):
+        return [edge for edge in self.edges if edge.target == node_id]
+
+    def outgoing(self, node_id: str):
+        return [edge for edge in self.edges if edge.source == node_id]
+
+    def topological_order(self):
+        """Kahn's algorithm; raises ValueError if the graph has a cycle."""
+        indegree = {node_id: 0 for node_id in self.nodes}
+        children = {node_id: [] for node_id in self.nodes}
+        for edge in self.edges:
+            indegree[edge.target] += 1
+            children[edge.source].append(edge.target)
+        ready = deque(node_id for node_id, degree in indegree.items() if degree == 0)
+        order = []
+        while ready:
+            node_id = ready.popleft()
+            order.append(node_id)
+            for child in children[node_id]:
+                indegree[child] -= 1
+                if indegree[child] == 0:
+                    ready.append(child)
+        if len(order) != len(self.nodes):
+            raise ValueError("Blueprint contains a cycle")
+        return order
+
+    def to_dict(self):
+        return {
+            "nodes": [node.to_dict() for node in self.nodes.values()],
+            "edges": [edge.to_dict() for edge in self.edges],
+        }
+
+    def to_columns(self) -> dict:
+        """
+        The compact, versioned form flow files are saved in: one array per field instead of one object per node or
+        edge, call names and parameter sets stored once and referenced by index, edges referencing nodes by position.
+        """
+        positions = {node_id: position for position, node_id in enumerate(self.nodes)}
+        calls, call_index = [], {}
+        param_sets, param_index = [{}], {"{}": 0} # Set 0: no parameters
+        ids, call_column, param_column, xs, ys = [], [], [], [], []
+        for node in self.nodes.values():
+            ids.append(node.id)
+            if node.call not in call_index:
+                call_index[node.call] = len(calls)
+                calls.append(node.call)
+            call_column.append(call_index[node.call])
+            key = json.dumps(node.params, sort_keys=True, default=repr)
+            if key not in param_index:
+                param_index[key] = len(param_sets)
+                param_sets.append(node.params)
+            param_column.append(param_index[key])
+            xs.append(_compact_number(node.x))
+            ys.append(_compact_number(node.y))
+        edges = {
+            "source": [positions[edge.source] for edge in self.edges],
+            "target": [positions[edge.target] for edge in self.edges],
+        }
+        if any(edge.param is not None for edge in self.edges):
+            edges["param"] = [edge.param for edge in self.edges]
+        return {
+            "format": FLOW_FORMAT,
+            "version": FLOW_VERSION,
+            "calls": calls,
+            "params": param_sets,
+            "nodes": {"id": ids, "call": call_column, "params": param_column, "x": xs, "y": ys},
+            "edges": edges,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Blueprint":
+        """Builds a blueprint from either to_dict() or to_columns() data, e.g. a flow file."""
+        if data.get("format") == FLOW_FORMAT:
+            return cls._from_columns(data)
+        blueprint = cls()
+        blueprint._load(
+            (
+                BlueprintNode(
+                    str(node_data["id"]) if "id" in node_data else blueprint._next_id(),
+                    node_data["call"],
+                    node_data.get("params"),
+                    node_data.get("x", 0.0),
+                    node_data.get("y", 0.0),
+                )
+                for node_data in data.get("nodes", [])
+            ),
+            ((str(edge_data["source"]), str(edge_data["target"]), edge_data.get("param")) for edge_data in data.get("edges", [])),
+        )
+        return blueprint
+
+    @classmethod
+    def _from_columns(cls, data: dict) -> "Blueprint":
+        version = data.get("version", FLOW_VERSION)
+        if version > FLOW_VERSION:
+            raise ValueError(f"Flow file version {version} is newer than the supported version {FLOW_VERSION}")
+        calls = data["calls"]
+        param_sets = data.get("params") or [{}]
+        nodes = data["nodes"]
+        ids = [str(node_id) for node_id in nodes["id"]]
+        count = len(ids)
+        columns = [nodes["call"]] + [nodes.get(name) or [0] * count for name in ("params", "x", "y")]
+        edges = data.get("edges") or {}
+        sources, targets = edges.get("source", []), edges.get("target", [])
+        params = edges.get("param") or [None] * len(sources)
+        if any(len(column) != count for column in columns) or not len(sources) == len(targets) == len(params):
+            raise ValueError("Flow file columns differ in length")
+        for references, table, what in ((columns[0], calls, "call"), (columns[1], param_sets, "parameter set"), (sources + targets, ids, "node")):
+            if references and (min(references) < 0 or max(references) >= len(table)):
+                raise ValueError(f"Flow file refers to a {what} index out of range")
+        blueprint = cls()
+        blueprint._load(
+            (BlueprintNode(*fields) for fields in zip(ids, (calls[index] for index in columns[0]), (param_sets[index] for index in columns[1]), columns[2], columns[3])),
+            ((ids[source], ids[target], param) for source, target, param in zip(sources, targets, params)),
+        )
+        return blueprint
+
+    def _load(self, nodes, edges):
+        """Bulk construction for from_dict(): each edge is checked in O(1) and the graph for cycles once, instead of per connect()."""
+        for node in nodes:
+            if node.id in self.nodes:
+                raise ValueError(f"Duplicate node id '{node.id}'")
+            self.nodes[node.id] = node
+        for source, target, param in edges:
+            if source not in self.nodes or target not in self.nodes:
+                raise KeyError(f"Unknown node in connection {source} -> {target}")
+            if source == target:
+                raise ValueError("A node can't be connected to itself")
+            children = self._children.setdefault(source, set())
+            if target in children:
+                raise ValueError(f"Nodes {source} and {target} are already connected")
+            children.add(target)
+            self.edges.append(BlueprintEdge(source, target, param))
+        self.topological_order() # Raises ValueError on a cycle
+
+    def _next_id(self):
+        while True:
+            node_id = f"n{next(self._ids)}"
+            if node_id not in self.nodes:
+                return node_id
+
+    def _reaches(self, start: str, goal: str) -> bool:
+        """Whether goal is downstream of start; only walks start's descendants."""
+        stack, seen = [start], {start}
+        while stack:
+            node_id = stack.pop()
+            if node_id == goal:
+                return True
+            for child in self._children.get(node_id, ()):
+                if child not in seen:
+                    seen.add(child)
+                    stack.append(child)
+        return False
+
+def _compact_number(value):
+    # Canvas positions are mostly whole numbers; "120" instead of "120.0" in every row adds up
+    return int(value) if float(value).is_integer() else round(value, 2)
+
+def flow_node_count(data: dict) -> int:
+    """Number of nodes in to_dict() or to_columns() data, without building the blueprint."""
+    nodes = data.get("nodes", [])
+    return len(nodes["id"]) if data.get("format") == FLOW_FORMAT else len(nodes)
+
+def read_flow(path: str) -> dict:
+    """A flow file: to_dict() or to_columns() data as JSON, optionally gzip-compressed (detected from its content)."""
+    with open(path, 'rb') as f:
+        raw = f.read()
+    if raw[:2] == _GZIP_MAGIC:
+        import gzip
+        raw = gzip.decompress(raw)
+    return json.loads(raw)
+
+def write_flow(path: str, data: dict):
+    """Writes a flow file, gzip-compressed when path ends in .gz; replaces the old file only once the new one is complete."""
+    raw = json.dumps(data, separators=(",", ":")).encode()
+    if path.endswith(".gz"):
+        import gzip
+        raw = gzip.compress(raw, compresslevel=6, mtime=0)
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'wb') as f:
+        f.write(raw)
+    os.replace(temp_path, path)
@@ -0,0 +1,230 @@
+import inspect, threading, time, uuid, contextlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from apis.Cache import bypass_cache
+from apis.History import run_history
+from apis.Utils import set_progress_callback
+from engine.Executor import CallFailed, resolve_call
+from engine.Graph import Blueprint
+from engine.Memo import output_fingerprint
+
+DEFAULT_MAX_PARALLEL = 8
+
+class GraphRunResult:
+    def __init__(self):
+        self.outputs = {} # node id -> return value
+        self.errors = {} # node id -> exception
+        self.skipped = [] # node ids not run because an upstream node failed or the run was cancelled
+        self._skipped_ids = set() # The same ids, for membership tests while failures propagate through large flows
+        self.timings = {} # node id -> seconds
+        self.cached = [] # node ids whose output was reused from the memo instead of calling the API
+        self.elapsed = 0.0
+        self.run_id = uuid.uuid4().hex[:12] # Tags this run and its calls in the run history
+
+    @property
+    def ok(self):
+        return not self.errors and not self.skipped
+
+class GraphRunner:
+    """
+    Executes a Blueprint against a bound API instance.
+    Nodes start as soon as all of their upstream nodes finished, so independent branches run concurrently
+    (up to max_parallel at a time) and a run takes roughly as long as its critical path. Nodes calling async API calls
+    run on the shared event loop (engine/AsyncLoop.py) rather than taking a worker thread.
+    An @api_call returning None fails its node with CallFailed, so everything downstream of it is skipped.
+    Listener callbacks are invoked from worker threads (or the loop thread): on_node_started(node_id), on_node_progress(node_id, message),
+    on_node_finished(node_id, result, elapsed), on_node_failed(node_id, error), on_node_skipped(node_id) and, with a memo,
+    on_node_cached(node_id, result) for nodes whose inputs didn't change since an earlier run (see engine/Memo.py).
+    """
+    def __init__(self, max_parallel=DEFAULT_MAX_PARALLEL, listener=None, memo=None):
+        if max_parallel < 1:
+            raise ValueError("max_parallel must be at least 1")
+        self.max_parallel = max_parallel
+        self.listener = listener
+        self.memo = memo
+        self._cancelled = threading.Event()
+
+    def cancel(self):
+        """Stops scheduling new nodes; nodes already running are allowed to finish."""
+        self._cancelled.set()
+
+    def run(self, blueprint: Blueprint, api_instance, name="blueprint", force=False) -> GraphRunResult:
+        """
+        `name` labels the run in the run history, e.g. the flow file it came from. `force` re-runs memoized nodes
+        anyway, bypassing the response cache: True for every node, or a collection of node ids (their dependents still
+        reuse unchanged outputs).
+        """
+        self._cancelled.clear()
+        blueprint.topological_order() # Validates the graph before anything runs
+        result = GraphRunResult()
+        start = time.perf_counter()
+        memo = self.memo if self.memo is not None and self.memo.enabled else None
+        forced = set(blueprint.nodes) if force is True else set(force or ())
+        target = (
+            getattr(api_instance, "_api_class_name", type(api_instance).__name__), getattr(api_instance, "environment", None),
+            getattr(api_instance, "tenant", None), getattr(api_instance, "base_url", None),
+        )
+        digests = {} # node id -> digest of its output, what downstream memo keys are built from
+
+        incoming = {node_id: [] for node_id in blueprint.nodes}
+        children = {node_id: [] for node_id in blueprint.nodes}
+        for edge in blueprint.edges:
+            incoming[edge.target].append(edge)
+            children[edge.source].append(edge.target)
+        waiting_on = {node_id: len(edges) for node_id, edges in incoming.items()}
+        ready = deque(node_id for node_id, count in waiting_on.items() if count == 0)
+
+        with ThreadPoolExecutor(max_workers=self.max_parallel, thread_name_prefix="ae-node") as pool:
+            running = {}
+            while ready or running:
+                while ready and len(running) < self.max_parallel and not self._cancelled.is_set():
+                    node_id = ready.popleft()
+                    if node_id in result._skipped_ids: # Its other upstream nodes finished after one of them failed
+                        continue
+                    node = blueprint.nodes[node_id]
+                    try:
+                        kwargs, bindings = self._resolve_inputs(api_instance, node, incoming[node_id], result.outputs)
+                    except Exception as e:
+                        self._fail(node_id, e, result, children)
+                        continue
+                    key = None
+                    if memo is not None:
+                        params = {param: value for param, value in kwargs.items() if param not in bindings}
+                        key = memo.key(target, node.call, params, {param: digests.get(source) for param, source in bindings.items()})
+                        entry = memo.get(key) if key is not None and node_id not in forced else None
+                        if entry is not None:
+                            result.outputs[node_id] = entry.output
+                            result.cached.append(node_id)
+                            digests[node_id] = entry.digest
+                            self._notify("on_node_cached", node_id, entry.output)
+                            self._release_children(node_id, children, waiting_on, ready)
+                            continue
+                    if getattr(resolve_call(api_instance, node.call), "_is_async", False):
+                        from engine.AsyncLoop import async_loop # Its futures are waited on together with the pool's
+                        future = async_loop.submit(self._run_node_async(api_instance, node, kwargs, result.run_id, memo is not None, node_id in forced))
+                    else:
+                        future = pool.submit(self._run_node, api_instance, node, kwargs, result.run_id, memo is not None, node_id in forced)
+                    running[future] = (node_id, key)
+                if self._cancelled.is_set():
+                    ready.clear()
+                if not running:
+                    continue
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    node_id, key = running.pop(future)
+                    try:
+                        output, elapsed, fingerprint = future.result()
+                    except Exception as e:
+                        self._fail(node_id, e, result, children)
+                        continue
+                    result.timings[node_id] = elapsed
+                    node = blueprint.nodes[node_id]
+                    if output is None and getattr(resolve_call(api_instance, node.call), "_is_api_call", False):
+                        # Its children would be called with None; built-in nodes such as extract may return None
+                        self._fail(node_id, CallFailed(f"{node.call} returned no result"), result, children)
+                        continue
+                    result.outputs[node_id] = output
+                    if fingerprint is not None:
+                        digests[node_id] = fingerprint[0]
+                        if key is not None:
+                            memo.put(key, output, *fingerprint)
+                    self._notify("on_node_finished", node_id, output, elapsed)
+                    self._release_children(node_id, children, waiting_on, ready)
+
+        finished = set(result.outputs) | set(result.errors) | result._skipped_ids
+        for node_id in blueprint.nodes: # Left over after a cancel
+            if node_id not in finished:
+                result.skipped.append(node_id)
+                result._skipped_ids.add(node_id)
+                self._notify("on_node_skipped", node_id)
+        result.elapsed = time.perf_counter() - start
+        if run_history.enabled:
+            error = False
+            if result.errors:
+                node_id, node_error = next(iter(result.errors.items()))
+                error = f"{len(result.errors)} node(s) failed, first {node_id}: {type(node_error).__name__}: {node_error}"
+            elif result.skipped:
+                error = f"{len(result.skipped)} node(s) skipped"
+            run_history.record_run(
+                getattr(api_instance, "_api_class_name", type(api_instance).__name__), getattr(api_instance, "environment", None),
+                getattr(api_instance, "tenant", None), name, int(result.elapsed * 1e9), error, result.outputs, result.run_id,
+            )
+        return result
+
+    def _run_node(self, api_instance, node, kwargs, run_id, fingerprint, forced):
+        self._notify("on_node_started", node.id)
+        previous = set_progress_callback(lambda message: self._notify("on_node_progress", node.id, message))
+        previous_context = run_history.set_context(run_id, node.id)
+        start = time.perf_counter()
+        try:
+            with bypass_cache() if forced else contextlib.nullcontext(): # A forced node also skips the response cache
+                output = resolve_call(api_instance, node.call)(**kwargs)
+            elapsed = time.perf_counter() - start
+        finally:
+            run_history.set_context(*previous_context)
+            set_progress_callback(previous)
+        # Hashed here rather than on the scheduling thread; None (a failed @api_call) is never memoized
+        return output, elapsed, output_fingerprint(output) if fingerprint and output is not None else None
+
+    async def _run_node_async(self, api_instance, node, kwargs, run_id, fingerprint, forced):
+        """_run_node() for async calls, as a task on the shared event loop; context set here stays with the task."""
+        self._notify("on_node_started", node.id)
+        set_progress_callback(lambda message: self._notify("on_node_progress", node.id, message))
+        run_history.set_context(run_id, node.id)
+        start = time.perf_counter()
+        with bypass_cache() if forced else contextlib.nullcontext():
+            output = await resolve_call(api_instance, node.call)(**kwargs)
+        elapsed = time.perf_counter() - start
+        return output, elapsed, output_fingerprint(output) if fingerprint and output is not None else None
+
+    def _resolve_inputs(self, api_instance, node, edges, outputs):
+        """The node's call arguments, and which of them come from upstream outputs (parameter -> source node id)."""
+        kwargs = dict(node.params)
+        bindings = {}
+        unbound = [edge for edge in edges if edge.param is None]
+        for edge in edges:
+            if edge.param is not None:
+                kwargs[edge.param] = outputs[edge.source]
+                bindings[edge.param] = edge.source
+        if unbound:
+            # Feed ordering-only edges into the first parameters the node doesn't set itself
+            free_params = [name for name in call_parameters(resolve_call(api_instance, node.call)) if name not in kwargs]
+            for edge, param in zip(unbound, free_params):
+                kwargs[param] = outputs[edge.source]
+                bindings[param] = edge.source
+        return kwargs, bindings
+
+    def _release_children(self, node_id, children, waiting_on, ready):
+        for child in children[node_id]:
+            waiting_on[child] -= 1
+            if waiting_on[child] == 0:
+                ready.append(child)
+
+    def _fail(self, node_id, error, result, children):
+        result.errors[node_id] = error
+        self._notify("on_node_failed", node_id, error)
+        # Everything downstream of a failed node can't get its inputs
+        pending = list(children[node_id])
+        while pending:
+            child = pending.pop()
+            if child in result._skipped_ids:
+                continue
+            result.skipped.append(child)
+            result._skipped_ids.add(child)
+            self._notify("on_node_skipped", child)
+            pending.extend(children[child])
+
+    def _notify(self, event, *args):
+        handler = getattr(self.listener, event, None)
+        if handler is not None:
+            handler(*args)
+
+def call_parameters(method):
+    """Names of the parameters a bound API call accepts, in declaration order."""
+    call_spec = getattr(method, "_call_spec", None)
+    if call_spec is not None: # Captured by @api_call, no need to inspect again
+        return call_spec.param_names
+    return [
+        name for name, param in inspect.signature(method).parameters.items()
+        if param.kind in (param.POSITIONAL_OR_KEYWORD, param.KEYWORD_ONLY)
+    ]
@@ -0,0 +1,151 @@
+import sys, json, time, threading, contextlib
+from engine.Config import apply_config, load_config, create_api_instance
+from engine.Executor import CallFailed, call_method, resolve_call
+from engine.Graph import Blueprint, read_flow
+from engine.GraphRunner import GraphRunner
+
+class JsonLinesReporter:
+    """GraphRunner listener that streams one JSON object per event, flushing each line."""
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stdout
+        self._lock = threading.Lock() # Events arrive from several worker threads
+
+    def emit(self, event: str, **fields):
+        line = json.dumps({"event": event, "ts": time.time(), **fields}, default=repr)
+        with self._lock:
+            self.stream.write(line + "\n")
+            self.stream.flush()
+
+    def on_node_started(self, node_id):
+        self.emit("node_started", node=node_id)
+
+    def on_node_progress(self, node_id, message):
+        self.emit("node_progress", node=node_id, message=str(message))
+
+    def on_node_finished(self, node_id, output, elapsed):
+        self.emit("node_finished", node=node_id, elapsed_ms=round(elapsed * 1000, 3), output=output)
+
+    def on_node_failed(self, node_id, error):
+        self.emit("node_failed", node=node_id, error=f"{type(error).__name__}: {error}")
+
+    def on_node_skipped(self, node_id):
+        self.emit("node_skipped", node=node_id)
+
+def load_flow(flow_path: str) -> dict:
+    return read_flow(flow_path)
+
+class Target:
+    """The API/environment/tenant a headless command runs against."""
+    def __init__(self, api_name, environment, tenant, config_data, base_url=None):
+        self.api_name = api_name
+        self.environment = environment
+        self.tenant = tenant
+        self.config_data = config_data
+        self.base_url = base_url # Overrides the API class's base_url, e.g. to hit a stand-in server
+
+    def create_instance(self):
+        api_instance = create_api_instance(self.config_data, self.api_name, self.environment, self.tenant)
+        if self.base_url:
+            api_instance.base_url = self.base_url
+        return api_instance
+
+    def labels(self):
+        return {"api": self.api_name, "environment": self.environment, "tenant": self.tenant}
+
+def run_flow(flow_data: dict, target: Target, max_parallel, reporter, name="blueprint") -> bool:
+    blueprint = Blueprint.from_dict(flow_data)
+    api_instance = target.create_instance()
+    reporter.emit("run_started", nodes=len(blueprint.nodes), **target.labels())
+    result = GraphRunner(max_parallel=max_parallel, listener=reporter).run(blueprint, api_instance, name)
+    reporter.emit(
+        "run_finished",
+        run_id=result.run_id,
+        ok=result.ok,
+        elapsed_ms=round(result.elapsed * 1000, 3),
+        succeeded=len(result.outputs),
+        failed=len(result.errors),
+        skipped=len(result.skipped),
+    )
+    return result.ok
+
+def run_call(call_name: str, kwargs: dict, target: Target, reporter) -> bool:
+    method = resolve_call(target.create_instance(), call_name)
+    start = time.perf_counter()
+    try:
+        output = call_method(method, kwargs)
+        if output is None and getattr(method, "_is_api_call", False): # The call printed why on stderr
+            raise CallFailed(f"{call_name} returned no result")
+    except Exception as e:
+        reporter.emit("call_failed", call=call_name, error=f"{type(e).__name__}: {e}")
+        return False
+    reporter.emit("call_finished", call=call_name, elapsed_ms=round((time.perf_counter() - start) * 1000, 3), output=output)
+    return True
+
+def run_bench(call_name: str, kwargs: dict, target: Target, reporter) -> bool:
+    """Benchmarks one call; bench options (n, duration, concurrency, rate, cache) are taken out of kwargs."""
+    from engine.Bench import run_benchmark, split_bench_options # Only the bench command needs it
+    options, kwargs = split_bench_options(dict(kwargs))
+    method = resolve_call(target.create_instance(), call_name)
+    reporter.emit("bench_started", call=call_name, **options, **target.labels())
+    result = run_benchmark(lambda: method(**kwargs), call_name, asynchronous=getattr(method, "_is_async", False), **options)
+    reporter.emit("bench_finished", **result.to_dict(), **target.labels())
+    return result.errors == 0
+
+def run_matrix(job, combinations, config_data: dict, reporter, processes=None) -> bool:
+    """Runs a MatrixJob over every combination; streams one event per cell and prints the comparison table to stderr."""
+    from engine.Matrix import MatrixRunner, DEFAULT_MAX_PROCESSES, DEFAULT_MAX_CONCURRENCY # Pulls in multiprocessing
+    matrix_config = config_data.get("matrix", {})
+    runner = MatrixRunner(
+        processes=processes or matrix_config.get("processes", DEFAULT_MAX_PROCESSES),
+        max_concurrency=matrix_config.get("max_concurrency", DEFAULT_MAX_CONCURRENCY),
+        listener=lambda cell: reporter.emit("matrix_cell", **cell.to_dict()),
+    )
+    reporter.emit("matrix_started", api=job.api_name, target=job.describe(), combinations=len(combinations))
+    result = runner.run(job, combinations, config_data)
+    for line in result.table_lines():
+        print(line, file=sys.stderr)
+    reporter.emit("matrix_finished", **result.to_dict())
+    return result.ok
+
+@contextlib.contextmanager
+def profiled(args, reporter):
+    """With --profile or --profile-out, samples the block; the table goes to stderr and a "profile" event to the stream."""
+    if not (args.profile or args.profile_out):
+        yield
+        return
+    from engine.Profiler import Profiler
+    profiler = Profiler(args.profile_interval)
+    profiler.start()
+    try:
+        yield
+    except BaseException: # A setup error (unknown call, ...) is reported instead of an empty profile
+        profiler.stop()
+        raise
+    profile = profiler.stop()
+    for line in profile.table_lines(args.profile_sort):
+        print(line, file=sys.stderr)
+    if args.profile_out:
+        profile.write_collapsed(args.profile_out)
+    reporter.emit("profile", **profile.to_dict(args.profile_sort))
+
+@contextlib.contextmanager
+def api_output_to_stderr():
+    # API classes print diagnostics; keep stdout a clean JSON lines stream
+    with contextlib.redirect_stdout(sys.stderr):
+        yield
+
+def resolve_target(args, flow_data=None) -> Target:
+    """CLI flags win over the api/environment/tenant stored in the flow file, for commands that run one."""
+    defaults = flow_data or {}
+    api_name = args.api or defaults.get("api")
+    if not api_name:
+        hint = " or set \"api\" in the flow file" if flow_data is not None else ""
+        raise SystemExit(f"error: no API given (use --api{hint})")
+    config_data = load_config(args.config)
+    for mode in ("record", "replay"):
+        if getattr(args, mode, None): # --record/--replay DIR win over "transport" in config.json
+            config_data["transport"] = {"mode": mode, "path": getattr(args, mode)}
+    apply_config(config_data)
+    environment = getattr(args, "env", None) or defaults.get("environment")
+    tenant = getattr(args, "tenant", None) or defaults.get("tenant")
+    return Target(api_name, environment, tenant, config_data, getattr(args, "base_url", None))
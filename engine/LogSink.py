@@ -0,0 +1,94 @@
+import io, sys, logging, threading
+from collections import deque
+
+DEFAULT_MAX_LINES = 10000
+
+class LogSink(io.TextIOBase):
+    """
+    Thread-safe line queue that any thread can write to like a file (print(file=...), sys.stdout, logging).
+    The consumer drains it in batches; when more lines are pending than it can show, the oldest are dropped
+    up front since they would be evicted from the display right away.
+    """
+    def __init__(self, max_pending=DEFAULT_MAX_LINES, echo=None):
+        super().__init__()
+        self.max_pending = max_pending
+        self.echo = echo # Optional stream that also receives everything, e.g. the real stdout
+        self.dropped = 0
+        self._lines = deque()
+        self._lock = threading.Lock()
+        self._partial = threading.local() # Unterminated text per writing thread
+
+    def writable(self):
+        return True
+
+    def write(self, text):
+        if self.echo is not None:
+            self.echo.write(text)
+        pending = getattr(self._partial, "text", "") + text
+        if "\n" not in pending:
+            self._partial.text = pending
+            return len(text)
+        *lines, self._partial.text = pending.split("\n")
+        self.put_lines(lines)
+        return len(text)
+
+    def flush(self):
+        if self.echo is not None:
+            self.echo.flush()
+
+    def put(self, line: str):
+        self.put_lines(str(line).split("\n"))
+
+    def put_lines(self, lines):
+        with self._lock:
+            self._lines.extend(lines)
+            overflow = len(self._lines) - self.max_pending
+            if overflow > 0:
+                for _ in range(overflow):
+                    self._lines.popleft()
+                self.dropped += overflow
+
+    def drain(self):
+        """Returns and clears every pending line, plus how many were dropped since the last drain."""
+        with self._lock:
+            lines, self._lines = self._lines, deque()
+            dropped, self.dropped = self.dropped, 0
+        return lines, dropped
+
+    def clear(self):
+        self.drain()
+
+class LogSinkHandler(logging.Handler):
+    """Routes logging records into a LogSink."""
+    def __init__(self, sink: LogSink, level=logging.INFO):
+        super().__init__(level)
+        self.sink = sink
+        self.setFormatter(logging.Formatter("%(levelname)s %(name)s: %(message)s"))
+
+    def emit(self, record):
+        try:
+            self.sink.put(self.format(record))
+        except Exception:
+            self.handleError(record)
+
+class StdioCapture:
+    """Redirects sys.stdout/sys.stderr and the root logger into a sink until uninstall()."""
+    def __init__(self, sink: LogSink):
+        self.sink = sink
+        self.handler = LogSinkHandler(sink)
+        self._saved = None
+
+    def install(self):
+        if self._saved is not None:
+            return
+        self._saved = (sys.stdout, sys.stderr)
+        sys.stdout = self.sink
+        sys.stderr = self.sink
+        logging.getLogger().addHandler(self.handler)
+
+    def uninstall(self):
+        if self._saved is None:
+            return
+        sys.stdout, sys.stderr = self._saved
+        self._saved = None
+        logging.getLogger().removeHandler(self.handler)
@@ -0,0 +1,266 @@
+import os, sys, json, math, time, queue, hashlib, multiprocessing
+from fnmatch import fnmatchcase
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from apis.Cassette import cassette_library
+from apis.History import run_history
+from apis.Registry import api_registry
+from engine.Config import apply_config
+from engine.Executor import call_method, resolve_call
+from engine.Graph import Blueprint, flow_node_count
+from engine.GraphRunner import GraphRunner, DEFAULT_MAX_PARALLEL
+
+DEFAULT_MAX_PROCESSES = 8
+DEFAULT_MAX_CONCURRENCY = 64 # Combinations in flight at once across all processes
+PREVIEW_CHARS = 80
+
+def matrix_combinations(config_data: dict, api_name: str, environments=None, tenants=None):
+    """
+    (environment, tenant) pairs configured for api_name, in config order. `environments`/`tenants` are lists of
+    names or fnmatch patterns (e.g. ["prod*"]); None keeps everything. Environments without tenants give (env, None).
+    """
+    api_config = config_data.get("apis", {}).get(api_name)
+    if not api_config:
+        raise KeyError(f"Configuration for API '{api_name}' not found.")
+    combinations = []
+    for environment, environment_config in api_config.get("environments", {}).items():
+        if environments and not _matches_any(environment, environments):
+            continue
+        for tenant in list((environment_config or {}).get("tenants", {})) or [None]:
+            if tenants and (tenant is None or not _matches_any(tenant, tenants)):
+                continue
+            combinations.append((environment, tenant))
+    return combinations
+
+def _matches_any(name, patterns):
+    return any(fnmatchcase(name, pattern) for pattern in patterns)
+
+class MatrixJob:
+    """What every cell of a matrix runs: one API call with kwargs, or a blueprint (flow_data)."""
+    def __init__(self, api_name, call_name=None, kwargs=None, flow_data=None, max_parallel=DEFAULT_MAX_PARALLEL, base_url=None):
+        if (call_name is None) == (flow_data is None):
+            raise ValueError("A matrix job runs either a call or a blueprint")
+        self.api_name = api_name
+        self.call_name = call_name
+        self.kwargs = dict(kwargs or {})
+        self.flow_data = flow_data
+        self.max_parallel = max_parallel
+        self.base_url = base_url
+
+    def describe(self):
+        if self.call_name:
+            return self.call_name
+        return f"blueprint ({flow_node_count(self.flow_data)} nodes)"
+
+class MatrixCell:
+    """Outcome of the job for one environment/tenant. Outputs stay in the worker; only a digest and preview come back."""
+    def __init__(self, environment, tenant):
+        self.environment = environment
+        self.tenant = tenant
+        self.ok = False
+        self.elapsed = 0.0
+        self.digest = None # Hash of the canonical JSON output, to compare results across tenants
+        self.preview = ""
+        self.error = None
+        self.counts = None # For blueprints: succeeded/failed/skipped node counts
+        self.worker = None # pid of the process that ran it
+
+    def set_output(self, output):
+        text = json.dumps(output, sort_keys=True, default=repr)
+        self.digest = hashlib.sha1(text.encode()).hexdigest()[:10]
+        self.preview = text if len(text) <= PREVIEW_CHARS else text[:PREVIEW_CHARS - 3] + "..."
+
+    def to_dict(self):
+        return {
+            "environment": self.environment,
+            "tenant": self.tenant,
+            "ok": self.ok,
+            "elapsed_ms": round(self.elapsed * 1000, 3),
+            "digest": self.digest,
+            "preview": self.preview,
+            "error": self.error,
+            "counts": self.counts,
+            "worker": self.worker,
+        }
+
+class MatrixResult:
+    def __init__(self, job, cells, elapsed):
+        self.job = job
+        self.cells = cells # In combination order
+        self.elapsed = elapsed
+
+    @property
+    def ok(self):
+        return all(cell.ok for cell in self.cells)
+
+    def variants(self):
+        """digest -> letter, "A" being the most common successful output."""
+        counts = {}
+        for cell in self.cells:
+            if cell.ok:
+                counts[cell.digest] = counts.get(cell.digest, 0) + 1
+        ordered = sorted(counts, key=lambda digest: -counts[digest])
+        return {digest: _variant_name(index) for index, digest in enumerate(ordered)}
+
+    def comparison_rows(self):
+        variants = self.variants()
+        rows = []
+        for cell in self.cells:
+            row = cell.to_dict()
+            row["variant"] = variants.get(cell.digest) if cell.ok else None
+            rows.append(row)
+        return rows
+
+    def table_lines(self):
+        rows = self.comparison_rows()
+        env_width = max([len("environment")] + [len(str(row["environment"])) for row in rows])
+        tenant_width = max([len("tenant")] + [len(str(row["tenant"] or "-")) for row in rows])
+        lines = [f"{'environment':<{env_width}}  {'tenant':<{tenant_width}}  {'status':<7}{'ms':>10}  variant  detail"]
+        for row in rows:
+            if row["ok"]:
+                status, detail = "ok", row["preview"]
+            else:
+                status, detail = "failed", row["error"] or ""
+            if row["counts"]:
+                counts = row["counts"]
+                detail = f"{counts['succeeded']} ok, {counts['failed']} failed, {counts['skipped']} skipped; {detail}"
+            lines.append(
+                f"{str(row['environment']):<{env_width}}  {str(row['tenant'] or '-'):<{tenant_width}}  {status:<7}"
+                f"{row['elapsed_ms']:>10.1f}  {row['variant'] or '-':<7}  {detail}"
+            )
+        failed = sum(1 for cell in self.cells if not cell.ok)
+        slowest = max((cell.elapsed for cell in self.cells), default=0.0)
+        total = sum(cell.elapsed for cell in self.cells)
+        lines.append(
+            f"{self.job.describe()}: {len(self.cells)} combination(s) in {self.elapsed:.2f} s "
+            f"(slowest {slowest:.2f} s, {total:.2f} s summed), {len(self.cells) - failed} ok, {failed} failed, "
+            f"{len(self.variants())} distinct result(s)"
+        )
+        return lines
+
+    def to_dict(self):
+        return {"target": self.job.describe(), "ok": self.ok, "elapsed_ms": round(self.elapsed * 1000, 3), "rows": self.comparison_rows()}
+
+def _variant_name(index):
+    name = ""
+    index += 1
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        name = chr(ord("A") + remainder) + name
+    return name
+
+# Worker process state, set up once per process by _init_worker
+_worker_config = None
+_worker_events = None
+
+def _init_worker(config_data, events, api_name):
+    global _worker_config, _worker_events
+    _worker_config = config_data
+    _worker_events = events
+    sys.stdout = open(os.devnull, 'w') # API classes print every response; results travel back as MatrixCells
+    apply_config(config_data) # Pooled sessions are per process and reused by every cell it runs
+    try:
+        api_registry.resolve_config(config_data["apis"][api_name]) # Import up front so cell timings are just the calls
+    except Exception:
+        pass # Reported per cell when the instance is created
+
+def _run_batch(job, combinations, threads):
+    with ThreadPoolExecutor(max_workers=threads, thread_name_prefix="ae-matrix") as pool:
+        cells = list(pool.map(lambda combination: _run_cell(job, *combination), combinations))
+    run_history.flush() # The worker's history rows are committed before the parent reports the sweep done
+    cassette_library.flush()
+    return cells
+
+def _run_cell(job, environment, tenant):
+    from engine.Headless import Target # Deferred: Headless isn't needed by the parent process's import of this module
+    cell = MatrixCell(environment, tenant)
+    cell.worker = os.getpid()
+    start = time.perf_counter()
+    try:
+        api_instance = Target(job.api_name, environment, tenant, _worker_config, job.base_url).create_instance()
+        if job.flow_data is not None:
+            result = GraphRunner(max_parallel=job.max_parallel).run(Blueprint.from_dict(job.flow_data), api_instance)
+            cell.ok = result.ok
+            cell.counts = {"succeeded": len(result.outputs), "failed": len(result.errors), "skipped": len(result.skipped)}
+            if result.errors:
+                node_id, error = next(iter(result.errors.items()))
+                cell.error = f"{node_id}: {type(error).__name__}: {error}"
+            cell.set_output(result.outputs)
+        else:
+            output = call_method(resolve_call(api_instance, job.call_name), job.kwargs)
+            cell.ok = output is not None # @api_call methods return None when the request failed
+            if not cell.ok:
+                cell.error = "call returned no result"
+            cell.set_output(output)
+    except Exception as e:
+        cell.error = f"{type(e).__name__}: {e}"
+    cell.elapsed = time.perf_counter() - start
+    _worker_events.put(cell)
+    return cell
+
+class MatrixRunner:
+    """
+    Runs a MatrixJob for many environment/tenant combinations at once.
+    Combinations are spread over a pool of worker processes, each running its share concurrently on threads, so a sweep
+    takes about as long as its slowest combination (up to max_concurrency in flight). Workers are spawned rather than
+    forked, which is safe next to Qt and worker threads in the parent. listener(cell) is called, from the calling
+    thread, as each combination completes.
+    """
+    def __init__(self, processes=DEFAULT_MAX_PROCESSES, max_concurrency=DEFAULT_MAX_CONCURRENCY, listener=None):
+        if processes < 1 or max_concurrency < 1:
+            raise ValueError("processes and max_concurrency must be at least 1")
+        self.processes = processes
+        self.max_concurrency = max_concurrency
+        self.listener = listener
+
+    def run(self, job: MatrixJob, combinations, config_data: dict) -> MatrixResult:
+        combinations = list(combinations)
+        start = time.perf_counter()
+        if not combinations:
+            return MatrixResult(job, [], 0.0)
+        processes = min(self.processes, len(combinations), os.cpu_count() or 1)
+        batches = [combinations[index::processes] for index in range(processes)]
+        threads = max(1, min(math.ceil(len(combinations) / processes), self.max_concurrency // processes))
+
+        context = multiprocessing.get_context("spawn")
+        events = context.Queue()
+        cells = {}
+        initargs = (config_data, events, job.api_name)
+        with ProcessPoolExecutor(processes, mp_context=context, initializer=_init_worker, initargs=initargs) as pool:
+            pending = {pool.submit(_run_batch, job, batch, threads): batch for batch in batches}
+            while len(cells) < len(combinations):
+                try:
+                    cell = events.get(timeout=0.1)
+                except queue.Empty:
+                    if self._collect_finished_batches(pending, cells):
+                        break
+                    continue
+                cells[(cell.environment, cell.tenant)] = cell
+                if self.listener:
+                    self.listener(cell)
+        ordered = [cells.get(combination) or self._lost_cell(*combination) for combination in combinations]
+        return MatrixResult(job, ordered, time.perf_counter() - start)
+
+    def _collect_finished_batches(self, pending, cells):
+        """
+        Takes the cells of completed batches that haven't come through the event queue yet (the queue only streams
+        them early), or marks them failed if the worker died. True once every batch is done.
+        """
+        for future in [future for future in pending if future.done()]:
+            batch = pending.pop(future)
+            error = future.exception()
+            if error is None:
+                batch_cells = future.result()
+            else:
+                batch_cells = [self._lost_cell(*combination, f"worker failed: {type(error).__name__}: {error}") for combination in batch]
+            for cell in batch_cells:
+                combination = (cell.environment, cell.tenant)
+                if combination not in cells:
+                    cells[combination] = cell
+                    if self.listener:
+                        self.listener(cell)
+        return not pending
+
+    def _lost_cell(self, environment, tenant, error="no result from worker"):
+        cell = MatrixCell(environment, tenant)
+        cell.error = error
+        return cell
@@ -0,0 +1,88 @@
+import json, hashlib, threading
+from apis.Cache import LruStore
+
+DEFAULT_MAX_ENTRIES = 4096
+DEFAULT_MAX_BYTES = 128 * 1024 * 1024
+
+class MemoEntry:
+    __slots__ = ("output", "digest")
+    def __init__(self, output, digest):
+        self.output = output
+        self.digest = digest
+
+def output_fingerprint(output):
+    """(digest, size in bytes) of a node output's canonical JSON, or None when it can't be serialized."""
+    try:
+        text = json.dumps(output, sort_keys=True, default=repr)
+    except (TypeError, ValueError, RuntimeError):
+        return None
+    return hashlib.sha1(text.encode()).hexdigest(), len(text)
+
+class NodeMemo:
+    """
+    Outputs of blueprint nodes keyed by everything they were computed from: the API target, the call, its own
+    parameters and the digests of the upstream outputs fed into it. Replaying a flow after an edit only runs the nodes
+    whose key changed, i.e. the edited nodes and whatever downstream actually receives a different input; a node that
+    re-runs and returns the same output as before leaves its dependents cached. Bounded by entries and bytes (LRU).
+    Outputs are shared with later runs and must be treated as read-only.
+    """
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, max_bytes=DEFAULT_MAX_BYTES):
+        self.enabled = True
+        self._lock = threading.Lock()
+        self._store = LruStore(max_entries, max_bytes)
+        self.hits = 0
+        self.misses = 0
+
+    def configure(self, memo_config: dict):
+        with self._lock:
+            self.enabled = memo_config.get("enabled", True)
+            self._store.max_entries = memo_config.get("max_entries", DEFAULT_MAX_ENTRIES)
+            self._store.max_bytes = memo_config.get("max_bytes", DEFAULT_MAX_BYTES)
+            self._store.clear()
+
+    def key(self, target, call, params: dict, inputs: dict):
+        """
+        `target` identifies the API instance (class, environment, tenant, base URL); `inputs` maps parameter -> digest
+        of the upstream output bound to it. None when an input has no digest, so the node always runs.
+        """
+        if any(digest is None for digest in inputs.values()):
+            return None
+        try:
+            text = json.dumps([target, call, params, inputs], sort_keys=True, default=repr)
+        except (TypeError, ValueError):
+            return None
+        return hashlib.sha1(text.encode()).hexdigest()
+
+    def get(self, key) -> MemoEntry:
+        with self._lock:
+            entry = self._store.get(key)
+            if entry is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return entry
+
+    def put(self, key, output, digest, size):
+        with self._lock:
+            self._store.put(key, MemoEntry(output, digest), size)
+
+    def clear(self):
+        with self._lock:
+            self._store.clear()
+
+    def reset_stats(self):
+        with self._lock:
+            self.hits = self.misses = 0
+            self._store.evictions = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._store),
+                "bytes": self._store.bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self._store.evictions,
+            }
+
+node_memo = NodeMemo()
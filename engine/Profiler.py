@@ -0,0 +1,351 @@
+import os, sys, time, inspect, threading
+
+DEFAULT_INTERVAL_MS = 2.0
+SORT_COLUMNS = ("ms", "samples", "node", "call", "phase")
+
+# Engine phases a sample is attributed to
+DISPATCH = "dispatch"
+IO_WAIT = "I/O wait"
+DECODE = "decode"
+API_CODE = "API code"
+THROTTLE = "throttle"
+UI_UPDATE = "UI update"
+OTHER = "other"
+
+# Source path (relative to the repo or to its sys.path entry) -> phase; the first match wins, and the innermost
+# frame with a phase decides the sample's. Frames of other modules (threading, asyncio, re, ...) take their caller's.
+_FRAME_PHASES = (
+    ("apis/Resilience.py", THROTTLE), # Rate limiter and retry backoff sleeps
+    ("apis/Streaming.py", DECODE),
+    ("engine/Extract.py", API_CODE), # Built-in node types do the node's own work
+    ("GUI/", UI_UPDATE),
+    ("PySide6/", UI_UPDATE),
+    ("shiboken6/", UI_UPDATE),
+    ("engine/", DISPATCH),
+    ("apis/", DISPATCH),
+    ("requests/", DISPATCH),
+    ("socket.py", IO_WAIT),
+    ("ssl.py", IO_WAIT),
+    ("selectors.py", IO_WAIT),
+    ("http/client.py", IO_WAIT),
+    ("urllib3/", IO_WAIT),
+    ("aiohttp/", IO_WAIT),
+    ("json/", DECODE),
+    ("simplejson/", DECODE),
+    ("charset_normalizer/", DECODE),
+    ("chardet/", DECODE),
+    ("codecs.py", DECODE),
+)
+# A thread whose innermost frame is in one of these, outside any node or call, is waiting for work rather than doing it
+_BLOCKING = ("threading.py", "queue.py", "concurrent/futures/_base.py", "selectors.py")
+
+_REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def _short_path(filename):
+    """Path of a source file relative to the repo, or else to the longest sys.path entry it's under."""
+    path = os.path.abspath(filename)
+    bases = [_REPO_ROOT] + sorted((os.path.abspath(entry) for entry in sys.path if entry), key=len, reverse=True)
+    for base in bases:
+        if path.startswith(base + os.sep):
+            return path[len(base) + 1:].replace(os.sep, "/")
+    return os.path.basename(path)
+
+def _matches(path, prefix):
+    return path == prefix if prefix.endswith(".py") else path.startswith(prefix)
+
+def _coroutine_frames(awaitable):
+    """Frames of a suspended coroutine and of everything it awaits, outermost first."""
+    frames = []
+    while awaitable is not None:
+        frame = getattr(awaitable, "cr_frame", None) or getattr(awaitable, "gi_frame", None) or getattr(awaitable, "ag_frame", None)
+        if frame is None:
+            break
+        frames.append(frame)
+        awaitable = getattr(awaitable, "cr_await", None) or getattr(awaitable, "gi_yieldfrom", None) or getattr(awaitable, "ag_await", None)
+    return frames
+
+class ProfileRow:
+    __slots__ = ("node", "call", "phase", "seconds", "samples")
+
+    def __init__(self, node, call, phase, seconds=0.0, samples=0):
+        self.node = node
+        self.call = call
+        self.phase = phase
+        self.seconds = seconds
+        self.samples = samples
+
+    @property
+    def ms(self):
+        return self.seconds * 1000
+
+    def to_dict(self):
+        return {"node": self.node, "call": self.call, "phase": self.phase, "ms": round(self.ms, 3), "samples": self.samples}
+
+class Profile:
+    """
+    What a Profiler saw: time per (node, @api_call, phase) as rows, and the stacks behind them.
+    Times are thread time: two nodes waiting on the network for the same 100 ms count 200 ms.
+    """
+    def __init__(self, stacks, elapsed, ticks, interval):
+        self.elapsed = elapsed
+        self.ticks = ticks # Sampling rounds, each covering every thread (and suspended async task)
+        self.interval = interval
+        self.stacks = [] # (node, call, phase, frame labels outermost first, seconds, samples)
+        self._classifier = _Classifier()
+        for (node, codes, suspended), (seconds, samples) in stacks.items():
+            attribution = self._classifier.attribute(codes, node is not None, suspended)
+            if attribution is not None:
+                call, phase = attribution
+                self.stacks.append((node, call, phase, [self._classifier.label(code) for code in reversed(codes)], seconds, samples))
+
+    @property
+    def seconds(self):
+        return sum(stack[4] for stack in self.stacks)
+
+    def rows(self, by=None, sort="ms") -> list:
+        """Totals per (node, call, phase), or per node, call or phase alone with `by`; sorted by a column of SORT_COLUMNS."""
+        if sort not in SORT_COLUMNS:
+            raise ValueError(f"Unknown sort column '{sort}', expected one of {', '.join(SORT_COLUMNS)}")
+        if by not in (None, "node", "call", "phase"):
+            raise ValueError(f"Unknown grouping '{by}', expected node, call or phase")
+        totals = {}
+        for node, call, phase, _, seconds, samples in self.stacks:
+            key = (node or "-", call or "-", phase)
+            if by is not None:
+                key = tuple(value if column == by else "" for column, value in zip(("node", "call", "phase"), key))
+            row = totals.get(key)
+            if row is None:
+                row = totals[key] = ProfileRow(*key)
+            row.seconds += seconds
+            row.samples += samples
+        numeric = sort in ("ms", "samples")
+        return sorted(totals.values(), key=lambda row: getattr(row, sort), reverse=numeric)
+
+    def table_lines(self, sort="ms", by=None, limit=None):
+        total = self.seconds
+        rows = self.rows(by, sort)
+        lines = [
+            f"profile: {total * 1000:.1f} ms of thread time in {self.elapsed:.2f}s, {self.ticks} samples every {self.interval * 1000:g} ms"
+        ]
+        phases = self.rows("phase")
+        if phases:
+            lines.append("  phases: " + ", ".join(f"{row.phase} {row.seconds / total:.1%}" for row in phases))
+        columns = [column for column in ("node", "call", "phase") if by is None or column == by]
+        widths = {column: max([len(column)] + [len(getattr(row, column)) for row in rows]) for column in columns}
+        lines.append("  " + "  ".join(column.ljust(widths[column]) for column in columns) + f"  {'ms':>10}  {'%':>6}  {'samples':>7}")
+        for row in rows[:limit]:
+            share = row.seconds / total if total else 0.0
+            lines.append(
+                "  " + "  ".join(getattr(row, column).ljust(widths[column]) for column in columns)
+                + f"  {row.ms:>10.1f}  {share:>6.1%}  {row.samples:>7}"
+            )
+        if limit is not None and len(rows) > limit:
+            lines.append(f"  ... {len(rows) - limit} more row(s)")
+        return lines
+
+    def collapsed_lines(self):
+        """Folded stacks, `frame;frame;frame count` from the outermost frame, as read by flamegraph.pl and speedscope."""
+        counts = {}
+        for node, _, _, labels, _, samples in self.stacks:
+            stack = ";".join(([f"node {node}"] if node is not None else []) + labels)
+            counts[stack] = counts.get(stack, 0) + samples
+        return [f"{stack} {count}" for stack, count in sorted(counts.items())]
+
+    def write_collapsed(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            for line in self.collapsed_lines():
+                f.write(line + "\n")
+
+    def to_dict(self, sort="ms"):
+        return {
+            "elapsed_s": round(self.elapsed, 3),
+            "samples": self.ticks,
+            "interval_ms": self.interval * 1000,
+            "phases": {row.phase: round(row.ms, 3) for row in self.rows("phase")},
+            "rows": [row.to_dict() for row in self.rows(sort=sort)],
+        }
+
+class _Classifier:
+    """Maps code objects to frame labels, @api_call names and phases; built when the profile is read, not while sampling."""
+    def __init__(self):
+        from apis.Registry import api_registry
+        from engine.Executor import CallExecutor
+        from engine.GraphRunner import GraphRunner
+        self.calls = {} # code of an @api_call method or built-in node type -> "Api.call" label
+        api_files = set()
+        for spec in api_registry.apis():
+            if spec.cls is None:
+                continue
+            if spec.file:
+                api_files.add(_short_path(spec.file))
+            for call_name in spec.calls:
+                function = inspect.unwrap(getattr(spec.cls, call_name))
+                self.calls[function.__code__] = f"{spec.api_name}.{call_name}"
+        extract = sys.modules.get("engine.Extract") # Only there once a flow used a built-in node
+        if extract is not None:
+            for name, function in extract.NODE_TYPES.items():
+                self.calls[function.__code__] = name
+        self.api_files = api_files
+        # Frames where profiled work starts; a thread without any is idle (a pool worker waiting for a task, ...)
+        self.roots = {
+            GraphRunner.run.__code__, GraphRunner._run_node.__code__, GraphRunner._run_node_async.__code__,
+            CallExecutor._run.__code__, CallExecutor._run_async.__code__,
+        }
+        self._paths = {}
+        self._phases = {}
+        self._labels = {}
+
+    def path(self, code):
+        path = self._paths.get(code)
+        if path is None:
+            path = self._paths[code] = _short_path(code.co_filename)
+        return path
+
+    def phase(self, code):
+        try:
+            return self._phases[code]
+        except KeyError:
+            path = self.path(code)
+            phase = API_CODE if path in self.api_files else next((phase for prefix, phase in _FRAME_PHASES if _matches(path, prefix)), None)
+            self._phases[code] = phase
+            return phase
+
+    def label(self, code):
+        label = self._labels.get(code)
+        if label is None:
+            name = getattr(code, "co_qualname", code.co_name)
+            label = self._labels[code] = f"{name} ({self.path(code)}:{code.co_firstlineno})".replace(";", ":")
+        return label
+
+    def attribute(self, codes, in_node, suspended):
+        """(call label or None, phase) of a stack, innermost code first; None for an idle thread."""
+        call = next((self.calls[code] for code in codes if code in self.calls), None)
+        rooted = in_node or call is not None or any(code in self.roots or self.phase(code) == UI_UPDATE for code in codes)
+        if not rooted:
+            return None
+        phase = next((phase for phase in map(self.phase, codes) if phase is not None), OTHER)
+        if suspended: # An awaiting task uses no CPU: it waits on the network, or on a backoff/rate limit sleep
+            return call, THROTTLE if phase == THROTTLE else IO_WAIT
+        if not in_node and call is None and self.path(codes[0]) in _BLOCKING:
+            return None # e.g. the blueprint dispatcher waiting for its nodes to finish
+        return call, phase
+
+class Profiler:
+    """
+    Sampling profiler for calls and blueprint runs: every `interval` a daemon thread takes the stack of every
+    other thread, and of every task suspended on the shared event loop (engine/AsyncLoop.py), and counts the time
+    against the blueprint node running there, the innermost @api_call and the engine phase of the innermost frame
+    (dispatch, I/O wait, decode, API code, throttle, UI update). Nothing is hooked into the calls themselves, so
+    code runs at full speed between samples; the cost is one stack walk per thread per interval.
+    """
+    def __init__(self, interval_ms=DEFAULT_INTERVAL_MS):
+        if interval_ms <= 0:
+            raise ValueError("The profiler interval must be positive")
+        from engine.GraphRunner import GraphRunner
+        self.interval = interval_ms / 1000
+        # Code object -> name of the local holding the node (or node id) a frame works for
+        self.node_frames = {GraphRunner._run_node.__code__: "node", GraphRunner._run_node_async.__code__: "node"}
+        self._stacks = {} # (node id, codes innermost first, suspended) -> [seconds, samples]
+        self._stop = threading.Event()
+        self._thread = None
+        self._started = None
+        self._ticks = 0
+
+    def node_frame(self, function, local_name):
+        """Also attributes the frames of `function` (and everything below them) to the node in its local `local_name`."""
+        self.node_frames[inspect.unwrap(function).__code__] = local_name
+
+    def is_running(self):
+        return self._thread is not None
+
+    def start(self):
+        if self._thread is not None:
+            raise RuntimeError("The profiler is already running")
+        self._stacks = {}
+        self._ticks = 0
+        self._stop.clear()
+        self._started = time.perf_counter()
+        self._thread = threading.Thread(target=self._sample_loop, name="ae-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> Profile:
+        if self._thread is None:
+            raise RuntimeError("The profiler isn't running")
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        return Profile(self._stacks, time.perf_counter() - self._started, self._ticks, self.interval)
+
+    def _sample_loop(self):
+        own_thread = threading.get_ident()
+        last = time.perf_counter()
+        while not self._stop.wait(self.interval):
+            now = time.perf_counter()
+            weight, last = now - last, now # The actual gap, which grows when the GIL was busy
+            self._ticks += 1
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id != own_thread:
+                    codes, node = self._walk(frame)
+                    self._add((node, codes, False), weight)
+            for frames in self._suspended_tasks():
+                codes, node = self._walk_frames(frames)
+                self._add((node, codes, True), weight)
+
+    def _add(self, key, weight):
+        entry = self._stacks.get(key)
+        if entry is None:
+            self._stacks[key] = [weight, 1]
+        else:
+            entry[0] += weight
+            entry[1] += 1
+
+    def _walk(self, frame):
+        codes = []
+        node = None
+        node_frames = self.node_frames
+        while frame is not None:
+            code = frame.f_code
+            codes.append(code)
+            if node is None and code in node_frames:
+                node = self._node_of(frame)
+            frame = frame.f_back
+        return tuple(codes), node
+
+    def _walk_frames(self, frames):
+        codes = []
+        node = None
+        for frame in reversed(frames):
+            code = frame.f_code
+            codes.append(code)
+            if node is None and code in self.node_frames:
+                node = self._node_of(frame)
+        return tuple(codes), node
+
+    def _node_of(self, frame):
+        value = frame.f_locals.get(self.node_frames[frame.f_code])
+        node_id = getattr(value, "id", value)
+        return None if node_id is None else str(node_id)
+
+    def _suspended_tasks(self):
+        """Frames of the tasks waiting on the shared event loop, other than the one running on its thread right now."""
+        module = sys.modules.get("engine.AsyncLoop") # Never starts the loop
+        loop = getattr(getattr(module, "async_loop", None), "_loop", None)
+        if loop is None or loop.is_closed():
+            return []
+        import asyncio # Loaded already, the loop exists
+        try:
+            running = asyncio.current_task(loop)
+            tasks = asyncio.all_tasks(loop) # Safe to call from another thread: it retries while the task set changes
+        except RuntimeError:
+            return []
+        return [frames for frames in (_coroutine_frames(task.get_coro()) for task in tasks if task is not running) if frames]
+
+def split_profile_options(kwargs: dict):
+    """Separates profile options (interval, sort, by, out) from the call's own parameters."""
+    options = {key: kwargs.pop(key) for key in ("interval", "sort", "by", "out") if key in kwargs}
+    return {
+        "interval_ms": float(options.get("interval", DEFAULT_INTERVAL_MS)),
+        "sort": str(options.get("sort", "ms")),
+        "by": options.get("by"),
+        "out": options.get("out"),
+    }, kwargs
@@ -0,0 +1,168 @@
+import sys, json, math, time, random, hashlib, threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from apis.Cassette import request_key
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """
+    Answers GET /data and /data/<key_path> like the example backend, with keep-alive and ETags, or with cassettes
+    replays whatever was recorded for the request.
+    """
+    protocol_version = "HTTP/1.1" # Keep-alive, so pooled sessions are exercised like against a real server
+    disable_nagle_algorithm = True # Headers and body are separate writes; avoid the delayed-ACK stall on keep-alive
+
+    def do_GET(self):
+        server = self.server
+        if server.cassettes:
+            self._replay()
+            return
+        if server.latency:
+            time.sleep(server.latency)
+        if not (self.path == "/data" or self.path.startswith("/data/")):
+            self._send(404, b'{"error": "not found"}')
+            return
+        if self._shed_load():
+            return
+        body = server.body_for(self.path)
+        etag = server.etag_for(body)
+        if self.headers.get("If-None-Match") == etag:
+            self._send(304, b"", etag)
+        else:
+            self._send(200, body, etag)
+
+    def do_POST(self):
+        if self.server.cassettes:
+            self._replay()
+        else:
+            self._read_body() # Keeps the keep-alive connection usable
+            self._send(405, b'{"error": "method not allowed"}')
+
+    do_PUT = do_PATCH = do_DELETE = do_POST
+
+    def _replay(self):
+        server = self.server
+        recorded = server.lookup(request_key(self.command, self.path, self._read_body()))
+        delay = server.latency + (random.uniform(0, server.jitter) if server.jitter else 0.0)
+        if recorded is not None:
+            delay += recorded.elapsed * server.recorded_latency
+        if delay:
+            time.sleep(delay)
+        if recorded is None:
+            self._send(404, b'{"error": "not in any cassette"}')
+        elif not self._shed_load():
+            headers = {name: value for name, value in recorded.headers.items() if name.lower() not in ("server", "date")} # Sent fresh by send_response()
+            self._send(recorded.status, recorded.body, headers=headers)
+
+    def _shed_load(self):
+        """Answers with 429 or 503 as rate_limit/error_rate ask; True when it did."""
+        server = self.server
+        retry_after = server.admit()
+        if retry_after is not None:
+            self._send(429, b'{"error": "rate limited"}', headers={"Retry-After": str(retry_after)})
+            return True
+        if server.error_rate and random.random() < server.error_rate:
+            self._send(503, b'{"error": "unavailable"}')
+            return True
+        return False
+
+    def _read_body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(length) if length else None
+
+    def _send(self, status, body, etag=None, headers=None):
+        headers = headers or {}
+        self.send_response(status)
+        if not any(name.lower() == "content-type" for name in headers):
+            self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        if etag:
+            self.send_header("ETag", etag)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass # Access logs would dominate benchmark time
+
+class StandInServer(ThreadingHTTPServer):
+    """
+    Local stand-in for the API backend, for benchmarks and offline runs.
+    `latency` (seconds) is injected before every response; `records` sets the size of the generated payload.
+    `rate_limit` (req/s) answers requests over the limit with 429 + Retry-After, and a fraction `error_rate` of the
+    others get a 503, to exercise client retries and backoff.
+    With `cassettes` (apis/Cassette.py) it serves the recorded responses instead, for any method; `jitter` adds up to
+    that many random seconds to the latency, and `recorded_latency` scales the time each response originally took.
+    """
+    daemon_threads = True
+    request_queue_size = 4096 # Listen backlog: async clients open thousands of connections at once
+
+    def __init__(self, host="127.0.0.1", port=5000, latency=0.0, records=10, rate_limit=None, error_rate=0.0, handler=StandInHandler,
+                 cassettes=(), jitter=0.0, recorded_latency=0.0):
+        super().__init__((host, port), handler)
+        self.latency = latency
+        self.records = records
+        self.rate_limit = rate_limit
+        self.error_rate = error_rate
+        self.cassettes = list(cassettes)
+        self.jitter = jitter
+        self.recorded_latency = recorded_latency
+        self._tokens = rate_limit or 0.0 # One second of burst
+        self._tokens_updated = time.monotonic()
+        self._tokens_lock = threading.Lock()
+        self._bodies = {}
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def body_for(self, path):
+        body = self._bodies.get(path)
+        if body is None:
+            key = path[len("/data/"):] if path.startswith("/data/") else None
+            items = [{"id": index, "name": f"item-{index}", "value": index * 1.5} for index in range(self.records)]
+            body = json.dumps({"key_path": key, "items": items}).encode()
+            self._bodies[path] = body
+        return body
+
+    def lookup(self, key):
+        for cassette in self.cassettes:
+            recorded = cassette.lookup(key)
+            if recorded is not None:
+                return recorded
+        return None
+
+    def handle_error(self, request, client_address):
+        error = sys.exc_info()[1]
+        if isinstance(error, (ConnectionResetError, BrokenPipeError)):
+            return # Clients closing pooled keep-alive connections
+        super().handle_error(request, client_address)
+
+    def admit(self):
+        """None when the request is within rate_limit, otherwise the whole seconds to put in Retry-After."""
+        if not self.rate_limit:
+            return None
+        with self._tokens_lock:
+            now = time.monotonic()
+            self._tokens = min(self.rate_limit, self._tokens + (now - self._tokens_updated) * self.rate_limit)
+            self._tokens_updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return None
+            return max(1, math.ceil((1 - self._tokens) / self.rate_limit))
+
+    def etag_for(self, body):
+        return '"' + hashlib.sha1(body).hexdigest()[:16] + '"'
+
+    def start(self):
+        """Serves on a daemon thread and returns self; stop() shuts it down."""
+        self._thread = threading.Thread(target=self.serve_forever, name="ae-standin", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+        for cassette in self.cassettes:
+            cassette.close()
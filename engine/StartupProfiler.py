@@ -0,0 +1,91 @@
+import sys, time, contextlib
+
+class _TimedLoader:
+    """Wraps a module loader to time module creation and execution."""
+    def __init__(self, loader, profiler, name):
+        self._loader = loader
+        self._profiler = profiler
+        self._name = name
+
+    def __getattr__(self, attribute):
+        return getattr(self._loader, attribute)
+
+    def create_module(self, spec):
+        # Extension modules (PySide6, shiboken6, ...) do all of their loading here
+        with self._profiler.measure_import(self._name):
+            return self._loader.create_module(spec)
+
+    def exec_module(self, module):
+        module.__loader__ = self._loader # Hide the wrapper from code that inspects __loader__
+        with self._profiler.measure_import(self._name):
+            self._loader.exec_module(module)
+
+class _TimingFinder:
+    """Meta path finder that defers to the real finders and wraps whatever loader they return."""
+    def __init__(self, profiler):
+        self._profiler = profiler
+
+    def find_spec(self, name, path=None, target=None):
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, "find_spec"):
+                continue
+            spec = finder.find_spec(name, path, target)
+            if spec is not None:
+                if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+                    spec.loader = _TimedLoader(spec.loader, self._profiler, name)
+                return spec
+        return None
+
+class StartupProfiler:
+    """
+    Records how long every module import (self and cumulative time) and every named startup phase takes.
+    Enabled with `--profile-startup`; install() must run before the imports you want to see.
+    """
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.imports = {} # module name -> [self seconds, cumulative seconds]
+        self.phases = [] # (name, seconds)
+        self._stack = []
+        self._finder = _TimingFinder(self)
+
+    def install(self):
+        sys.meta_path.insert(0, self._finder)
+
+    def uninstall(self):
+        if self._finder in sys.meta_path:
+            sys.meta_path.remove(self._finder)
+
+    @contextlib.contextmanager
+    def measure_import(self, name):
+        self._stack.append(0.0) # Time spent in nested imports
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            cumulative = time.perf_counter() - start
+            nested = self._stack.pop()
+            if self._stack:
+                self._stack[-1] += cumulative
+            timing = self.imports.setdefault(name, [0.0, 0.0])
+            timing[0] += cumulative - nested
+            timing[1] += cumulative
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append((name, time.perf_counter() - start))
+
+    def report_lines(self, top=25):
+        total = time.perf_counter() - self.started
+        import_total = sum(self_time for self_time, _ in self.imports.values())
+        lines = [f"Startup profile: {total * 1000:.1f} ms total, {import_total * 1000:.1f} ms in {len(self.imports)} imports"]
+        for name, seconds in self.phases:
+            lines.append(f"  phase  {seconds * 1000:9.1f} ms  {name}")
+        ranked = sorted(self.imports.items(), key=lambda item: item[1][1], reverse=True)
+        lines.append(f"  {'self ms':>9}  {'cumul ms':>9}  module (top {top} by cumulative time)")
+        for name, (self_time, cumulative) in ranked[:top]:
+            lines.append(f"  {self_time * 1000:9.1f}  {cumulative * 1000:9.1f}  {name}")
+        return lines